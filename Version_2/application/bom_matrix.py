@@ -0,0 +1,154 @@
+from typing import Dict, List, Optional, Iterable
+
+import numpy as np
+
+from domain.models import StockCurrent
+from domain.services import BOMService, InventoryService
+
+
+class StockVector:
+    """
+    Stock actual como vector indexado por ID de producto.
+
+    Se construye con una única lectura del inventario y se mantiene al día
+    con los cambios de stock notificados por InventoryService, sin volver a
+    consultar el repositorio.
+    """
+
+    def __init__(self, stock: Iterable[StockCurrent] = ()):
+        """
+        Args:
+            stock: Niveles de stock iniciales
+        """
+        self.reload(stock)
+
+    def reload(self, stock: Iterable[StockCurrent]) -> None:
+        """Sustituye todos los niveles de stock (p. ej. tras deshacer una transacción)."""
+        stock = list(stock)
+        size = max((item.product_id for item in stock), default=0) + 1
+        self.values = np.zeros(size, dtype=np.int64)
+        for item in stock:
+            self.values[item.product_id] = item.quantity
+
+    @classmethod
+    def from_inventory(cls, inventory_service: InventoryService) -> "StockVector":
+        """Crea el vector y lo suscribe a los cambios de stock del servicio."""
+        vector = cls(inventory_service.get_all_stock())
+        inventory_service.add_stock_listener(vector.stock_changed)
+        return vector
+
+    def stock_changed(self, product_id: int, previous: int, new: int) -> None:
+        """Actualiza un producto (compatible con InventoryService.add_stock_listener)."""
+        if product_id >= len(self.values):
+            self.values = np.concatenate(
+                [self.values, np.zeros(product_id + 1 - len(self.values), dtype=np.int64)]
+            )
+        self.values[product_id] = new
+
+    def get(self, product_id: int) -> int:
+        """Stock de un producto (0 si no tiene registro)."""
+        return int(self.values[product_id]) if product_id < len(self.values) else 0
+
+    def take(self, product_ids: np.ndarray) -> np.ndarray:
+        """Stock de varios productos (0 para los que no tienen registro)."""
+        in_range = product_ids < len(self.values)
+        return np.where(in_range, self.values[np.where(in_range, product_ids, 0)], 0)
+
+
+class BOMMatrix:
+    """
+    Matriz productos × materiales con los requisitos aplanados por unidad.
+
+    Permite evaluar en bloque, con operaciones vectorizadas, cuántas unidades
+    de cada producto se pueden fabricar y qué órdenes pendientes son viables
+    con el stock actual.
+    """
+
+    def __init__(self, product_ids: List[int], requirements: Dict[int, Dict[int, int]]):
+        """
+        Args:
+            product_ids: IDs de los productos (filas)
+            requirements: Requisitos por unidad de cada producto {material_id: cantidad}
+        """
+        self.product_ids = np.array(product_ids, dtype=np.int64)
+        self.material_ids = np.array(
+            sorted({material_id for product_id in product_ids for material_id in requirements[product_id]}),
+            dtype=np.int64
+        )
+        self._rows = {product_id: row for row, product_id in enumerate(product_ids)}
+        columns = {material_id: column for column, material_id in enumerate(self.material_ids.tolist())}
+
+        self.matrix = np.zeros((len(product_ids), len(self.material_ids)), dtype=np.int64)
+        for product_id in product_ids:
+            for material_id, quantity in requirements[product_id].items():
+                self.matrix[self._rows[product_id], columns[material_id]] = quantity
+
+    @classmethod
+    def build(cls, bom_service: BOMService, product_ids: List[int]) -> "BOMMatrix":
+        """Construye la matriz a partir de la BOM (cacheada) de cada producto."""
+        return cls(product_ids, {
+            product_id: bom_service.get_requirements(product_id) for product_id in product_ids
+        })
+
+    def covers(self, product_ids: Iterable[int]) -> bool:
+        """Indica si todos los productos tienen fila en la matriz."""
+        return all(product_id in self._rows for product_id in product_ids)
+
+    def rows(self, product_ids: np.ndarray) -> np.ndarray:
+        """Índices de fila de varios productos."""
+        return np.array([self._rows[product_id] for product_id in product_ids.tolist()], dtype=np.int64)
+
+    def requirements(self, product_ids: np.ndarray, quantities: np.ndarray) -> np.ndarray:
+        """
+        Materiales necesarios para varias órdenes.
+
+        Returns:
+            Matriz órdenes × materiales con las cantidades requeridas
+        """
+        return self.matrix[self.rows(product_ids)] * quantities[:, None]
+
+    def max_buildable(self, stock: StockVector) -> Dict[int, Optional[int]]:
+        """
+        Unidades de cada producto que se pueden fabricar con el stock actual.
+
+        Returns:
+            Diccionario {product_id: unidades}, None si el producto no requiere materiales
+        """
+        available = stock.take(self.material_ids)
+        used = self.matrix > 0
+        per_material = np.where(used, available // np.where(used, self.matrix, 1), np.iinfo(np.int64).max)
+        units = per_material.min(axis=1, initial=np.iinfo(np.int64).max)
+        return {
+            product_id: (int(units[row]) if used[row].any() else None)
+            for row, product_id in enumerate(self.product_ids.tolist())
+        }
+
+    def feasible(self, product_ids: np.ndarray, quantities: np.ndarray, stock: StockVector) -> np.ndarray:
+        """
+        Viabilidad de cada orden por separado frente al stock actual.
+
+        Returns:
+            Vector booleano, True si la orden tiene material suficiente
+        """
+        return (self.requirements(product_ids, quantities) <= stock.take(self.material_ids)).all(axis=1)
+
+    def releasable(self, product_ids: np.ndarray, quantities: np.ndarray, stock: StockVector) -> np.ndarray:
+        """
+        Órdenes que se pueden liberar una tras otra, en el orden dado,
+        descontando el material de cada orden liberada y saltando las que
+        ya no tienen material suficiente.
+
+        Returns:
+            Vector booleano, True si la orden se libera
+        """
+        required = self.requirements(product_ids, quantities)
+        available = stock.take(self.material_ids)
+        result = np.zeros(len(required), dtype=bool)
+
+        # Solo se recorren una a una las órdenes viables por separado
+        for index in np.flatnonzero((required <= available).all(axis=1)).tolist():
+            if (required[index] <= available).all():
+                available -= required[index]
+                result[index] = True
+
+        return result
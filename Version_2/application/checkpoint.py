@@ -0,0 +1,47 @@
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import date
+from pydantic import BaseModel
+
+from domain.models import ManufacturingOrder, PurchaseOrder
+
+# Versión del formato; se incrementa si cambia la estructura del checkpoint
+CHECKPOINT_VERSION = 1
+
+
+class ProductionCheckpointEntry(BaseModel):
+    """Orden en fabricación dentro de un checkpoint."""
+    order: ManufacturingOrder
+    remaining_hours: Optional[float] = None  # None si aún espera capacidad
+
+
+class SimulationCheckpoint(BaseModel):
+    """
+    Estado completo del simulador que no está en la base de datos: colas en
+    memoria, reloj de SimPy, fecha simulada, indicadores incrementales y
+    estado de los flujos aleatorios.
+    """
+    version: int = CHECKPOINT_VERSION
+    current_date: date
+    clock: float  # Hora actual del entorno SimPy
+    production: List[ProductionCheckpointEntry]
+    orders_completed_today: int = 0  # Completadas desde el último cierre de día
+    purchases: List[PurchaseOrder]
+    kpis: Optional[Dict[str, Any]] = None  # Estado de los indicadores incrementales
+    random_seed: int
+    random_state: Dict[str, Any]
+    demand_buffer: List[Tuple[List[int], List[int]]]  # (IDs de producto, cantidades) por día
+
+
+class CheckpointStore(ABC):
+    """Interfaz para guardar y recuperar checkpoints del simulador."""
+
+    @abstractmethod
+    def save(self, checkpoint: SimulationCheckpoint) -> None:
+        """Guarda un checkpoint, sustituyendo al anterior."""
+        pass
+
+    @abstractmethod
+    def load(self) -> Optional[SimulationCheckpoint]:
+        """Recupera el último checkpoint guardado, o None si no hay ninguno."""
+        pass
@@ -0,0 +1,133 @@
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from domain.models import ManufacturingOrder, ManufacturingOrderStatus
+
+
+class FeasibilityIndex:
+    """
+    Índice incremental de viabilidad de las órdenes de fabricación pendientes.
+
+    Guarda, para cada orden pendiente, sus requisitos de material y los
+    materiales que el disponible actual no cubre. Un índice inverso
+    material → órdenes hace que un cambio en el disponible de un material solo
+    revise las órdenes que lo usan, de modo que las órdenes liberables se
+    obtienen sin recalcular nada.
+    """
+
+    def __init__(
+        self,
+        requirements: Callable[[int, int], Dict[int, int]],
+        available: Callable[[int], int],
+        reserved_for: Optional[Callable[[int, int], int]] = None
+    ):
+        """
+        Args:
+            requirements: Materiales necesarios para (product_id, cantidad)
+            available: Disponible actual de un material
+            reserved_for: Cantidad de un material reservada para una orden
+                (order_id, material_id), que cuenta como disponible para ella
+        """
+        self._requirements_of = requirements
+        self._available = available
+        self._reserved_for = reserved_for
+
+        self.orders: Dict[int, ManufacturingOrder] = {}
+        self.requirements: Dict[int, Dict[int, int]] = {}
+        self.shortages: Dict[int, Set[int]] = {}
+        self._orders_by_material: Dict[int, Set[int]] = {}
+        self._feasible: Set[int] = set()
+
+    def load(self, orders: Iterable[ManufacturingOrder]) -> None:
+        """Reconstruye el índice con las órdenes pendientes indicadas."""
+        self.orders.clear()
+        self.requirements.clear()
+        self.shortages.clear()
+        self._orders_by_material.clear()
+        self._feasible.clear()
+        for order in orders:
+            self.add_order(order)
+
+    def rebuild(self) -> None:
+        """Recalcula los requisitos de todas las órdenes (p. ej. tras cambiar la BOM)."""
+        self.load(list(self.orders.values()))
+
+    def add_order(self, order: ManufacturingOrder) -> None:
+        """Añade (o vuelve a evaluar) una orden pendiente."""
+        if order.id in self.orders:
+            self.remove_order(order.id)
+
+        required = self._requirements_of(order.product_id, order.quantity)
+        self.orders[order.id] = order
+        self.requirements[order.id] = required
+        self.shortages[order.id] = set()
+        for material_id in required:
+            self._orders_by_material.setdefault(material_id, set()).add(order.id)
+        self._evaluate(order.id, required)
+
+    def remove_order(self, order_id: int) -> None:
+        """Quita una orden del índice (si está)."""
+        if order_id not in self.orders:
+            return
+        for material_id in self.requirements.pop(order_id):
+            orders = self._orders_by_material[material_id]
+            orders.discard(order_id)
+            if not orders:
+                del self._orders_by_material[material_id]
+        del self.orders[order_id]
+        del self.shortages[order_id]
+        self._feasible.discard(order_id)
+
+    def order_changed(self, order: ManufacturingOrder) -> None:
+        """
+        Mantiene el índice ante la creación o el cambio de estado de una orden
+        (compatible con ManufacturingService.add_order_listener).
+        """
+        if order.status == ManufacturingOrderStatus.PENDING:
+            self.add_order(order)
+        else:
+            self.remove_order(order.id)
+
+    def material_changed(self, material_id: int) -> None:
+        """Vuelve a evaluar solo las órdenes que usan el material."""
+        for order_id in self._orders_by_material.get(material_id, ()):
+            self._evaluate(order_id, (material_id,))
+
+    def available(self, material_id: int) -> int:
+        """Disponible de un material para cualquier orden."""
+        return self._available(material_id)
+
+    def reserved_for(self, order_id: int, material_id: int) -> int:
+        """Cantidad de un material reservada para una orden."""
+        if self._reserved_for is None:
+            return 0
+        return self._reserved_for(order_id, material_id)
+
+    def available_for(self, order_id: int, material_id: int) -> int:
+        """Disponible de un material para una orden, incluida su propia reserva."""
+        return self._available(material_id) + self.reserved_for(order_id, material_id)
+
+    def _evaluate(self, order_id: int, material_ids: Iterable[int]) -> None:
+        required = self.requirements[order_id]
+        shortages = self.shortages[order_id]
+        for material_id in material_ids:
+            if required[material_id] > self.available_for(order_id, material_id):
+                shortages.add(material_id)
+            else:
+                shortages.discard(material_id)
+
+        if shortages:
+            self._feasible.discard(order_id)
+        else:
+            self._feasible.add(order_id)
+
+    def is_feasible(self, order_id: int) -> bool:
+        """Indica si una orden pendiente tiene todo su material disponible."""
+        return order_id in self._feasible
+
+    def feasible_orders(self) -> Set[int]:
+        """IDs de las órdenes pendientes que se pueden liberar ahora mismo."""
+        return set(self._feasible)
+
+    def pending_orders(self) -> List[ManufacturingOrder]:
+        """Órdenes pendientes, en el orden en que entraron al índice."""
+        return list(self.orders.values())
@@ -0,0 +1,105 @@
+from typing import Dict, List, Any, Callable
+
+from application.services import SimulationApplicationService
+
+# Fábrica que crea una rama aislada a partir del estado actual de la simulación
+ForkFactory = Callable[[], SimulationApplicationService]
+
+
+class SimulationForkRegistry:
+    """
+    Registro de ramas "what-if" de la simulación.
+
+    Cada rama es un servicio de simulación independiente creado a partir del
+    estado actual de la simulación principal. Puede avanzarse y modificarse
+    libremente, compararse con la simulación principal y descartarse.
+    """
+
+    def __init__(self, fork_factory: ForkFactory, max_forks: int = 16):
+        """
+        Args:
+            fork_factory: Fábrica que crea una rama del estado actual
+            max_forks: Número máximo de ramas abiertas a la vez
+        """
+        self.fork_factory = fork_factory
+        self.max_forks = max_forks
+        self._forks: Dict[int, SimulationApplicationService] = {}
+        self._next_id = 1
+
+    def create(self) -> int:
+        """
+        Crea una rama a partir del estado actual.
+
+        Returns:
+            ID de la nueva rama
+        """
+        if len(self._forks) >= self.max_forks:
+            raise ValueError(
+                f"Se ha alcanzado el máximo de {self.max_forks} ramas abiertas"
+            )
+
+        fork_id = self._next_id
+        self._forks[fork_id] = self.fork_factory()
+        self._next_id += 1
+        return fork_id
+
+    def get(self, fork_id: int) -> SimulationApplicationService:
+        """
+        Obtiene el servicio de simulación de una rama.
+
+        Raises:
+            KeyError: Si la rama no existe
+        """
+        if fork_id not in self._forks:
+            raise KeyError(f"Rama {fork_id} no encontrada")
+        return self._forks[fork_id]
+
+    def delete(self, fork_id: int) -> None:
+        """
+        Descarta una rama.
+
+        Raises:
+            KeyError: Si la rama no existe
+        """
+        if fork_id not in self._forks:
+            raise KeyError(f"Rama {fork_id} no encontrada")
+        del self._forks[fork_id]
+
+    def list(self) -> List[Dict[str, Any]]:
+        """
+        Lista las ramas abiertas.
+
+        Returns:
+            Lista con el ID y la fecha actual de cada rama
+        """
+        return [
+            {"fork_id": fork_id, "current_date": service.get_current_date().isoformat()}
+            for fork_id, service in self._forks.items()
+        ]
+
+
+def compare_summaries(base: Dict[str, Any], branch: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compara el resumen de estado de la simulación principal con el de una rama.
+
+    Args:
+        base: Resumen de la simulación principal
+        branch: Resumen de la rama
+
+    Returns:
+        Diccionario con ambos resúmenes y las diferencias numéricas (rama - principal)
+    """
+    difference = {
+        key: branch[key] - base[key]
+        for key, value in base.items()
+        if isinstance(value, (int, float)) and key in branch
+    }
+
+    base_inventory = base.get("inventory", {})
+    branch_inventory = branch.get("inventory", {})
+    difference["inventory"] = {
+        name: branch_inventory.get(name, 0) - base_inventory.get(name, 0)
+        for name in sorted(set(base_inventory) | set(branch_inventory))
+    }
+
+    return {"base": base, "fork": branch, "difference": difference}
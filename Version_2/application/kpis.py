@@ -0,0 +1,233 @@
+import copy
+from datetime import date
+from typing import Dict, List, Any, Tuple
+
+from domain.models import ManufacturingOrder, StockCurrent, KPIDailyRollup
+
+
+class KPIAccumulator:
+    """
+    Acumuladores incrementales de los indicadores de la simulación.
+
+    Cada evento (orden creada, liberada o completada, compra emitida o cambio
+    de stock) actualiza los contadores en O(1), y el cierre de cada día cuesta
+    O(productos). Así los indicadores nunca necesitan recorrer el historial
+    de eventos.
+    """
+
+    def __init__(self):
+        # Totales acumulados
+        self.days = 0
+        self.orders_created = 0
+        self.orders_completed = 0
+        self.units_completed = 0
+        self.material_spend = 0.0
+
+        # Cartera pendiente: ID -> (ordinal del día de creación, cantidad)
+        self._backlog: Dict[int, Tuple[int, int]] = {}
+        self._backlog_units = 0
+        self._backlog_day_sum = 0
+
+        # Stock actual, unidades-día acumuladas y días sin stock por producto
+        self._stock: Dict[int, int] = {}
+        self._inventory_days: Dict[int, int] = {}
+        self._stockout_days: Dict[int, int] = {}
+
+        # Contadores del día en curso
+        self._day_created = 0
+        self._day_completed = 0
+        self._day_units_completed = 0
+        self._day_spend = 0.0
+
+    @classmethod
+    def bootstrap(
+        cls,
+        today: date,
+        orders_created: int,
+        pending_orders: List[ManufacturingOrder],
+        completed_orders: List[ManufacturingOrder],
+        stock: List[StockCurrent],
+        material_spend: float
+    ) -> "KPIAccumulator":
+        """
+        Crea los acumuladores a partir del estado de los repositorios, con una
+        única lectura. La antigüedad de las órdenes pendientes se cuenta desde
+        hoy, porque su fecha de creación no es la fecha simulada.
+        """
+        accumulator = cls()
+        for order in pending_orders:
+            day = today.toordinal()
+            accumulator._backlog[order.id] = (day, order.quantity)
+            accumulator._backlog_units += order.quantity
+            accumulator._backlog_day_sum += day
+        accumulator._stock = {item.product_id: item.quantity for item in stock}
+        accumulator.orders_created = orders_created
+        accumulator.orders_completed = len(completed_orders)
+        accumulator.units_completed = sum(order.quantity for order in completed_orders)
+        accumulator.material_spend = material_spend
+        return accumulator
+
+    def copy(self) -> "KPIAccumulator":
+        """Copia independiente de los acumuladores, p. ej. para deshacer una transacción."""
+        clone = copy.copy(self)
+        clone._backlog = dict(self._backlog)
+        clone._stock = dict(self._stock)
+        clone._inventory_days = dict(self._inventory_days)
+        clone._stockout_days = dict(self._stockout_days)
+        return clone
+
+    def order_created(self, order: ManufacturingOrder, today: date) -> None:
+        """Registra una orden de fabricación nueva."""
+        day = today.toordinal()
+        self._backlog[order.id] = (day, order.quantity)
+        self._backlog_units += order.quantity
+        self._backlog_day_sum += day
+        self.orders_created += 1
+        self._day_created += 1
+
+    def order_released(self, order: ManufacturingOrder) -> None:
+        """Registra la salida de una orden de la cartera pendiente."""
+        entry = self._backlog.pop(order.id, None)
+        if entry is not None:
+            day, quantity = entry
+            self._backlog_units -= quantity
+            self._backlog_day_sum -= day
+
+    def order_completed(self, order: ManufacturingOrder) -> None:
+        """Registra una orden de fabricación completada."""
+        self.orders_completed += 1
+        self.units_completed += order.quantity
+        self._day_completed += 1
+        self._day_units_completed += order.quantity
+
+    def purchase_created(self, cost: float) -> None:
+        """Registra el gasto de una orden de compra emitida."""
+        self.material_spend += cost
+        self._day_spend += cost
+
+    def stock_changed(self, product_id: int, previous: int, new: int) -> None:
+        """Registra un cambio de stock (compatible con InventoryService.add_stock_listener)."""
+        self._stock[product_id] = new
+
+    def backlog_avg_age(self, today: date) -> float:
+        """Antigüedad media en días de las órdenes pendientes."""
+        if not self._backlog:
+            return 0.0
+        count = len(self._backlog)
+        return (today.toordinal() * count - self._backlog_day_sum) / count
+
+    def skip_days(self, days: int) -> None:
+        """
+        Acumula el inventario y las roturas de stock de días sin actividad
+        saltados, con el stock actual, que no cambia durante esos días.
+        """
+        self._accumulate(days)
+
+    def close_day(self, today: date, materials: List[int], skipped_days: int = 0) -> KPIDailyRollup:
+        """
+        Cierra el día: acumula el inventario y las roturas de stock y
+        devuelve el resumen diario.
+
+        Args:
+            today: Fecha simulada del cierre
+            materials: IDs de las materias primas
+            skipped_days: Días sin actividad saltados antes de este, ya
+                acumulados con skip_days(); el resumen los cubre también
+
+        Returns:
+            Resumen del día, sin ID asignado
+        """
+        self._accumulate(1)
+
+        rollup = KPIDailyRollup(
+            id=0,  # Será asignado por el repositorio
+            date=today.isoformat(),
+            days=1 + skipped_days,
+            orders_created=self._day_created,
+            orders_completed=self._day_completed,
+            units_completed=self._day_units_completed,
+            backlog_orders=len(self._backlog),
+            backlog_units=self._backlog_units,
+            backlog_avg_age_days=self.backlog_avg_age(today),
+            material_spend=self._day_spend,
+            inventory_units=sum(self._stock.values()),
+            stockout_materials=sum(1 for material_id in materials if self._stock.get(material_id, 0) <= 0)
+        )
+
+        self._day_created = 0
+        self._day_completed = 0
+        self._day_units_completed = 0
+        self._day_spend = 0.0
+
+        return rollup
+
+    def _accumulate(self, days: int) -> None:
+        """Suma días con el stock actual a las unidades-día y a los días sin stock."""
+        self.days += days
+        for product_id, quantity in self._stock.items():
+            self._inventory_days[product_id] = (
+                self._inventory_days.get(product_id, 0) + quantity * days
+            )
+            if quantity <= 0:
+                self._stockout_days[product_id] = self._stockout_days.get(product_id, 0) + days
+
+    def snapshot(self, today: date) -> Dict[str, Any]:
+        """
+        Obtiene el valor actual de todos los indicadores.
+
+        Returns:
+            Diccionario con los indicadores globales y por producto
+        """
+        return {
+            "days": self.days,
+            "orders_created": self.orders_created,
+            "orders_completed": self.orders_completed,
+            "units_completed": self.units_completed,
+            "service_level": (
+                self.orders_completed / self.orders_created if self.orders_created else 1.0
+            ),
+            "throughput_per_day": self.units_completed / self.days if self.days else 0.0,
+            "backlog_orders": len(self._backlog),
+            "backlog_units": self._backlog_units,
+            "backlog_avg_age_days": self.backlog_avg_age(today),
+            "material_spend": self.material_spend,
+            "average_inventory": {
+                product_id: units / self.days
+                for product_id, units in self._inventory_days.items()
+            } if self.days else dict(self._stock),
+            "stockout_days": dict(self._stockout_days)
+        }
+
+    def get_state(self) -> Dict[str, Any]:
+        """Obtiene el estado completo de los acumuladores (serializable en JSON)."""
+        return {
+            "days": self.days,
+            "orders_created": self.orders_created,
+            "orders_completed": self.orders_completed,
+            "units_completed": self.units_completed,
+            "material_spend": self.material_spend,
+            "backlog": [[order_id, day, quantity] for order_id, (day, quantity) in self._backlog.items()],
+            "stock": [[product_id, quantity] for product_id, quantity in self._stock.items()],
+            "inventory_days": [[product_id, units] for product_id, units in self._inventory_days.items()],
+            "stockout_days": [[product_id, days] for product_id, days in self._stockout_days.items()],
+            "day": [self._day_created, self._day_completed, self._day_units_completed, self._day_spend]
+        }
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        """Restaura el estado obtenido con get_state()."""
+        self.days = state["days"]
+        self.orders_created = state["orders_created"]
+        self.orders_completed = state["orders_completed"]
+        self.units_completed = state["units_completed"]
+        self.material_spend = state["material_spend"]
+
+        self._backlog = {order_id: (day, quantity) for order_id, day, quantity in state["backlog"]}
+        self._backlog_units = sum(quantity for _, quantity in self._backlog.values())
+        self._backlog_day_sum = sum(day for day, _ in self._backlog.values())
+
+        self._stock = {product_id: quantity for product_id, quantity in state["stock"]}
+        self._inventory_days = {product_id: units for product_id, units in state["inventory_days"]}
+        self._stockout_days = {product_id: days for product_id, days in state["stockout_days"]}
+
+        (self._day_created, self._day_completed,
+         self._day_units_completed, self._day_spend) = state["day"]
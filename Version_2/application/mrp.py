@@ -0,0 +1,99 @@
+from dataclasses import dataclass
+from typing import List, Tuple
+
+import numpy as np
+
+
+@dataclass
+class MRPResult:
+    """Necesidades netas por material, repartidas en días desde hoy."""
+    material_ids: np.ndarray  # Materiales (columnas), vector M
+    gross: np.ndarray  # Necesidades brutas por día, matriz D × M
+    receipts: np.ndarray  # Entradas previstas de compras abiertas por día, matriz D × M
+    available: np.ndarray  # Disponible hoy, vector M
+    planned: np.ndarray  # Entradas que hay que planificar por día, matriz D × M
+
+    @property
+    def horizon_days(self) -> int:
+        return len(self.gross)
+
+
+def start_days(orders: int, capacity: int, busy: int = 0) -> np.ndarray:
+    """
+    Día (desde hoy) en que empezaría cada orden de la cartera, en orden FIFO.
+
+    Cada hueco de capacidad fabrica una orden al día (la fabricación dura como
+    mucho 24 horas) y los primeros huecos los ocupan las órdenes ya en cola.
+
+    Args:
+        orders: Número de órdenes pendientes
+        capacity: Órdenes que se fabrican a la vez
+        busy: Órdenes ya liberadas que aún ocupan o esperan capacidad
+    """
+    return (busy + np.arange(orders, dtype=np.int64)) // max(1, capacity)
+
+
+def net_requirements(
+    material_ids: np.ndarray,
+    required: np.ndarray,
+    days: np.ndarray,
+    available: np.ndarray,
+    receipt_days: np.ndarray,
+    receipt_columns: np.ndarray,
+    receipt_quantities: np.ndarray
+) -> MRPResult:
+    """
+    Calcula, en una sola pasada vectorizada, las entradas que hay que
+    planificar para cubrir la cartera con el disponible y las compras abiertas.
+
+    Las necesidades brutas se agregan por día con reduceat sobre las órdenes
+    (ordenadas por día), el stock proyectado es el disponible más la suma
+    acumulada de entradas menos necesidades, y las entradas planificadas son
+    los incrementos del máximo acumulado del déficit proyectado (lote a lote).
+
+    Args:
+        material_ids: Materiales (columnas), vector M
+        required: Material que necesita cada orden, matriz N × M
+        days: Día de inicio de cada orden, vector N no decreciente
+        available: Disponible hoy, vector M
+        receipt_days: Día de llegada de cada compra abierta, vector P
+        receipt_columns: Columna del material de cada compra abierta, vector P
+        receipt_quantities: Cantidad de cada compra abierta, vector P
+
+    Returns:
+        Necesidades y entradas por día; el horizonte llega hasta el último día
+        con necesidades (las compras que llegan después no cubren nada)
+    """
+    horizon = int(days[-1]) + 1 if len(days) else 0
+    gross = np.zeros((horizon, len(material_ids)), dtype=np.int64)
+    if len(days):
+        starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+        gross[days[starts]] = np.add.reduceat(required, starts, axis=0)
+
+    receipts = np.zeros_like(gross)
+    within = receipt_days < horizon
+    np.add.at(receipts, (receipt_days[within], receipt_columns[within]), receipt_quantities[within])
+
+    projected = available + np.cumsum(receipts - gross, axis=0)
+    shortfall = np.maximum.accumulate(np.maximum(-projected, 0), axis=0)
+    planned = np.diff(shortfall, axis=0, prepend=np.zeros((1, len(material_ids)), dtype=np.int64))
+
+    return MRPResult(
+        material_ids=material_ids,
+        gross=gross,
+        receipts=receipts,
+        available=available,
+        planned=planned
+    )
+
+
+def planned_entries(result: MRPResult) -> List[Tuple[int, int, int]]:
+    """
+    Entradas planificadas no nulas como tuplas (día, material_id, cantidad),
+    ordenadas por día y material.
+    """
+    days, columns = np.nonzero(result.planned)
+    return [
+        (day, int(result.material_ids[column]), int(result.planned[day, column]))
+        for day, column in zip(days.tolist(), columns.tolist())
+    ]
@@ -0,0 +1,204 @@
+import logging
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from datetime import date
+from typing import Dict, List, Any, Optional, Callable, Tuple, Deque, Iterator
+
+logger = logging.getLogger("3d_printer_simulator.profiling")
+
+# Proveedor de contadores SQL acumulados: (sentencias ejecutadas, filas escritas)
+SQLStatsProvider = Callable[[], Tuple[int, int]]
+
+# Límites superiores (ms) de los cubos del histograma de tiempos
+HISTOGRAM_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# Contexto vacío reutilizable: coste casi nulo con la instrumentación desactivada
+_NO_PHASE = nullcontext()
+
+
+class PhaseProfiler:
+    """
+    Instrumentación por fases del avance de día.
+
+    Para cada fase (generación de demanda, creación de órdenes, fabricación,
+    llegadas de compras, cierre de indicadores, callbacks...) registra el
+    tiempo de reloj, las sentencias SQL ejecutadas y las filas escritas.
+    Conserva los últimos días en una ventana deslizante sobre la que calcula
+    percentiles e histogramas.
+
+    Desactivado, `phase()` devuelve un contexto vacío compartido y los
+    cierres de día no hacen nada.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        window: int = 100,
+        sql_stats: Optional[SQLStatsProvider] = None,
+        log_each_day: bool = False
+    ):
+        """
+        Args:
+            enabled: Si la instrumentación está activa
+            window: Número de días que se conservan para las estadísticas
+            sql_stats: Proveedor de contadores SQL (sin contadores si es None)
+            log_each_day: Escribir una línea de log con las fases de cada día
+        """
+        self.enabled = enabled
+        self.sql_stats = sql_stats
+        self.log_each_day = log_each_day
+
+        # Ventana de días cerrados: (fecha, {fase: (ms, sentencias, filas)})
+        self._days: Deque[Tuple[date, Dict[str, Tuple[float, int, int]]]] = deque(maxlen=window)
+
+        # Día en curso
+        self._current: Dict[str, List[float]] = {}
+        self._day_start: Optional[float] = None
+        self._day_sql: Tuple[int, int] = (0, 0)
+
+    def _read_sql_stats(self) -> Tuple[int, int]:
+        """Lee los contadores SQL acumulados."""
+        return self.sql_stats() if self.sql_stats else (0, 0)
+
+    def phase(self, name: str):
+        """
+        Contexto que mide una fase del día en curso. Las fases medidas entre
+        dos días (commit de la transacción, checkpoint) se suman al último
+        día cerrado.
+
+        Ejemplo:
+            with profiler.phase("purchases"):
+                ...
+        """
+        if not self.enabled:
+            return _NO_PHASE
+        return self._measure(name)
+
+    @contextmanager
+    def _measure(self, name: str) -> Iterator[None]:
+        """Mide una fase y acumula su coste en el día en curso."""
+        statements, rows = self._read_sql_stats()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            end_statements, end_rows = self._read_sql_stats()
+            cost = (elapsed_ms, end_statements - statements, end_rows - rows)
+            if self._day_start is not None:
+                totals = self._current.setdefault(name, [0.0, 0, 0])
+                for index, value in enumerate(cost):
+                    totals[index] += value
+            elif self._days:
+                # Fuera de un día (p. ej. el commit final) se imputa al último día cerrado
+                phases = self._days[-1][1]
+                for phase_name in (name, "total"):
+                    previous = phases.get(phase_name, (0.0, 0, 0))
+                    phases[phase_name] = tuple(a + b for a, b in zip(previous, cost))
+
+    def start_day(self) -> None:
+        """Marca el inicio de un día simulado."""
+        if not self.enabled:
+            return
+        self._current = {}
+        self._day_start = time.perf_counter()
+        self._day_sql = self._read_sql_stats()
+
+    def end_day(self, day: date) -> None:
+        """
+        Cierra el día en curso y lo añade a la ventana. El tiempo no atribuido
+        a ninguna fase (bucle de eventos de SimPy, etc.) se registra como
+        "other" y el total del día como "total".
+        """
+        if not self.enabled or self._day_start is None:
+            return
+
+        total_ms = (time.perf_counter() - self._day_start) * 1000
+        statements, rows = self._read_sql_stats()
+        total_statements = statements - self._day_sql[0]
+        total_rows = rows - self._day_sql[1]
+
+        phases = {name: tuple(values) for name, values in self._current.items()}
+        phases["other"] = (
+            max(0.0, total_ms - sum(values[0] for values in phases.values())),
+            max(0, total_statements - sum(values[1] for values in phases.values())),
+            max(0, total_rows - sum(values[2] for values in phases.values()))
+        )
+        phases["total"] = (total_ms, total_statements, total_rows)
+
+        self._days.append((day, phases))
+        self._day_start = None
+
+        if self.log_each_day:
+            logger.info(
+                "Día %s: %s",
+                day.isoformat(),
+                ", ".join(
+                    f"{name} {ms:.2f} ms/{stmts} sql/{rows_written} filas"
+                    for name, (ms, stmts, rows_written) in phases.items()
+                )
+            )
+
+    def reset(self) -> None:
+        """Descarta los días registrados."""
+        self._days.clear()
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Calcula las estadísticas de cada fase sobre la ventana de días.
+
+        Returns:
+            Diccionario con el estado, el último día y, por fase, los
+            percentiles de tiempo, las medias de SQL y el histograma de tiempos
+        """
+        phases: Dict[str, List[Tuple[float, int, int]]] = {}
+        for _, day_phases in self._days:
+            for name, values in day_phases.items():
+                phases.setdefault(name, []).append(values)
+
+        result = {}
+        for name, samples in phases.items():
+            times = sorted(sample[0] for sample in samples)
+            histogram = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+            for value in times:
+                histogram[bisect_left(HISTOGRAM_BUCKETS_MS, value)] += 1
+
+            result[name] = {
+                "days": len(samples),
+                "mean_ms": sum(times) / len(times),
+                "p50_ms": _percentile(times, 0.50),
+                "p95_ms": _percentile(times, 0.95),
+                "max_ms": times[-1],
+                "mean_statements": sum(sample[1] for sample in samples) / len(samples),
+                "mean_rows_written": sum(sample[2] for sample in samples) / len(samples),
+                "histogram": {
+                    f"<={bucket}ms": count
+                    for bucket, count in zip(HISTOGRAM_BUCKETS_MS, histogram)
+                } | {f">{HISTOGRAM_BUCKETS_MS[-1]}ms": histogram[-1]}
+            }
+
+        last_day = None
+        if self._days:
+            day, day_phases = self._days[-1]
+            last_day = {
+                "date": day.isoformat(),
+                "phases": {
+                    name: {"ms": ms, "statements": statements, "rows_written": rows}
+                    for name, (ms, statements, rows) in day_phases.items()
+                }
+            }
+
+        return {
+            "enabled": self.enabled,
+            "window_days": len(self._days),
+            "last_day": last_day,
+            "phases": result
+        }
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    """Percentil por el método del rango más cercano sobre valores ordenados."""
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
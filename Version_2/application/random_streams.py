@@ -0,0 +1,127 @@
+from typing import Dict, Any, Optional
+import numpy as np
+
+# Nombres de los flujos aleatorios, en orden fijo. Cada flujo se deriva del
+# hijo con el mismo índice de la semilla maestra, por lo que añadir flujos
+# nuevos al final no altera la secuencia de los existentes.
+STREAM_NAMES = (
+    "demand_count",   # Número de pedidos por día
+    "product_mix",    # Producto de cada pedido
+    "quantity",       # Cantidad de cada pedido
+    "lead_time",      # Ruido en los plazos de entrega (reservado)
+)
+
+
+class RandomStreams:
+    """
+    Flujos de números aleatorios independientes y reproducibles para el simulador.
+
+    Cada fuente de aleatoriedad tiene su propio `numpy.random.Generator`,
+    derivado de una semilla maestra mediante `SeedSequence.spawn`. Así, cambiar
+    cuántos números consume un flujo no desplaza a los demás, y réplicas con
+    semillas maestras distintas no comparten secuencias.
+
+    Con `antithetic=True` cada valor se obtiene del uniforme complementario
+    (1 - u, o -z para la normal) del que se usaría con la misma semilla, de
+    modo que dos réplicas con la misma semilla forman un par antitético.
+    """
+
+    def __init__(self, seed: Optional[int] = None, antithetic: bool = False):
+        """
+        Inicializa los flujos a partir de la semilla maestra.
+
+        Args:
+            seed: Semilla maestra. Si es None se toma entropía del sistema;
+                la semilla efectiva queda disponible en `self.seed` para
+                poder reproducir la ejecución.
+            antithetic: Si es True, se generan las variables antitéticas
+        """
+        seed_sequence = np.random.SeedSequence(seed)
+        self.seed = seed_sequence.entropy
+        self.antithetic = antithetic
+
+        self._generators: Dict[str, np.random.Generator] = {
+            name: np.random.Generator(np.random.PCG64(child))
+            for name, child in zip(STREAM_NAMES, seed_sequence.spawn(len(STREAM_NAMES)))
+        }
+
+    @property
+    def demand_count(self) -> np.random.Generator:
+        """Flujo para el número de pedidos diarios."""
+        return self._generators["demand_count"]
+
+    @property
+    def product_mix(self) -> np.random.Generator:
+        """Flujo para la elección de producto de cada pedido."""
+        return self._generators["product_mix"]
+
+    @property
+    def quantity(self) -> np.random.Generator:
+        """Flujo para la cantidad de cada pedido."""
+        return self._generators["quantity"]
+
+    @property
+    def lead_time(self) -> np.random.Generator:
+        """Flujo para el ruido en los plazos de entrega."""
+        return self._generators["lead_time"]
+
+    def normal(self, stream: str, mean: float, std_dev: float, size: int) -> np.ndarray:
+        """
+        Genera valores normales con el flujo indicado.
+
+        Args:
+            stream: Nombre del flujo
+            mean: Media
+            std_dev: Desviación típica
+            size: Número de valores
+
+        Returns:
+            Array de valores
+        """
+        z = self._generators[stream].standard_normal(size)
+        if self.antithetic:
+            z = -z
+        return mean + std_dev * z
+
+    def integers(self, stream: str, low: int, high: int, size: int) -> np.ndarray:
+        """
+        Genera enteros uniformes en [low, high) con el flujo indicado, por
+        transformación inversa de uniformes para admitir la variante antitética.
+
+        Args:
+            stream: Nombre del flujo
+            low: Valor mínimo (incluido)
+            high: Valor máximo (excluido)
+            size: Número de valores
+
+        Returns:
+            Array de enteros
+        """
+        u = self._generators[stream].random(size)
+        if self.antithetic:
+            u = 1.0 - u
+        span = high - low
+        # 1 - u puede valer exactamente 1: se recorta al último valor válido
+        return low + np.minimum(np.floor(u * span), span - 1).astype(np.int64)
+
+    def get_state(self) -> Dict[str, Any]:
+        """
+        Obtiene el estado de todos los flujos (serializable en JSON).
+
+        Returns:
+            Diccionario {nombre_flujo: estado del generador}
+        """
+        return {
+            name: generator.bit_generator.state
+            for name, generator in self._generators.items()
+        }
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        """
+        Restaura el estado de los flujos obtenido con get_state().
+
+        Args:
+            state: Diccionario {nombre_flujo: estado del generador}
+        """
+        for name, generator_state in state.items():
+            self._generators[name].bit_generator.state = generator_state
@@ -0,0 +1,113 @@
+from dataclasses import dataclass, field
+from typing import List
+
+import numpy as np
+
+
+# Con hasta este número de órdenes viables se busca el plan óptimo exacto
+EXACT_LIMIT = 20
+
+
+@dataclass
+class ReleasePlan:
+    """Conjunto de órdenes a liberar en bloque."""
+    order_ids: List[int] = field(default_factory=list)  # Órdenes a liberar, por ID
+    candidates: int = 0  # Órdenes viables por separado con el stock actual
+    capacity: int = 0  # Órdenes que se pueden empezar ahora
+    method: str = "greedy"  # "greedy" o "exact"
+    optimal: bool = True  # Si se ha demostrado que no hay un plan con más órdenes
+
+
+def plan_releases(
+    order_ids: np.ndarray,
+    required: np.ndarray,
+    available: np.ndarray,
+    capacity: int,
+    exact_limit: int = EXACT_LIMIT
+) -> ReleasePlan:
+    """
+    Elige qué órdenes pendientes liberar para completar el mayor número de
+    órdenes con el material disponible y la capacidad libre.
+
+    Primero se hace una pasada voraz: las órdenes se ordenan por su consumo
+    de material ponderado por la escasez de cada material (a igualdad, la más
+    antigua primero) y se toman mientras quepan. Si hay pocas órdenes viables
+    y el plan voraz no alcanza la cota superior, una búsqueda exacta por
+    ramificación y poda, partiendo del plan voraz, encuentra el óptimo.
+
+    Args:
+        order_ids: IDs de las órdenes (N)
+        required: Material que necesita cada orden, matriz N × M
+        available: Material disponible, vector M
+        capacity: Número máximo de órdenes a liberar
+        exact_limit: Máximo de órdenes viables para la búsqueda exacta
+
+    Returns:
+        Plan con las órdenes elegidas en orden de ID
+    """
+    candidates = np.flatnonzero((required <= available).all(axis=1))
+    plan = ReleasePlan(candidates=len(candidates), capacity=max(0, capacity))
+    if plan.capacity == 0 or len(candidates) == 0:
+        return plan
+
+    # Prioridad: fracción del disponible que consume cada orden, sumada por material
+    scarcity = (required[candidates] / np.maximum(available, 1)).sum(axis=1)
+    ranked = candidates[np.lexsort((order_ids[candidates], scarcity))].tolist()
+    bound = min(plan.capacity, len(ranked))
+
+    chosen = []
+    remaining = available.copy()
+    for index in ranked:
+        if (required[index] <= remaining).all():
+            chosen.append(index)
+            remaining -= required[index]
+            if len(chosen) == bound:
+                break
+
+    if len(chosen) < bound:
+        if len(ranked) <= exact_limit:
+            chosen = _best_subset(ranked, required, available, bound, chosen)
+            plan.method = "exact"
+        else:
+            plan.optimal = False
+
+    plan.order_ids = sorted(int(order_ids[index]) for index in chosen)
+    return plan
+
+
+def _best_subset(
+    ranked: List[int], required: np.ndarray, available: np.ndarray, bound: int, best: List[int]
+) -> List[int]:
+    """
+    Ramificación y poda sobre incluir o no cada orden, en orden de prioridad.
+
+    Cota de cada rama: para cada material, cuántas de las órdenes restantes
+    caben como mucho tomando las que menos consumen; el mínimo entre
+    materiales limita cuántas órdenes más se pueden añadir. Se poda cuando ni
+    con esa cota se mejora el mejor plan encontrado.
+    """
+    best = list(best)
+    taken: List[int] = []
+    ranked_required = required[ranked]
+
+    def search(position: int, remaining: np.ndarray) -> None:
+        nonlocal best
+        if len(taken) > len(best):
+            best = list(taken)
+        if len(best) == bound or position == len(ranked):
+            return
+        if len(taken) + min(len(ranked) - position, bound - len(taken)) <= len(best):
+            return
+        cumulative = np.sort(ranked_required[position:], axis=0).cumsum(axis=0)
+        if len(taken) + (cumulative <= remaining).sum(axis=0).min() <= len(best):
+            return
+
+        index = ranked[position]
+        if (required[index] <= remaining).all():
+            taken.append(index)
+            search(position + 1, remaining - required[index])
+            taken.pop()
+        search(position + 1, remaining)
+
+    search(0, available)
+    return best
@@ -0,0 +1,260 @@
+import logging
+import math
+from datetime import date
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from domain.models import (
+    PurchaseOrder, PurchaseOrderStatus, Supplier,
+    ReplenishmentPolicy, ReplenishmentPolicyType
+)
+from domain.services import (
+    InventoryService, PurchasingService, StockReservationService, SupplierSelectionService
+)
+
+logger = logging.getLogger("3d_printer_simulator.replenishment")
+
+
+class InventoryPosition:
+    """
+    Posición de inventario de cada producto: físico + pendiente de recibir -
+    reservado.
+
+    El disponible (físico - reservado) y lo pendiente de recibir se mantienen
+    con los avisos de los servicios, sin consultar los repositorios. Además se
+    anotan los productos cuya posición ha cambiado desde la última evaluación.
+    """
+
+    def __init__(
+        self,
+        available: Callable[[int], int],
+        open_orders: List[PurchaseOrder],
+        refresh_available: Optional[Callable[[], None]] = None
+    ):
+        """
+        Args:
+            available: Disponible actual de un producto (físico - reservado)
+            open_orders: Órdenes de compra aún no recibidas
+            refresh_available: Vuelve a leer el disponible de los repositorios,
+                si lo guarda la propia posición
+        """
+        self._available = available
+        self._refresh_available = refresh_available
+        self.on_order: Dict[int, int] = {}
+        self._count_orders(open_orders)
+
+        # Productos cuya posición ha cambiado desde la última evaluación
+        self.changed: Set[int] = set()
+
+    def _count_orders(self, open_orders: List[PurchaseOrder]) -> None:
+        self.on_order = {}
+        for order in open_orders:
+            self.on_order[order.product_id] = self.on_order.get(order.product_id, 0) + order.quantity
+
+    @classmethod
+    def track(
+        cls,
+        inventory_service: InventoryService,
+        purchasing_service: PurchasingService,
+        reservation_service: Optional[StockReservationService] = None
+    ) -> "InventoryPosition":
+        """Crea la posición y la suscribe a los cambios de stock, reservas y compras."""
+        if reservation_service is not None:
+            position = cls(reservation_service.get_available, purchasing_service.get_pending_orders())
+            reservation_service.add_available_listener(position.available_changed)
+        else:
+            on_hand: Dict[int, int] = {}
+
+            def refresh_on_hand() -> None:
+                on_hand.clear()
+                on_hand.update((stock.product_id, stock.quantity) for stock in inventory_service.get_all_stock())
+
+            refresh_on_hand()
+            position = cls(
+                lambda product_id: on_hand.get(product_id, 0),
+                purchasing_service.get_pending_orders(),
+                refresh_on_hand
+            )
+
+            def stock_changed(product_id: int, previous: int, new: int) -> None:
+                on_hand[product_id] = new
+                position.available_changed(product_id)
+
+            inventory_service.add_stock_listener(stock_changed)
+
+        purchasing_service.add_order_listener(position.purchase_changed)
+        return position
+
+    def reload(self, open_orders: List[PurchaseOrder]) -> None:
+        """
+        Vuelve a calcular lo pendiente de recibir con las órdenes abiertas (y
+        el disponible, si lo guarda la posición), p. ej. tras deshacer una
+        transacción.
+        """
+        if self._refresh_available is not None:
+            self._refresh_available()
+        self._count_orders(open_orders)
+
+    def available_changed(self, product_id: int) -> None:
+        """Anota un cambio del disponible de un producto."""
+        self.changed.add(product_id)
+
+    def purchase_changed(self, order: PurchaseOrder) -> None:
+        """
+        Suma las compras emitidas y resta las recibidas de lo pendiente de
+        recibir. No se anota como cambio: emitir una compra solo sube la
+        posición y recibirla la deja igual, así que ninguna puede provocar un
+        pedido nuevo.
+        """
+        if order.status == PurchaseOrderStatus.ORDERED:
+            self.on_order[order.product_id] = self.on_order.get(order.product_id, 0) + order.quantity
+        elif order.status == PurchaseOrderStatus.RECEIVED:
+            self.on_order[order.product_id] = self.on_order.get(order.product_id, 0) - order.quantity
+
+    def get(self, product_id: int) -> int:
+        """Posición de inventario de un producto."""
+        return self._available(product_id) + self.on_order.get(product_id, 0)
+
+
+class ReplenishmentEngine:
+    """
+    Políticas de reaprovisionamiento automático, evaluadas una vez por día.
+
+    Las políticas de revisión continua, (s, Q) y (s, S), solo se evalúan para
+    los productos cuya posición de inventario ha cambiado; las de revisión
+    periódica, en los días que les toca según su periodo contado desde el
+    primer día de la simulación.
+    """
+
+    def __init__(
+        self,
+        policies: List[ReplenishmentPolicy],
+        choose_supplier: Callable[[ReplenishmentPolicy], Optional[Supplier]],
+        position: InventoryPosition,
+        start_day: date
+    ):
+        """
+        Args:
+            policies: Políticas, como mucho una por producto
+            choose_supplier: Proveedor al que comprar según la política (se
+                consulta solo cuando hay que pedir)
+            position: Posición de inventario mantenida incrementalmente
+            start_day: Primer día de la simulación, origen de los periodos de revisión
+
+        Raises:
+            ValueError: Si alguna política no es válida
+        """
+        for policy in policies:
+            _validate(policy)
+        if len({policy.product_id for policy in policies}) != len(policies):
+            raise ValueError("Solo puede haber una política de reaprovisionamiento por producto")
+
+        self.choose_supplier = choose_supplier
+        self.position = position
+        self.start_day = start_day
+        self._continuous = {
+            policy.product_id: policy for policy in policies
+            if policy.type != ReplenishmentPolicyType.PERIODIC_REVIEW
+        }
+        self._periodic = [
+            policy for policy in policies
+            if policy.type == ReplenishmentPolicyType.PERIODIC_REVIEW
+        ]
+
+        # La primera evaluación revisa todos los productos
+        position.changed.update(self._continuous)
+
+    @classmethod
+    def build(
+        cls,
+        policies: List[ReplenishmentPolicy],
+        inventory_service: InventoryService,
+        purchasing_service: PurchasingService,
+        start_day: date,
+        supplier_selection: SupplierSelectionService,
+        reservation_service: Optional[StockReservationService] = None
+    ) -> "ReplenishmentEngine":
+        """
+        Crea el motor con la posición de inventario suscrita a los servicios.
+        Si una política no indica proveedor se usa el mejor del producto según
+        el criterio configurado en el índice de proveedores.
+        """
+        def choose_supplier(policy: ReplenishmentPolicy) -> Optional[Supplier]:
+            if policy.supplier_id is None:
+                return supplier_selection.best(policy.product_id)
+            supplier = supplier_selection.get_supplier(policy.supplier_id)
+            return supplier if supplier and supplier.product_id == policy.product_id else None
+
+        position = InventoryPosition.track(inventory_service, purchasing_service, reservation_service)
+        return cls(policies, choose_supplier, position, start_day)
+
+    def reload(self, open_orders: List[PurchaseOrder]) -> None:
+        """
+        Recarga la posición de inventario y vuelve a revisar todos los
+        productos con revisión continua en la próxima evaluación.
+        """
+        self.position.reload(open_orders)
+        self.position.changed.update(self._continuous)
+
+    def evaluate(self, today: date) -> List[Tuple[Supplier, int, int]]:
+        """
+        Evalúa las políticas que tocan hoy.
+
+        Returns:
+            Compras a emitir como tuplas (proveedor, product_id, cantidad)
+        """
+        due = [self._continuous[product_id] for product_id in self.position.changed if product_id in self._continuous]
+        due.extend(policy for policy in self._periodic if self._is_review_day(policy, today))
+        self.position.changed.clear()
+
+        orders = []
+        for policy in sorted(due, key=lambda policy: policy.product_id):
+            quantity = _order_quantity(policy, self.position.get(policy.product_id))
+            if quantity <= 0:
+                continue
+            supplier = self.choose_supplier(policy)
+            if supplier is None:
+                logger.warning("Sin proveedor para reaprovisionar el producto %d", policy.product_id)
+                continue
+            orders.append((supplier, policy.product_id, quantity))
+        return orders
+
+    def next_evaluation_day(self, today: date) -> float:
+        """
+        Próximo día (1 = el día siguiente) en que alguna política puede pedir:
+        mañana si ha cambiado la posición de un producto con revisión continua,
+        o el próximo día de revisión periódica.
+        """
+        if any(product_id in self._continuous for product_id in self.position.changed):
+            return 1
+        elapsed = today.toordinal() - self.start_day.toordinal()
+        return min(
+            (policy.review_period_days - elapsed % policy.review_period_days for policy in self._periodic),
+            default=math.inf
+        )
+
+    def _is_review_day(self, policy: ReplenishmentPolicy, today: date) -> bool:
+        return (today.toordinal() - self.start_day.toordinal()) % policy.review_period_days == 0
+
+
+def _validate(policy: ReplenishmentPolicy) -> None:
+    """Comprueba los parámetros que necesita cada tipo de política."""
+    if policy.type == ReplenishmentPolicyType.REORDER_POINT_QUANTITY and policy.order_quantity <= 0:
+        raise ValueError(f"La política (s, Q) del producto {policy.product_id} necesita Q > 0")
+    if policy.type == ReplenishmentPolicyType.REORDER_POINT_ORDER_UP_TO and policy.order_up_to <= policy.reorder_point:
+        raise ValueError(f"La política (s, S) del producto {policy.product_id} necesita S > s")
+    if policy.type == ReplenishmentPolicyType.PERIODIC_REVIEW and (
+        policy.review_period_days < 1 or policy.order_up_to <= 0
+    ):
+        raise ValueError(f"La revisión periódica del producto {policy.product_id} necesita R >= 1 y S > 0")
+
+
+def _order_quantity(policy: ReplenishmentPolicy, position: int) -> int:
+    """Cantidad a pedir según la política y la posición de inventario actual."""
+    if policy.type == ReplenishmentPolicyType.REORDER_POINT_QUANTITY:
+        if position > policy.reorder_point:
+            return 0
+        # Menor múltiplo de Q que deja la posición por encima de s
+        return policy.order_quantity * ((policy.reorder_point - position) // policy.order_quantity + 1)
+    if policy.type == ReplenishmentPolicyType.REORDER_POINT_ORDER_UP_TO:
+        return policy.order_up_to - position if position <= policy.reorder_point else 0
+    return max(0, policy.order_up_to - position)
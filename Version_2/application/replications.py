@@ -0,0 +1,529 @@
+import logging
+import math
+import os
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Callable, Optional, Iterator
+
+import numpy as np
+
+from domain.models import SimulationConfig
+
+from application.services import SimulationApplicationService
+from application.simulation import SimulationState
+
+# Fábrica que construye un servicio de simulación aislado (en memoria) a partir
+# de una configuración. Debe ser una función de módulo para poder enviarse
+# a los procesos del pool.
+SimulationFactory = Callable[[SimulationConfig], SimulationApplicationService]
+
+
+@dataclass
+class KPIStatistic:
+    """Estadísticos de un indicador agregado sobre todas las réplicas."""
+    mean: float
+    std_dev: float
+    half_width: float
+    ci_low: float
+    ci_high: float
+
+
+@dataclass
+class ReplicationResult:
+    """Resultado agregado de un conjunto de réplicas."""
+    replications: int
+    days: int
+    confidence: float
+    kpis: Dict[str, KPIStatistic] = field(default_factory=dict)
+    samples: List[Dict[str, float]] = field(default_factory=list)
+    antithetic: bool = False
+
+    def to_dict(self) -> Dict:
+        """Convierte el resultado en un diccionario serializable."""
+        return {
+            "replications": self.replications,
+            "days": self.days,
+            "confidence": self.confidence,
+            "antithetic": self.antithetic,
+            "kpis": kpis_to_dict(self.kpis)
+        }
+
+
+@dataclass
+class ComparisonResult:
+    """
+    Comparación de varios escenarios evaluados con números aleatorios
+    comunes: cada réplica usa la misma semilla en todos los escenarios.
+    """
+    scenarios: List[ReplicationResult]
+    # Diferencias pareadas (escenario - referencia) de cada escenario
+    differences: List[Dict[str, KPIStatistic]]
+    baseline: int = 0
+
+    def to_dict(self) -> Dict:
+        """Convierte la comparación en un diccionario serializable."""
+        return {
+            "baseline": self.baseline,
+            "scenarios": [scenario.to_dict() for scenario in self.scenarios],
+            "differences": [kpis_to_dict(difference) for difference in self.differences]
+        }
+
+
+def kpis_to_dict(kpis: Dict[str, KPIStatistic]) -> Dict[str, Dict[str, float]]:
+    """Convierte los estadísticos de los indicadores en un diccionario serializable."""
+    return {
+        name: {
+            "mean": stat.mean,
+            "std_dev": stat.std_dev,
+            "half_width": stat.half_width,
+            "ci_low": stat.ci_low,
+            "ci_high": stat.ci_high
+        }
+        for name, stat in kpis.items()
+    }
+
+
+class ReplicationRunner:
+    """
+    Ejecuta réplicas Monte Carlo independientes de la simulación en un pool
+    de procesos y agrega sus indicadores con intervalos de confianza.
+
+    Cada réplica construye su propio estado aislado mediante la fábrica
+    recibida, por lo que las réplicas no comparten datos entre sí. Los
+    procesos del pool ejecutan `worker_initializer` al arrancar, p. ej. para
+    configurar su logging (como la fábrica, debe poder enviarse al proceso).
+    """
+
+    def __init__(
+        self,
+        factory: SimulationFactory,
+        max_workers: Optional[int] = None,
+        worker_initializer: Optional[Callable[[], None]] = None
+    ):
+        self.factory = factory
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.worker_initializer = worker_initializer
+
+    def run(
+        self,
+        config: SimulationConfig,
+        days: int,
+        replications: int,
+        confidence: float = 0.95,
+        antithetic: bool = False
+    ) -> ReplicationResult:
+        """
+        Ejecuta las réplicas y agrega sus resultados.
+
+        Args:
+            config: Configuración de la simulación
+            days: Horizonte de cada réplica en días
+            replications: Número de réplicas
+            confidence: Nivel de confianza de los intervalos
+            antithetic: Si es True, cada réplica es la media de un par
+                antitético (dos simulaciones con la misma semilla)
+
+        Returns:
+            Indicadores agregados de todas las réplicas
+        """
+        if replications < 1:
+            raise ValueError("El número de réplicas debe ser mayor que cero")
+
+        samples = self.samples(config, days, 0, replications, antithetic)
+
+        return ReplicationResult(
+            replications=replications,
+            days=days,
+            confidence=confidence,
+            kpis=aggregate_kpis(samples, confidence),
+            samples=samples,
+            antithetic=antithetic
+        )
+
+    def run_sequential(
+        self,
+        config: SimulationConfig,
+        days: int,
+        target_half_width: float,
+        kpi: str = "service_level",
+        confidence: float = 0.95,
+        antithetic: bool = False,
+        min_replications: int = 10,
+        max_replications: int = 1000,
+        batch_size: Optional[int] = None
+    ) -> ReplicationResult:
+        """
+        Ejecuta réplicas por lotes hasta que el intervalo de confianza del
+        indicador elegido tenga como mucho la semirrango objetivo.
+
+        La réplica i usa siempre la misma semilla, por lo que el resultado
+        no depende del tamaño de lote ni del número de procesos.
+
+        Args:
+            config: Configuración de la simulación
+            days: Horizonte de cada réplica en días
+            target_half_width: Semirrango objetivo del intervalo de confianza
+            kpi: Indicador que decide la parada
+            confidence: Nivel de confianza de los intervalos
+            antithetic: Si es True, se usan pares antitéticos
+            min_replications: Réplicas mínimas antes de evaluar la parada
+            max_replications: Réplicas máximas aunque no se alcance el objetivo
+            batch_size: Réplicas por lote (por defecto, una por proceso)
+
+        Returns:
+            Indicadores agregados de las réplicas ejecutadas
+        """
+        if min_replications < 2 or max_replications < min_replications:
+            raise ValueError(
+                "Se necesitan al menos 2 réplicas y max_replications >= min_replications"
+            )
+
+        config = with_master_seed(config)
+        batch_size = batch_size or self.max_workers
+
+        samples = self.samples(config, days, 0, min_replications, antithetic)
+        kpis = aggregate_kpis(samples, confidence)
+
+        while kpis[kpi].half_width > target_half_width and len(samples) < max_replications:
+            count = min(batch_size, max_replications - len(samples))
+            samples += self.samples(config, days, len(samples), count, antithetic)
+            kpis = aggregate_kpis(samples, confidence)
+
+        return ReplicationResult(
+            replications=len(samples),
+            days=days,
+            confidence=confidence,
+            kpis=kpis,
+            samples=samples,
+            antithetic=antithetic
+        )
+
+    def compare(
+        self,
+        configs: List[SimulationConfig],
+        days: int,
+        replications: int,
+        confidence: float = 0.95,
+        antithetic: bool = False,
+        baseline: int = 0
+    ) -> ComparisonResult:
+        """
+        Compara escenarios con números aleatorios comunes: la réplica i de
+        todos los escenarios usa la misma semilla, derivada de la del
+        escenario de referencia, por lo que ve la misma demanda. Las
+        diferencias se estiman réplica a réplica (pareadas), con mucha menos
+        varianza que comparando réplicas independientes.
+
+        Args:
+            configs: Configuraciones de los escenarios
+            days: Horizonte de cada réplica en días
+            replications: Réplicas por escenario
+            confidence: Nivel de confianza de los intervalos
+            antithetic: Si es True, se usan pares antitéticos
+            baseline: Índice del escenario de referencia
+
+        Returns:
+            Resultados de cada escenario y sus diferencias con la referencia
+        """
+        if replications < 1:
+            raise ValueError("El número de réplicas debe ser mayor que cero")
+
+        master_seed = with_master_seed(configs[baseline]).seed
+        scenarios = [config.model_copy(update={"seed": master_seed}) for config in configs]
+
+        tasks = [
+            task
+            for scenario in scenarios
+            for task in replication_tasks(scenario, 0, replications, antithetic)
+        ]
+        results = self.map(tasks, days)
+
+        per_scenario = len(tasks) // len(scenarios)
+        scenario_samples = [
+            combine_antithetic(results[index * per_scenario:(index + 1) * per_scenario], antithetic)
+            for index in range(len(scenarios))
+        ]
+
+        return ComparisonResult(
+            scenarios=[
+                ReplicationResult(
+                    replications=replications,
+                    days=days,
+                    confidence=confidence,
+                    kpis=aggregate_kpis(samples, confidence),
+                    samples=samples,
+                    antithetic=antithetic
+                )
+                for samples in scenario_samples
+            ],
+            differences=[
+                aggregate_kpis([
+                    {name: value - base[name] for name, value in sample.items()}
+                    for sample, base in zip(samples, scenario_samples[baseline])
+                ], confidence)
+                for samples in scenario_samples
+            ],
+            baseline=baseline
+        )
+
+    def samples(
+        self,
+        config: SimulationConfig,
+        days: int,
+        start: int,
+        count: int,
+        antithetic: bool = False
+    ) -> List[Dict[str, float]]:
+        """
+        Ejecuta las réplicas [start, start + count) de una configuración.
+
+        Args:
+            config: Configuración (su `seed` actúa como semilla maestra)
+            days: Horizonte de cada réplica en días
+            start: Índice de la primera réplica
+            count: Número de réplicas
+            antithetic: Si es True, cada réplica es la media de un par antitético
+
+        Returns:
+            Indicadores de cada réplica
+        """
+        tasks = replication_tasks(config, start, count, antithetic)
+        return combine_antithetic(self.map(tasks, days), antithetic)
+
+    def map(self, configs: List[SimulationConfig], days: int) -> List[Dict[str, float]]:
+        """
+        Ejecuta una réplica por configuración, en paralelo si hay más de un
+        proceso disponible.
+
+        Args:
+            configs: Configuraciones de las réplicas, cada una con su semilla
+            days: Horizonte de cada réplica en días
+
+        Returns:
+            Indicadores de cada réplica, en el mismo orden que las configuraciones
+        """
+        if self.max_workers == 1 or len(configs) <= 1:
+            return [run_replication(self.factory, config, days) for config in configs]
+
+        chunksize = max(1, len(configs) // (self.max_workers * 4))
+        with ProcessPoolExecutor(
+            max_workers=self.max_workers, initializer=self.worker_initializer
+        ) as executor:
+            return list(executor.map(
+                run_replication,
+                [self.factory] * len(configs),
+                configs,
+                [days] * len(configs),
+                chunksize=chunksize
+            ))
+
+
+def replication_configs(
+    config: SimulationConfig, replications: int, start: int = 0
+) -> List[SimulationConfig]:
+    """
+    Deriva la configuración de cada réplica, con una semilla propia obtenida
+    de la semilla maestra de la configuración.
+
+    La semilla de la réplica i es siempre la misma para una semilla maestra
+    dada, aunque las réplicas se generen por lotes.
+
+    Args:
+        config: Configuración base (su `seed` actúa como semilla maestra)
+        replications: Número de réplicas
+        start: Índice de la primera réplica
+
+    Returns:
+        Lista de configuraciones, una por réplica
+    """
+    seeds = np.random.SeedSequence(config.seed).generate_state(
+        start + replications, dtype=np.uint64
+    )[start:]
+    return [config.model_copy(update={"seed": int(seed)}) for seed in seeds]
+
+
+def replication_tasks(
+    config: SimulationConfig, start: int, count: int, antithetic: bool = False
+) -> List[SimulationConfig]:
+    """
+    Construye las simulaciones a ejecutar para las réplicas [start, start + count).
+    Con variables antitéticas, cada réplica son dos simulaciones consecutivas
+    con la misma semilla, la segunda antitética.
+    """
+    configs = replication_configs(config, count, start)
+    if not antithetic:
+        return configs
+
+    return [
+        replication_config.model_copy(update={"antithetic": value})
+        for replication_config in configs
+        for value in (False, True)
+    ]
+
+
+def combine_antithetic(
+    results: List[Dict[str, float]], antithetic: bool
+) -> List[Dict[str, float]]:
+    """Promedia los indicadores de cada par antitético (sin efecto si no lo hay)."""
+    if not antithetic:
+        return results
+
+    return [
+        {name: (first[name] + second[name]) / 2 for name in first}
+        for first, second in zip(results[::2], results[1::2])
+    ]
+
+
+def with_master_seed(config: SimulationConfig) -> SimulationConfig:
+    """
+    Fija una semilla maestra si la configuración no tiene, para que todos los
+    lotes y escenarios deriven sus semillas de la misma.
+    """
+    if config.seed is not None:
+        return config
+    return config.model_copy(update={"seed": int(np.random.SeedSequence().entropy)})
+
+
+def run_replication(
+    factory: SimulationFactory,
+    config: SimulationConfig,
+    days: int
+) -> Dict[str, float]:
+    """
+    Ejecuta una réplica completa y devuelve sus indicadores.
+
+    Cada día se liberan a producción, por orden de llegada, todas las órdenes
+    pendientes para las que hay material disponible.
+
+    Args:
+        factory: Fábrica del servicio de simulación aislado
+        config: Configuración de la réplica, incluida su semilla
+        days: Horizonte en días
+
+    Returns:
+        Diccionario {indicador: valor}
+    """
+    service = factory(config)
+    simulator = service.simulator
+    manufacturing_service = service.manufacturing_service
+
+    stockout_days = 0
+
+    def release_feasible_orders(state: SimulationState) -> None:
+        nonlocal stockout_days
+        pending = sorted(manufacturing_service.get_pending_orders(), key=lambda o: o.id)
+        if not pending:
+            return
+
+        # Decidir en bloque qué órdenes caben, por orden de llegada
+        product_ids = np.array([order.product_id for order in pending], dtype=np.int64)
+        quantities = np.array([order.quantity for order in pending], dtype=np.int64)
+        releasable = service.get_bom_matrix(product_ids.tolist()).releasable(
+            product_ids, quantities, service.stock_vector
+        )
+        for order, release in zip(pending, releasable.tolist()):
+            if release:
+                simulator.release_manufacturing_order(order.id)
+        if not releasable.all():
+            stockout_days += 1
+
+    simulator.register_day_advanced_callback(release_feasible_orders)
+    # El resumen diario de cada réplica sería ruido: solo avisos y errores
+    with _log_level("3d_printer_simulator.simulation", logging.WARNING):
+        summaries = service.advance_days(days)
+
+    orders_created = sum(summary.get("orders_created", 0) for summary in summaries)
+    completed = manufacturing_service.get_completed_orders()
+    pending = manufacturing_service.get_pending_orders()
+
+    return {
+        "orders_created": float(orders_created),
+        "orders_completed": float(len(completed)),
+        "units_completed": float(sum(order.quantity for order in completed)),
+        "backlog_orders": float(len(pending)),
+        "backlog_units": float(sum(order.quantity for order in pending)),
+        "stockout_days": float(stockout_days),
+        "service_level": len(completed) / orders_created if orders_created else 1.0,
+    }
+
+
+@contextmanager
+def _log_level(name: str, level: int) -> Iterator[None]:
+    """
+    Cambia el nivel de un logger durante el bloque y restaura el anterior al
+    salir, para no silenciar al proceso que ejecuta las réplicas en serie.
+    """
+    log = logging.getLogger(name)
+    previous = log.level
+    log.setLevel(level)
+    try:
+        yield
+    finally:
+        log.setLevel(previous)
+
+
+def aggregate_kpis(
+    samples: List[Dict[str, float]], confidence: float = 0.95
+) -> Dict[str, KPIStatistic]:
+    """
+    Calcula media, desviación típica e intervalo de confianza t de Student
+    para cada indicador.
+
+    Args:
+        samples: Indicadores de cada réplica
+        confidence: Nivel de confianza
+
+    Returns:
+        Diccionario {indicador: estadísticos}
+    """
+    result = {}
+    n = len(samples)
+
+    for name in samples[0].keys() if samples else []:
+        values = [sample[name] for sample in samples]
+        mean = statistics.fmean(values)
+
+        if n > 1:
+            std_dev = statistics.stdev(values)
+            half_width = t_quantile(0.5 + confidence / 2, n - 1) * std_dev / math.sqrt(n)
+        else:
+            std_dev = 0.0
+            half_width = math.inf
+
+        result[name] = KPIStatistic(
+            mean=mean,
+            std_dev=std_dev,
+            half_width=half_width,
+            ci_low=mean - half_width,
+            ci_high=mean + half_width
+        )
+
+    return result
+
+
+def t_quantile(p: float, df: int) -> float:
+    """
+    Cuantil aproximado de la distribución t de Student.
+
+    Usa la expansión de Cornish-Fisher alrededor del cuantil normal, con
+    error despreciable para df >= 3 en los niveles de confianza habituales.
+    Para df 1 y 2 se usan las expresiones exactas.
+    """
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        alpha = 4 * p * (1 - p)
+        return 2 * (p - 0.5) * math.sqrt(2 / alpha)
+
+    z = statistics.NormalDist().inv_cdf(p)
+    z3, z5, z7, z9 = z ** 3, z ** 5, z ** 7, z ** 9
+
+    return (
+        z
+        + (z3 + z) / (4 * df)
+        + (5 * z5 + 16 * z3 + 3 * z) / (96 * df ** 2)
+        + (3 * z7 + 19 * z5 + 17 * z3 - 15 * z) / (384 * df ** 3)
+        + (79 * z9 + 776 * z7 + 1482 * z5 - 1920 * z3 - 945 * z) / (92160 * df ** 4)
+    )
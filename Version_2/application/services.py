@@ -1,26 +1,47 @@
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Callable, ContextManager, Iterator
 from datetime import datetime, date, timedelta
+from contextlib import contextmanager
 import json
+import logging
+
+import numpy as np
 
 from domain.models import (
     Product, BOM, Supplier, StockCurrent, 
     ManufacturingOrder, PurchaseOrder, Event,
     ManufacturingOrderStatus, PurchaseOrderStatus, EventType,
-    SimulationConfig
+    SimulationConfig, SupplierCriterion
 )
 
 from domain.repositories import (
     ProductRepository, BOMRepository, SupplierRepository,
     StockRepository, ManufacturingOrderRepository,
-    PurchaseOrderRepository, EventRepository
+    PurchaseOrderRepository, EventRepository, KPIRepository
 )
 
 from domain.services import (
     InventoryService, BOMService,
-    ManufacturingService, PurchasingService
+    ManufacturingService, PurchasingService,
+    StockReservationService, SupplierSelectionService
 )
 
-from application.simulation import ProductionSimulator, SimulationState
+from application.simulation import ProductionSimulator, SimulationState, DaySummary
+from application.checkpoint import CheckpointStore, SimulationCheckpoint
+from application.profiling import PhaseProfiler, SQLStatsProvider
+from application.kpis import KPIAccumulator
+from application.bom_matrix import BOMMatrix, StockVector
+from application.feasibility import FeasibilityIndex
+from application.release_planner import EXACT_LIMIT, plan_releases
+from application.mrp import net_requirements, planned_entries, start_days
+
+logger = logging.getLogger("3d_printer_simulator.services")
+
+
+@contextmanager
+def _no_transaction(commit_phase: Optional[ContextManager] = None) -> Iterator[None]:
+    """Transacción vacía para los repositorios sin base de datos."""
+    yield
+
 
 class SimulationApplicationService:
     """
@@ -42,13 +63,21 @@ class SimulationApplicationService:
         purchase_repository: PurchaseOrderRepository,
         event_repository: EventRepository,
         
-        config: SimulationConfig
+        config: SimulationConfig,
+        kpi_repository: Optional[KPIRepository] = None,
+        reservation_service: Optional[StockReservationService] = None,
+        transaction: Optional[Callable[..., ContextManager]] = None,
+        checkpoint_store: Optional[CheckpointStore] = None,
+        checkpoint_every_days: int = 1,
+        profiler: Optional[PhaseProfiler] = None,
+        sql_stats: Optional[SQLStatsProvider] = None
     ):
         # Servicios de dominio
         self.inventory_service = inventory_service
         self.bom_service = bom_service
         self.manufacturing_service = manufacturing_service
         self.purchasing_service = purchasing_service
+        self.reservation_service = reservation_service
         
         # Repositorios
         self.product_repository = product_repository
@@ -58,10 +87,39 @@ class SimulationApplicationService:
         self.manufacturing_repository = manufacturing_repository
         self.purchase_repository = purchase_repository
         self.event_repository = event_repository
+        self.kpi_repository = kpi_repository
         
         # Configuración
         self.config = config
         
+        # Fábrica de transacciones para agrupar escrituras (sin efecto si no se indica)
+        self.transaction = transaction or _no_transaction
+        self._transactional = transaction is not None
+        # Contadores SQL para saber si una transacción fallida llegó a escribir
+        self.sql_stats = sql_stats
+        
+        # Checkpoints del estado en memoria (desactivados si no hay almacén)
+        self.checkpoint_store = checkpoint_store
+        self.checkpoint_every_days = max(1, checkpoint_every_days)
+        self._days_since_checkpoint = 0
+        
+        # Instrumentación por fases del avance de día (desactivada por defecto)
+        self.profiler = profiler or PhaseProfiler()
+        
+        # Stock como vector y matriz de requisitos para las comprobaciones en bloque
+        self.stock_vector = StockVector.from_inventory(inventory_service)
+        self._bom_matrix: Optional[BOMMatrix] = None
+        bom_repository.add_change_listener(self._on_bom_changed)
+        
+        # Viabilidad de las órdenes pendientes, mantenida con los cambios de
+        # disponible de cada material y de estado de cada orden
+        self.feasibility_index = self._build_feasibility_index()
+        
+        # Índice de proveedores por producto (el del servicio de compras si lo tiene)
+        self.supplier_selection = purchasing_service.supplier_selection or SupplierSelectionService(
+            supplier_repository, config.supplier_selection
+        )
+        
         # Simulador
         self.simulator = ProductionSimulator(
             inventory_service=inventory_service,
@@ -69,16 +127,151 @@ class SimulationApplicationService:
             manufacturing_service=manufacturing_service,
             purchasing_service=purchasing_service,
             config=config,
-            product_repository=product_repository  # Pasamos el repositorio de productos
+            product_repository=product_repository,  # Pasamos el repositorio de productos
+            profiler=self.profiler,
+            reservation_service=reservation_service,
+            supplier_selection=self.supplier_selection
         )
         
         # Registrar callback para procesar eventos
         self.simulator.register_day_advanced_callback(self._process_simulation_events)
     
     def start_simulation(self) -> None:
-        """Inicializa y arranca la simulación."""
-        # Realizar tareas de inicialización si son necesarias
-        pass
+        """
+        Inicializa y arranca la simulación, restaurando el último checkpoint
+        guardado si existe.
+        
+        La base de datos manda sobre la fecha: un checkpoint posterior al
+        último día cerrado se descarta, y si el checkpoint es anterior (se
+        guarda cada checkpoint_every_days días) o no hay ninguno, el estado
+        se adelanta hasta ese día sin repetir los días ya persistidos.
+        """
+        if self.checkpoint_store is None:
+            return
+        
+        checkpoint = self.checkpoint_store.load()
+        last_day = self._last_closed_day()
+        
+        if checkpoint is not None and last_day is not None and checkpoint.current_date > last_day:
+            logger.warning(
+                "Checkpoint del %s posterior a la base de datos (%s): se descarta",
+                checkpoint.current_date.isoformat(), last_day.isoformat()
+            )
+        elif checkpoint is not None:
+            self.simulator.restore_checkpoint(checkpoint)
+        
+        if last_day is not None and self.simulator.state.current_date < last_day:
+            logger.warning(
+                "Estado en memoria del %s anterior a la base de datos: se adelanta al %s",
+                self.simulator.state.current_date.isoformat(), last_day.isoformat()
+            )
+            self.simulator.roll_forward(last_day)
+            self.save_checkpoint()
+    
+    def _last_closed_day(self) -> Optional[date]:
+        """
+        Fecha simulada según la base de datos: la del último día cerrado, o
+        la inicial si aún no se ha cerrado ninguno (None si no se sabe).
+        """
+        if self.kpi_repository is None:
+            return None
+        rollup = self.kpi_repository.get_latest()
+        return date.fromisoformat(rollup.date) if rollup is not None else self.config.initial_day
+    
+    def save_checkpoint(self) -> bool:
+        """
+        Guarda un checkpoint del estado actual del simulador.
+        
+        Returns:
+            True si se ha guardado, False si no hay almacén configurado
+        """
+        if self.checkpoint_store is None:
+            return False
+        
+        self.checkpoint_store.save(self.simulator.create_checkpoint())
+        self._days_since_checkpoint = 0
+        return True
+    
+    def _maybe_checkpoint(self, days: int) -> None:
+        """Guarda un checkpoint si se han simulado suficientes días desde el último."""
+        self._days_since_checkpoint += days
+        if self._days_since_checkpoint >= self.checkpoint_every_days:
+            with self.profiler.phase("checkpoint"):
+                self.save_checkpoint()
+    
+    @contextmanager
+    def _atomic(
+        self, commit_phase: Optional[ContextManager] = None, advancing: bool = False
+    ) -> Iterator[None]:
+        """
+        Transacción que, si falla después de escribir, vuelve a sincronizar
+        el estado en memoria con la base de datos para que no diverjan.
+        
+        Solo se guarda lo que el bloque puede dejar a medias: en un avance,
+        el estado del simulador (reloj, colas, flujos aleatorios); en el
+        resto de operaciones, los indicadores incrementales. Las reglas de
+        negocio se comprueban antes de abrir la transacción, por lo que un
+        rechazo no escribe nada y no hay que recargar.
+        
+        Sin transacciones (repositorios en memoria) no hay nada que deshacer:
+        los repositorios conservan los cambios y el estado en memoria también.
+        
+        Args:
+            commit_phase: Contexto que envuelve solo el commit final
+            advancing: El bloque avanza la simulación
+        """
+        if not self._transactional:
+            yield
+            return
+        
+        checkpoint = self.simulator.create_checkpoint() if advancing else None
+        kpis = None if advancing else self.simulator.kpis.copy()
+        writes = self._rows_written()
+        try:
+            with self.transaction(commit_phase=commit_phase):
+                yield
+        except BaseException:
+            # Un avance mueve el reloj y los flujos aleatorios aunque no escriba
+            if advancing or writes is None or self._rows_written() != writes:
+                logger.warning(
+                    "Transacción deshecha: se recarga el estado en memoria desde la base de datos"
+                )
+                self.reload_state(checkpoint, kpis)
+            raise
+    
+    def _rows_written(self) -> Optional[int]:
+        """Filas escritas en la base de datos hasta ahora (None si no se sabe)."""
+        return self.sql_stats()[1] if self.sql_stats is not None else None
+    
+    def _advance_transaction(self) -> ContextManager:
+        """
+        Transacción de un avance de la simulación. El commit se mide como una
+        fase propia, imputada al último día simulado.
+        """
+        return self._atomic(self.profiler.phase("commit"), advancing=True)
+    
+    def reload_state(
+        self,
+        checkpoint: Optional[SimulationCheckpoint] = None,
+        kpis: Optional[KPIAccumulator] = None
+    ) -> None:
+        """
+        Vuelve a cargar desde los repositorios todo el estado mantenido en
+        memoria: disponible y reservas, vector de stock, índice de viabilidad
+        y colas del simulador. Se usa tras deshacer una transacción o importar
+        datos.
+        
+        Args:
+            checkpoint: Estado del simulador al que volver; si no se indica,
+                conserva su fecha, su reloj y sus flujos aleatorios
+            kpis: Indicadores a conservar cuando no hay checkpoint; si no se
+                indican, se recalculan desde los repositorios
+        """
+        if self.reservation_service is not None:
+            self.reservation_service.reload()
+        self.stock_vector.reload(self.inventory_service.get_all_stock())
+        self.feasibility_index.load(self.manufacturing_service.get_pending_orders())
+        self.simulator.reload(checkpoint, kpis)
     
     def advance_day(self) -> date:
         """
@@ -87,7 +280,33 @@ class SimulationApplicationService:
         Returns:
             La nueva fecha actual
         """
-        return self.simulator.advance_day()
+        with self._advance_transaction():
+            new_date = self.simulator.advance_day()
+        
+        self._maybe_checkpoint(1)
+        return new_date
+    
+    def advance_days(self, days: int, skip_idle: bool = False) -> List[Dict[str, Any]]:
+        """
+        Avanza varios días en la simulación en una única ejecución,
+        persistiendo todos los cambios en un solo lote de escritura.
+        
+        Args:
+            days: Número de días a avanzar
+            skip_idle: Si es True, se saltan los días sin actividad y solo se
+                devuelven los días en que ocurre algo
+            
+        Returns:
+            Lista con el resumen de cada día simulado
+        """
+        with self._advance_transaction():
+            if skip_idle:
+                summaries = self.simulator.advance_days_skipping_idle(days)
+            else:
+                summaries = self.simulator.advance_days(days)
+        
+        self._maybe_checkpoint(sum(1 + summary.skipped_days for summary in summaries))
+        return [self._day_summary_to_dict(summary) for summary in summaries]
     
     def get_current_date(self) -> date:
         """
@@ -98,55 +317,225 @@ class SimulationApplicationService:
         """
         return self.simulator.state.current_date
     
-    def get_pending_manufacturing_orders(self) -> List[Dict[str, Any]]:
+    def get_state_summary(self) -> Dict[str, Any]:
+        """
+        Obtiene un resumen compacto del estado de la simulación, útil para
+        comparar escenarios.
+        
+        Returns:
+            Diccionario con contadores de órdenes e inventario por producto
+        """
+        pending = self.manufacturing_service.get_pending_orders()
+        pending_purchases = self.purchasing_service.get_pending_orders()
+        
+        inventory = {}
+        for stock in self.stock_repository.get_all():
+            product = self.product_repository.get_by_id(stock.product_id)
+            product_name = product.name if product else f"Producto ID: {stock.product_id}"
+            inventory[product_name] = stock.quantity
+        
+        return {
+            "current_date": self.get_current_date().isoformat(),
+            "pending_orders": len(pending),
+            "pending_units": sum(order.quantity for order in pending),
+            "in_production_orders": len(self.manufacturing_service.get_in_production_orders()),
+            "completed_orders": len(self.manufacturing_service.get_completed_orders()),
+            "pending_purchases": len(pending_purchases),
+            "pending_purchase_units": sum(order.quantity for order in pending_purchases),
+            "inventory": inventory
+        }
+    
+    def get_kpis(self) -> Dict[str, Any]:
+        """
+        Obtiene los indicadores acumulados de la simulación, mantenidos de
+        forma incremental sin recorrer el historial de eventos.
+        
+        Returns:
+            Diccionario con los indicadores globales y por producto
+        """
+        snapshot = self.simulator.kpis.snapshot(self.get_current_date())
+        
+        names = {product.id: product.name for product in self.product_repository.get_all()}
+        materials = {product.id for product in self.product_repository.get_by_type("raw")}
+        
+        snapshot["average_inventory"] = {
+            names.get(product_id, f"Producto ID: {product_id}"): value
+            for product_id, value in snapshot["average_inventory"].items()
+        }
+        snapshot["stockout_days"] = {
+            names.get(product_id, f"Producto ID: {product_id}"): days
+            for product_id, days in snapshot["stockout_days"].items()
+            if product_id in materials
+        }
+        
+        return snapshot
+    
+    def get_kpi_history(
+        self, start_date: Optional[str] = None, end_date: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Obtiene los resúmenes diarios de indicadores guardados.
+        
+        Args:
+            start_date: Fecha de inicio para filtrar (formato ISO)
+            end_date: Fecha de fin para filtrar (formato ISO)
+            
+        Returns:
+            Lista de resúmenes diarios
+        """
+        if self.kpi_repository is None:
+            return []
+        
+        if start_date or end_date:
+            rollups = self.kpi_repository.get_by_date_range(
+                start_date or date.min.isoformat(), end_date or date.max.isoformat()
+            )
+        else:
+            rollups = self.kpi_repository.get_all()
+        
+        return [rollup.model_dump() for rollup in rollups]
+    
+    def get_phase_metrics(self) -> Dict[str, Any]:
+        """
+        Obtiene las estadísticas de tiempo, sentencias SQL y filas escritas de
+        cada fase del avance de día.
+        
+        Returns:
+            Diccionario con el último día medido y las estadísticas por fase
+        """
+        return self.profiler.summary()
+    
+    def set_profiling(self, enabled: bool) -> Dict[str, Any]:
+        """
+        Activa o desactiva la instrumentación por fases. Al activarla se
+        descartan las medidas anteriores.
+        
+        Returns:
+            Estadísticas actuales por fase
+        """
+        if enabled and not self.profiler.enabled:
+            self.profiler.reset()
+        self.profiler.enabled = enabled
+        return self.profiler.summary()
+    
+    def get_pending_manufacturing_orders(self, releasable_only: bool = False) -> List[Dict[str, Any]]:
         """
         Obtiene todas las órdenes de fabricación pendientes con detalles.
         
+        Los requisitos y la viabilidad salen del índice de viabilidad, que se
+        mantiene al día con cada cambio de stock, por lo que no se consulta
+        el repositorio ni se recalculan requisitos por orden.
+        
+        Args:
+            releasable_only: Devolver solo las órdenes que se pueden liberar ya
+        
         Returns:
             Lista de órdenes con información ampliada
         """
-        orders = self.manufacturing_service.get_pending_orders()
-        result = []
+        index = self.feasibility_index
+        orders = index.pending_orders()
+        if releasable_only:
+            orders = [order for order in orders if index.is_feasible(order.id)]
+        if not orders:
+            return []
+        product_names = {product.id: product.name for product in self.product_repository.get_all()}
         
+        result = []
         for order in orders:
-            product = self.product_repository.get_by_id(order.product_id)
-            product_name = product.name if product else f"Producto ID: {order.product_id}"
-            
-            # Calcular materiales necesarios
-            materials_needed = self.bom_service.calculate_materials_needed(
-                order.product_id, order.quantity
-            )
+            product_name = product_names.get(order.product_id, f"Producto ID: {order.product_id}")
+            required = index.requirements[order.id]
+            shortages = index.shortages[order.id]
             
-            materials_info = []
-            can_produce = True
-            
-            for material_id, quantity in materials_needed.items():
-                material = self.product_repository.get_by_id(material_id)
-                material_name = material.name if material else f"Material ID: {material_id}"
-                
-                stock = self.inventory_service.get_current_stock(material_id)
-                available = stock.quantity if stock else 0
-                
-                if available < quantity:
-                    can_produce = False
-                
-                materials_info.append({
+            materials_info = [
+                {
                     "id": material_id,
-                    "name": material_name,
-                    "required": quantity,
-                    "available": available,
-                    "sufficient": available >= quantity
-                })
+                    "name": product_names.get(material_id, f"Material ID: {material_id}"),
+                    "required": required[material_id],
+                    "available": index.available_for(order.id, material_id),
+                    "sufficient": material_id not in shortages
+                }
+                for material_id in sorted(required)
+                if required[material_id]
+            ]
             
             result.append({
                 "order": order.dict(),
                 "product_name": product_name,
                 "materials": materials_info,
-                "can_produce": can_produce
+                "can_produce": not shortages,
+                "reserved": bool(
+                    self.reservation_service is not None
+                    and self.reservation_service.get_reservation(
+                        self.reservation_service.order_reference(order.id)
+                    )
+                )
             })
         
         return result
     
+    def get_bom_matrix(self, product_ids: Optional[List[int]] = None) -> BOMMatrix:
+        """
+        Obtiene la matriz de requisitos de los productos terminados. Se
+        reconstruye solo cuando cambia la BOM o aparece un producto nuevo.
+        
+        Args:
+            product_ids: Productos que deben estar en la matriz (por defecto,
+                los productos terminados)
+        """
+        if product_ids is None:
+            product_ids = [product.id for product in self.product_repository.get_by_type("finished")]
+        
+        if self._bom_matrix is None or not self._bom_matrix.covers(product_ids):
+            finished = {product.id for product in self.product_repository.get_by_type("finished")}
+            self._bom_matrix = BOMMatrix.build(self.bom_service, sorted(finished | set(product_ids)))
+        return self._bom_matrix
+    
+    def _on_bom_changed(self, product_id: int) -> None:
+        """Descarta la matriz de requisitos cuando cambia alguna BOM."""
+        self._bom_matrix = None
+        self.feasibility_index.rebuild()
+    
+    def _build_feasibility_index(self) -> FeasibilityIndex:
+        """
+        Crea el índice de viabilidad y lo suscribe a los cambios de disponible
+        (neto de reservas si hay registro de reservas) y de estado de las órdenes.
+        """
+        if self.reservation_service is not None:
+            reservation_service = self.reservation_service
+            index = FeasibilityIndex(
+                self.bom_service.calculate_materials_needed,
+                reservation_service.get_available,
+                lambda order_id, material_id: reservation_service.get_reserved_for(
+                    reservation_service.order_reference(order_id), material_id
+                )
+            )
+            reservation_service.add_available_listener(index.material_changed)
+        else:
+            index = FeasibilityIndex(self.bom_service.calculate_materials_needed, self.stock_vector.get)
+            self.inventory_service.add_stock_listener(
+                lambda product_id, previous, new: index.material_changed(product_id)
+            )
+        
+        self.manufacturing_service.add_order_listener(index.order_changed)
+        index.load(self.manufacturing_service.get_pending_orders())
+        return index
+    
+    def get_buildable_units(self) -> List[Dict[str, Any]]:
+        """
+        Calcula cuántas unidades de cada producto terminado se pueden
+        fabricar con el stock actual.
+        
+        Returns:
+            Lista con el producto y sus unidades fabricables (None si no
+            requiere materiales)
+        """
+        products = sorted(self.product_repository.get_by_type("finished"), key=lambda p: p.id)
+        buildable = self.get_bom_matrix([product.id for product in products]).max_buildable(self.stock_vector)
+        return [
+            {"product_id": product.id, "product_name": product.name, "buildable_units": buildable[product.id]}
+            for product in products
+        ]
+    
     def get_current_inventory(self) -> List[Dict[str, Any]]:
         """
         Obtiene el inventario actual con detalles.
@@ -171,17 +560,21 @@ class SimulationApplicationService:
         
         return result
     
-    def get_suppliers_for_product(self, product_id: int) -> List[Dict[str, Any]]:
+    def get_suppliers_for_product(
+        self, product_id: int, criterion: Optional[SupplierCriterion] = None
+    ) -> List[Dict[str, Any]]:
         """
         Obtiene los proveedores para un producto con detalles.
         
         Args:
             product_id: ID del producto
+            criterion: Si se indica, ordena del mejor al peor proveedor según
+                el criterio; si no, por ID
             
         Returns:
             Lista de proveedores con información ampliada
         """
-        suppliers = self.purchasing_service.get_suppliers_for_product(product_id)
+        suppliers = self.supplier_selection.get_suppliers(product_id, criterion)
         result = []
         
         for supplier in suppliers:
@@ -196,6 +589,39 @@ class SimulationApplicationService:
         
         return result
     
+    def get_best_supplier(
+        self,
+        product_id: int,
+        required_date: Optional[date] = None,
+        criterion: Optional[SupplierCriterion] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Elige el mejor proveedor de un producto con el índice de proveedores.
+        
+        Args:
+            product_id: ID del producto
+            required_date: Fecha en que se necesita el material; si se indica,
+                se elige entre los proveedores que llegan a tiempo comprando
+                hoy y, si no llega ninguno, el más rápido
+            criterion: Criterio de elección (por defecto, el configurado)
+            
+        Returns:
+            Proveedor con información ampliada, o None si nadie suministra el producto
+        """
+        today = self.simulator.state.current_date
+        days_until_needed = (required_date - today).days if required_date is not None else None
+        criterion = criterion or self.supplier_selection.config.criterion
+        supplier = self.supplier_selection.best(product_id, days_until_needed, criterion)
+        if supplier is None:
+            return None
+        
+        return {
+            "supplier": supplier.dict(),
+            "criterion": criterion.value,
+            "estimated_arrival": (today + timedelta(days=supplier.lead_time_days)).isoformat(),
+            "on_time": days_until_needed is None or supplier.lead_time_days <= days_until_needed
+        }
+    
     def release_order_to_production(self, order_id: int) -> Dict[str, Any]:
         """
         Libera una orden a producción.
@@ -207,7 +633,11 @@ class SimulationApplicationService:
             Información sobre la orden liberada
         """
         try:
-            order = self.simulator.release_manufacturing_order(order_id)
+            self._check_releasable([order_id])
+            
+            # Consumo de materiales, cambio de estado y eventos en un único commit
+            with self._atomic():
+                order = self.simulator.release_manufacturing_order(order_id)
             
             product = self.product_repository.get_by_id(order.product_id)
             product_name = product.name if product else f"Producto ID: {order.product_id}"
@@ -226,6 +656,388 @@ class SimulationApplicationService:
                 "message": str(e)
             }
     
+    def plan_release_batch(self, execute: bool = False, exact_limit: int = EXACT_LIMIT) -> Dict[str, Any]:
+        """
+        Calcula qué órdenes pendientes liberar a la vez para completar el
+        mayor número de órdenes con el material disponible (neto de reservas)
+        y la capacidad de producción libre, y opcionalmente las libera todas
+        en una única transacción.
+        
+        Args:
+            execute: Liberar las órdenes del plan además de calcularlo
+            exact_limit: Máximo de órdenes viables para buscar el plan óptimo exacto
+            
+        Returns:
+            Plan con las órdenes elegidas y el material que consumen
+        """
+        index = self.feasibility_index
+        orders = index.pending_orders()
+        capacity = self.config.production_capacity_per_day - len(self.simulator.production_queue)
+        
+        # Material neto de cada orden: lo que ya tiene reservado no compite con las demás
+        material_ids = sorted({material_id for order in orders for material_id in index.requirements[order.id]})
+        columns = {material_id: column for column, material_id in enumerate(material_ids)}
+        required = np.zeros((len(orders), len(material_ids)), dtype=np.int64)
+        for row, order in enumerate(orders):
+            for material_id, quantity in index.requirements[order.id].items():
+                required[row, columns[material_id]] = max(0, quantity - index.reserved_for(order.id, material_id))
+        available = np.array([index.available(material_id) for material_id in material_ids], dtype=np.int64)
+        
+        plan = plan_releases(
+            np.array([order.id for order in orders], dtype=np.int64),
+            required, available, capacity, exact_limit
+        )
+        
+        try:
+            if execute and plan.order_ids:
+                # Se valida el lote completo antes de liberar nada y todas las
+                # liberaciones van en un único commit; si alguna falla, se
+                # deshacen la base de datos y el estado en memoria
+                self._check_release_batch(plan.order_ids)
+                with self._atomic():
+                    for order_id in plan.order_ids:
+                        self.simulator.release_manufacturing_order(order_id)
+        except Exception as e:
+            return {
+                "success": False,
+                "order_ids": plan.order_ids,
+                "message": str(e)
+            }
+        
+        product_names = {product.id: product.name for product in self.product_repository.get_all()}
+        rows = {order.id: row for row, order in enumerate(orders)}
+        planned = [orders[rows[order_id]] for order_id in plan.order_ids]
+        used = required[[rows[order_id] for order_id in plan.order_ids]].sum(axis=0).tolist()
+        
+        return {
+            "success": True,
+            "executed": execute,
+            "method": plan.method,
+            "optimal": plan.optimal,
+            "pending_orders": len(orders),
+            "candidates": plan.candidates,
+            "capacity": plan.capacity,
+            "orders": [
+                {
+                    "order_id": order.id,
+                    "product_id": order.product_id,
+                    "product_name": product_names.get(order.product_id, f"Producto ID: {order.product_id}"),
+                    "quantity": order.quantity
+                }
+                for order in planned
+            ],
+            "units": sum(order.quantity for order in planned),
+            "materials": [
+                {
+                    "product_id": material_id,
+                    "product_name": product_names.get(material_id, f"Material ID: {material_id}"),
+                    "required": used[column],
+                    "available": int(available[column])
+                }
+                for column, material_id in enumerate(material_ids)
+                if used[column]
+            ],
+            "message": (
+                f"{len(planned)} órdenes liberadas a producción" if execute
+                else f"{len(planned)} órdenes en el plan de liberación"
+            )
+        }
+    
+    def run_mrp(self) -> Dict[str, Any]:
+        """
+        Cálculo de necesidades de material (MRP) para toda la cartera
+        pendiente: explota todas las órdenes por la BOM en bloque, descuenta
+        el disponible (neto de reservas) y las compras abiertas, reparte las
+        necesidades por día según la capacidad de producción y propone
+        órdenes de compra que lleguen a tiempo según el plazo del proveedor.
+        
+        Returns:
+            Necesidades por material y órdenes de compra sugeridas
+        """
+        index = self.feasibility_index
+        orders = index.pending_orders()
+        today = self.get_current_date()
+        
+        product_ids = np.fromiter((order.product_id for order in orders), dtype=np.int64, count=len(orders))
+        quantities = np.fromiter((order.quantity for order in orders), dtype=np.int64, count=len(orders))
+        bom_matrix = self.get_bom_matrix(np.unique(product_ids).tolist())
+        material_ids = bom_matrix.material_ids
+        required = bom_matrix.requirements(product_ids, quantities)
+        
+        columns = {material_id: column for column, material_id in enumerate(material_ids.tolist())}
+        
+        if self.reservation_service is not None:
+            available = np.array(
+                [self.reservation_service.get_available(material_id) for material_id in columns],
+                dtype=np.int64
+            )
+            # Lo ya reservado para una orden de la cartera no hay que volver a cubrirlo
+            reservations = self.reservation_service.get_all_reservations()
+            if reservations:
+                rows = {
+                    self.reservation_service.order_reference(order.id): row
+                    for row, order in enumerate(orders)
+                }
+                for reference, reserved in reservations.items():
+                    if reference not in rows:
+                        continue
+                    for material_id, quantity in reserved.items():
+                        if material_id in columns:
+                            cell = (rows[reference], columns[material_id])
+                            required[cell] -= min(quantity, required[cell])
+        else:
+            available = self.stock_vector.take(material_ids)
+        
+        # Compras abiertas, con la misma fecha de llegada que usa el simulador
+        receipt_days, receipt_columns, receipt_quantities = np.array(
+            [
+                (max(0, delivery_day - today.toordinal()), columns[order.product_id], order.quantity)
+                for delivery_day, _, order in self.simulator.purchase_queue
+                if order.product_id in columns
+            ],
+            dtype=np.int64
+        ).reshape(-1, 3).T
+        
+        result = net_requirements(
+            material_ids,
+            required,
+            start_days(len(orders), self.config.production_capacity_per_day, len(self.simulator.production_queue)),
+            available,
+            receipt_days,
+            receipt_columns,
+            receipt_quantities
+        )
+        
+        product_names = {product.id: product.name for product in self.product_repository.get_all()}
+        
+        # Órdenes sugeridas: una por proveedor y fecha de emisión (lote a lote)
+        suggested: Dict[Tuple[int, date], Dict[str, Any]] = {}
+        for day, material_id, quantity in planned_entries(result):
+            supplier = self.supplier_selection.best(material_id, day)
+            if supplier is None:
+                continue
+            release_date = today + timedelta(days=max(0, day - supplier.lead_time_days))
+            entry = suggested.setdefault((supplier.id, release_date), {
+                "supplier_id": supplier.id,
+                "supplier_name": supplier.name,
+                "product_id": material_id,
+                "product_name": product_names.get(material_id, f"Material ID: {material_id}"),
+                "quantity": 0,
+                "release_date": release_date.isoformat(),
+                "need_date": (today + timedelta(days=day)).isoformat(),
+                "expected_delivery_date": (
+                    release_date + timedelta(days=supplier.lead_time_days)
+                ).isoformat(),
+                "late": day < supplier.lead_time_days,
+                "unit_cost": supplier.unit_cost
+            })
+            entry["quantity"] += quantity
+        for entry in suggested.values():
+            entry["total_cost"] = entry["unit_cost"] * entry["quantity"]
+        
+        gross = result.gross.sum(axis=0).tolist()
+        on_order = np.bincount(
+            receipt_columns, weights=receipt_quantities, minlength=len(material_ids)
+        ).astype(np.int64).tolist()
+        planned = result.planned.sum(axis=0).tolist()
+        purchase_orders = sorted(suggested.values(), key=lambda entry: (entry["release_date"], entry["product_id"]))
+        
+        return {
+            "date": today.isoformat(),
+            "pending_orders": len(orders),
+            "horizon_days": result.horizon_days,
+            "materials": [
+                {
+                    "product_id": material_id,
+                    "product_name": product_names.get(material_id, f"Material ID: {material_id}"),
+                    "gross_requirements": gross[column],
+                    "available": int(available[column]),
+                    "on_order": on_order[column],
+                    "net_requirements": planned[column],
+                    "has_supplier": self.supplier_selection.has_suppliers(material_id)
+                }
+                for column, material_id in enumerate(material_ids.tolist())
+            ],
+            "suggested_purchase_orders": purchase_orders,
+            "total_cost": sum(entry["total_cost"] for entry in purchase_orders)
+        }
+    
+    def _check_release_batch(self, order_ids: List[int]) -> None:
+        """
+        Comprueba que se pueden liberar todas las órdenes a la vez: que caben
+        en la capacidad libre y que se cumple _check_releasable para todas
+        juntas.
+        
+        Raises:
+            ValueError: Si el lote no se puede liberar completo
+        """
+        if len(order_ids) > self.config.production_capacity_per_day - len(self.simulator.production_queue):
+            raise ValueError("El lote supera la capacidad de producción libre")
+        self._check_releasable(order_ids, " para liberar el lote")
+    
+    def _check_releasable(self, order_ids: List[int], context: str = "") -> None:
+        """
+        Comprueba, antes de abrir la transacción, que las órdenes siguen
+        pendientes y que el material de todas juntas, descontando lo que cada
+        una tiene reservado, está disponible.
+        
+        Args:
+            order_ids: IDs de las órdenes a liberar
+            context: Texto que se añade al mensaje de falta de stock
+        
+        Raises:
+            ValueError: Si alguna orden no se puede liberar
+        """
+        total: Dict[int, int] = {}
+        for order_id in order_ids:
+            order = self.manufacturing_repository.get_by_id(order_id)
+            if not order or order.status != ManufacturingOrderStatus.PENDING:
+                raise ValueError(f"La orden {order_id} no está en estado pendiente")
+            
+            reference = (
+                self.reservation_service.order_reference(order_id)
+                if self.reservation_service is not None else None
+            )
+            materials_needed = self.bom_service.calculate_materials_needed(order.product_id, order.quantity)
+            for material_id, quantity in materials_needed.items():
+                if reference is not None:
+                    quantity -= self.reservation_service.get_reserved_for(reference, material_id)
+                total[material_id] = total.get(material_id, 0) + max(0, quantity)
+        
+        if self.reservation_service is not None:
+            shortage = self.reservation_service.find_shortage(total)
+        else:
+            shortage = next(
+                (material_id for material_id, quantity in total.items()
+                 if quantity > self.stock_vector.get(material_id)),
+                None
+            )
+        if shortage is not None:
+            product = self.product_repository.get_by_id(shortage)
+            product_name = product.name if product else f"ID: {shortage}"
+            raise ValueError(f"Stock insuficiente de {product_name}{context}")
+    
+    def reserve_order_materials(self, order_id: int) -> Dict[str, Any]:
+        """
+        Reserva los materiales de una orden de fabricación pendiente, sin
+        consumirlos. Al liberar la orden, la reserva se convierte en consumo.
+        
+        Args:
+            order_id: ID de la orden
+            
+        Returns:
+            Información sobre la reserva creada
+        """
+        try:
+            if self.reservation_service is None:
+                raise ValueError("El registro de reservas no está disponible")
+            
+            order = self.manufacturing_repository.get_by_id(order_id)
+            if not order or order.status != ManufacturingOrderStatus.PENDING:
+                raise ValueError("Orden no válida o no está en estado pendiente")
+            
+            materials_needed = self.bom_service.calculate_materials_needed(
+                order.product_id, order.quantity
+            )
+            reference = self.reservation_service.order_reference(order.id)
+            if self.reservation_service.get_reservation(reference):
+                raise ValueError(f"La orden {order_id} ya tiene materiales reservados")
+            shortage = self.reservation_service.find_shortage(materials_needed)
+            if shortage is not None:
+                product = self.product_repository.get_by_id(shortage)
+                product_name = product.name if product else f"ID: {shortage}"
+                raise ValueError(f"Stock insuficiente de {product_name}")
+            
+            with self._atomic():
+                self.reservation_service.reserve(reference, materials_needed)
+            
+            return {
+                "success": True,
+                "order_id": order_id,
+                "materials": self._reservation_lines(materials_needed),
+                "message": f"Materiales de la orden {order_id} reservados"
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "order_id": order_id,
+                "message": str(e)
+            }
+    
+    def release_order_reservation(self, order_id: int) -> Dict[str, Any]:
+        """
+        Anula la reserva de materiales de una orden de fabricación.
+        
+        Args:
+            order_id: ID de la orden
+            
+        Returns:
+            Información sobre la reserva anulada
+        """
+        try:
+            if self.reservation_service is None:
+                raise ValueError("El registro de reservas no está disponible")
+            
+            reference = self.reservation_service.order_reference(order_id)
+            if not self.reservation_service.get_reservation(reference):
+                raise ValueError(f"La orden {order_id} no tiene materiales reservados")
+            
+            with self._atomic():
+                released = self.reservation_service.release(reference)
+            
+            return {
+                "success": True,
+                "order_id": order_id,
+                "materials": self._reservation_lines(released),
+                "message": f"Reserva de la orden {order_id} anulada"
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "order_id": order_id,
+                "message": str(e)
+            }
+    
+    def get_stock_reservations(self) -> Dict[str, Any]:
+        """
+        Obtiene las reservas vigentes y el stock físico, reservado y
+        disponible de cada producto.
+        
+        Returns:
+            Diccionario con las reservas por referencia y el disponible por producto
+        """
+        if self.reservation_service is None:
+            return {"reservations": [], "stock": []}
+        
+        reservations = [
+            {"reference": reference, "materials": self._reservation_lines(quantities)}
+            for reference, quantities in sorted(self.reservation_service.get_all_reservations().items())
+        ]
+        product_names = {product.id: product.name for product in self.product_repository.get_all()}
+        stock = [
+            {
+                "product_id": item.product_id,
+                "product_name": product_names.get(item.product_id, f"Producto ID: {item.product_id}"),
+                "on_hand": self.reservation_service.get_on_hand(item.product_id),
+                "reserved": self.reservation_service.get_reserved(item.product_id),
+                "available": self.reservation_service.get_available(item.product_id)
+            }
+            for item in self.stock_repository.get_all()
+        ]
+        return {"reservations": reservations, "stock": stock}
+    
+    def _reservation_lines(self, quantities: Dict[int, int]) -> List[Dict[str, Any]]:
+        """Convierte {product_id: cantidad} en líneas con el nombre del producto."""
+        product_names = {product.id: product.name for product in self.product_repository.get_all()}
+        return [
+            {
+                "product_id": product_id,
+                "product_name": product_names.get(product_id, f"Producto ID: {product_id}"),
+                "quantity": quantity
+            }
+            for product_id, quantity in sorted(quantities.items())
+        ]
+    
     def create_purchase_order(
         self, supplier_id: int, product_id: int, quantity: int
     ) -> Dict[str, Any]:
@@ -245,7 +1057,7 @@ class SimulationApplicationService:
                 supplier_id, product_id, quantity
             )
             
-            supplier = self.supplier_repository.get_by_id(supplier_id)
+            supplier = self.supplier_selection.get_supplier(supplier_id)
             supplier_name = supplier.name if supplier else f"Proveedor ID: {supplier_id}"
             
             product = self.product_repository.get_by_id(product_id)
@@ -309,6 +1121,18 @@ class SimulationApplicationService:
         
         return result
     
+    def _day_summary_to_dict(self, summary: DaySummary) -> Dict[str, Any]:
+        """Convierte un resumen diario en un diccionario serializable."""
+        return {
+            "date": summary.date.isoformat(),
+            "orders_created": summary.orders_created,
+            "orders_completed": summary.orders_completed,
+            "purchases_received": summary.purchases_received,
+            "purchases_created": summary.purchases_created,
+            "events_count": summary.events_count,
+            "skipped_days": summary.skipped_days
+        }
+    
     def _process_simulation_events(self, state: SimulationState) -> None:
         """
         Procesa los eventos generados durante la simulación.
@@ -322,3 +1146,8 @@ class SimulationApplicationService:
         
         # Limpiar la lista de eventos para el día
         state.events_today = []
+        
+        # Guardar el resumen diario de indicadores
+        if state.kpi_rollup is not None and self.kpi_repository is not None:
+            self.kpi_repository.add(state.kpi_rollup)
+            state.kpi_rollup = None
@@ -1,38 +1,68 @@
 import simpy
-from typing import Dict, List, Any, Optional, Callable
+import numpy as np
+from typing import Dict, List, Any, Optional, Callable, Tuple, Deque
 from datetime import datetime, date, timedelta
-import random
 import json
+import heapq
+import math
+import logging
+from collections import deque
 from dataclasses import dataclass
 
 from domain.models import (
     Product, BOM, Supplier, StockCurrent, 
     ManufacturingOrder, PurchaseOrder, Event,
     ManufacturingOrderStatus, PurchaseOrderStatus, EventType,
-    SimulationConfig
+    SimulationConfig, KPIDailyRollup
 )
 
 from domain.services import (
     InventoryService, BOMService, 
-    ManufacturingService, PurchasingService
+    ManufacturingService, PurchasingService,
+    StockReservationService, SupplierSelectionService
 )
 
+from application.random_streams import RandomStreams
+from application.checkpoint import SimulationCheckpoint, ProductionCheckpointEntry
+from application.kpis import KPIAccumulator
+from application.profiling import PhaseProfiler
+from application.replenishment import ReplenishmentEngine
+
+logger = logging.getLogger("3d_printer_simulator.simulation")
+
 @dataclass
 class SimulationState:
     """Estado actual de la simulación."""
     current_date: date
     events_today: List[Event] = None
+    kpi_rollup: Optional[KPIDailyRollup] = None  # Resumen de indicadores del último cierre
     
     def __post_init__(self):
         if self.events_today is None:
             self.events_today = []
 
 
+@dataclass
+class DaySummary:
+    """Resumen de la actividad de un día simulado."""
+    date: date
+    orders_created: int = 0
+    orders_completed: int = 0
+    purchases_received: int = 0
+    purchases_created: int = 0  # Compras emitidas por las políticas de reaprovisionamiento
+    events_count: int = 0
+    skipped_days: int = 0  # Días sin actividad saltados antes de este día
+
+
 class ProductionSimulator:
     """
     Simulador de producción de impresoras 3D utilizando SimPy.
     """
     
+    # Días de demanda que se generan como máximo por adelantado al buscar el
+    # próximo día con pedidos; acota la demanda que guardan los checkpoints
+    DEMAND_LOOKAHEAD_DAYS = 30
+    
     def __init__(
         self,
         inventory_service: InventoryService,
@@ -40,7 +70,10 @@ class ProductionSimulator:
         manufacturing_service: ManufacturingService,
         purchasing_service: PurchasingService,
         config: SimulationConfig,
-        product_repository=None  # Añadimos el repositorio de productos
+        product_repository=None,  # Añadimos el repositorio de productos
+        profiler: Optional[PhaseProfiler] = None,
+        reservation_service: Optional[StockReservationService] = None,
+        supplier_selection: Optional[SupplierSelectionService] = None
     ):
         self.inventory_service = inventory_service
         self.bom_service = bom_service
@@ -49,9 +82,21 @@ class ProductionSimulator:
         self.config = config
         self.product_repository = product_repository  # Guardamos la referencia
         
+        # Instrumentación por fases del avance de día (desactivada por defecto)
+        self.profiler = profiler or PhaseProfiler()
+        
         # Estado de la simulación
         self.state = SimulationState(current_date=config.initial_day)
         
+        # Flujos aleatorios independientes derivados de la semilla maestra
+        self.random_streams = RandomStreams(config.seed, config.antithetic)
+        
+        # Demanda ya generada para días futuros: tuplas (IDs de producto, cantidades)
+        self._demand_buffer: Deque[Tuple[np.ndarray, np.ndarray]] = deque()
+        
+        # Días sin actividad saltados antes del día en curso
+        self._skipped_days = 0
+        
         # Entorno SimPy
         self.env = simpy.Environment()
         
@@ -60,11 +105,38 @@ class ProductionSimulator:
             self.env, capacity=config.production_capacity_per_day
         )
         
-        # Cola de órdenes en producción
-        self.production_queue = []
+        # Órdenes liberadas que aún no han terminado su fabricación (ID -> orden)
+        self.production_queue: Dict[int, ManufacturingOrder] = {}
+        
+        # Órdenes que ya ocupan capacidad: ID -> (hora de inicio, duración en horas)
+        self._production_started: Dict[int, Tuple[float, float]] = {}
+        
+        # Órdenes completadas desde el último cierre de día
+        self._orders_completed_today = 0
+        
+        # Cola de prioridad de órdenes de compra pendientes:
+        # montículo de tuplas (ordinal de la fecha de entrega, ID, orden)
+        self.purchase_queue: List[Tuple[int, int, PurchaseOrder]] = []
+        self._rebuild_purchase_queue()
         
-        # Cola de órdenes de compra pendientes
-        self.purchase_queue = []
+        # Reanudar la fabricación de las órdenes que ya estaban en producción
+        self._restore_production()
+        
+        # Indicadores incrementales, actualizados en cada evento
+        self.kpis = self._bootstrap_kpis()
+        self._material_ids: List[int] = []
+        self.inventory_service.add_stock_listener(self._on_stock_changed)
+        
+        # Compras automáticas según las políticas de reaprovisionamiento configuradas
+        self.replenishment: Optional[ReplenishmentEngine] = None
+        if config.replenishment:
+            self.replenishment = ReplenishmentEngine.build(
+                config.replenishment, inventory_service, purchasing_service, config.initial_day,
+                supplier_selection or SupplierSelectionService(
+                    purchasing_service.supplier_repository, config.supplier_selection
+                ),
+                reservation_service
+            )
         
         # Callbacks para notificaciones
         self.day_advanced_callbacks = []
@@ -76,26 +148,225 @@ class ProductionSimulator:
         Returns:
             La nueva fecha actual
         """
-        # Crear órdenes aleatorias de fabricación
-        self._generate_random_orders()
+        self.advance_days(1)
+        return self.state.current_date
+    
+    def advance_days(self, days: int) -> List[DaySummary]:
+        """
+        Avanza varios días en la simulación dentro de una única ejecución de SimPy.
         
-        # Procesar un día de simulación
-        self.env.run(until=self.env.now + 24)  # 24 horas
+        Args:
+            days: Número de días a simular
+            
+        Returns:
+            Lista con el resumen de cada día simulado
+        """
+        if days < 1:
+            raise ValueError("El número de días a avanzar debe ser mayor que cero")
+        
+        summaries: List[DaySummary] = []
         
+        # Un único proceso recorre todos los días; la ejecución termina
+        # cuando este proceso finaliza
+        days_process = self.env.process(self._days_process(days, summaries))
+        self.env.run(until=days_process)
+        
+        return summaries
+    
+    def advance_to_next_event(self, max_days: int = 365) -> DaySummary:
+        """
+        Salta directamente al siguiente día en que ocurre algo y lo simula.
+        
+        Se consideran eventos la próxima entrega de una orden de compra, la
+        próxima finalización (o inicio) de fabricación en SimPy y el próximo
+        día con demanda distinta de cero. Los días intermedios, en los que no
+        ocurre nada, no generan consultas ni eventos. Un salto nunca supera
+        DEMAND_LOOKAHEAD_DAYS días.
+        
+        Args:
+            max_days: Número máximo de días a avanzar en este salto
+            
+        Returns:
+            Resumen del día simulado, con el número de días saltados
+        """
+        if max_days < 1:
+            raise ValueError("El número de días a avanzar debe ser mayor que cero")
+        
+        finished_products = self._get_finished_products()
+        next_day = min(
+            self._next_production_day(),
+            self._next_purchase_day(),
+            self._next_replenishment_day(),
+            self._next_demand_day(max_days, finished_products),
+            max_days
+        )
+        
+        idle_days = next_day - 1
+        if idle_days:
+            # Descartar la demanda (vacía) de los días saltados
+            for _ in range(idle_days):
+                self._demand_buffer.popleft()
+            
+            # No hay eventos SimPy pendientes antes de next_day
+            self.env.run(until=self.env.now + 24 * idle_days)
+            self.state.current_date += timedelta(days=idle_days)
+            self._skipped_days = idle_days
+            
+            # Los días saltados acumulan el stock previo a los eventos del día siguiente
+            self.kpis.skip_days(idle_days)
+        
+        return self.advance_days(1)[0]
+    
+    def advance_days_skipping_idle(self, days: int) -> List[DaySummary]:
+        """
+        Avanza varios días saltando los días sin actividad.
+        
+        Args:
+            days: Número de días de calendario a avanzar
+            
+        Returns:
+            Resúmenes de los días con actividad (cada uno indica cuántos días
+            sin actividad se saltaron antes de él)
+        """
+        if days < 1:
+            raise ValueError("El número de días a avanzar debe ser mayor que cero")
+        
+        summaries = []
+        remaining = days
+        
+        while remaining > 0:
+            summary = self.advance_to_next_event(max_days=remaining)
+            remaining -= summary.skipped_days + 1
+            summaries.append(summary)
+        
+        return summaries
+    
+    def _next_production_day(self) -> float:
+        """
+        Calcula el próximo día (1 = el día siguiente) con un evento SimPy
+        programado, como la finalización de una fabricación.
+        """
+        next_time = self.env.peek()
+        if next_time == math.inf:
+            return math.inf
+        return max(1, math.ceil((next_time - self.env.now) / 24))
+    
+    def _next_purchase_day(self) -> float:
+        """
+        Calcula el próximo día (1 = el día siguiente) en que llega una orden de compra.
+        """
+        if not self.purchase_queue:
+            return math.inf
+        return max(1, self.purchase_queue[0][0] - self.state.current_date.toordinal())
+    
+    def _next_replenishment_day(self) -> float:
+        """
+        Calcula el próximo día (1 = el día siguiente) en que alguna política de
+        reaprovisionamiento puede emitir compras.
+        """
+        if self.replenishment is None:
+            return math.inf
+        return self.replenishment.next_evaluation_day(self.state.current_date)
+    
+    def _next_demand_day(self, max_days: int, finished_products: List[Product]) -> int:
+        """
+        Calcula el próximo día (1 = el día siguiente) con demanda distinta de cero.
+        
+        La demanda se genera día a día, solo hasta encontrar ese día, y como
+        mucho DEMAND_LOOKAHEAD_DAYS días por adelantado; si no aparece antes,
+        se devuelve el último día generado, que se simula sin pedidos.
+        """
+        horizon = min(max_days, self.DEMAND_LOOKAHEAD_DAYS)
+        
+        for day in range(1, horizon + 1):
+            if day > len(self._demand_buffer):
+                self._demand_buffer.extend(self._draw_demand(1, finished_products))
+            if len(self._demand_buffer[day - 1][1]):
+                return day
+        
+        return horizon
+    
+    def _days_process(self, days: int, summaries: List[DaySummary]):
+        """
+        Proceso SimPy que simula una secuencia de días consecutivos.
+        
+        Args:
+            days: Número de días a simular
+            summaries: Lista donde se acumulan los resúmenes diarios
+        """
+        # Generar la demanda de todo el horizonte de una sola vez
+        finished_products = self._get_finished_products()
+        product_names = {product.id: product.name for product in finished_products}
+        self.profiler.start_day()
+        with self.profiler.phase("demand"):
+            demand = self._take_demand(days, finished_products)
+        
+        for day_index, day_demand in enumerate(demand):
+            if day_index:
+                self.profiler.start_day()
+            
+            # Crear órdenes aleatorias de fabricación
+            with self.profiler.phase("order_creation"):
+                orders_created = self._generate_random_orders(day_demand, product_names)
+            
+            # Procesar un día de simulación
+            yield self.env.timeout(24)  # 24 horas
+            
+            summary = self._close_day()
+            summary.orders_created = orders_created
+            summaries.append(summary)
+            self._log_day_summary(summary)
+    
+    @staticmethod
+    def _log_day_summary(summary: DaySummary) -> None:
+        """Registra una única línea de log con la actividad del día."""
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        logger.info(
+            "Día %s: %d órdenes creadas, %d completadas, %d compras recibidas",
+            summary.date.isoformat(), summary.orders_created,
+            summary.orders_completed, summary.purchases_received,
+            extra={"data": {
+                "date": summary.date.isoformat(),
+                "orders_created": summary.orders_created,
+                "orders_completed": summary.orders_completed,
+                "purchases_received": summary.purchases_received,
+                "purchases_created": summary.purchases_created,
+                "skipped_days": summary.skipped_days
+            }}
+        )
+    
+    def _close_day(self) -> DaySummary:
+        """
+        Cierra el día actual: avanza la fecha, procesa llegadas y finalizaciones
+        y notifica a los callbacks.
+        
+        Returns:
+            Resumen del día cerrado
+        """
         # Avanzar la fecha
+        previous_date = self.state.current_date - timedelta(days=self._skipped_days)
         self.state.current_date += timedelta(days=1)
         
         # Procesar llegadas de órdenes de compra
-        self._process_purchase_arrivals()
+        with self.profiler.phase("purchase_arrivals"):
+            purchases_received = self._process_purchase_arrivals()
         
-        # Completar órdenes de fabricación
-        self._process_manufacturing_completions()
+        # Evaluar las políticas de reaprovisionamiento con la posición del día
+        with self.profiler.phase("replenishment"):
+            purchases_created = self._replenish()
+        
+        # Órdenes de fabricación completadas durante el día
+        orders_completed = self._orders_completed_today
+        self._orders_completed_today = 0
         
         # Registrar evento de avance de día
         event_details = {
-            "previous_date": (self.state.current_date - timedelta(days=1)).isoformat(),
+            "previous_date": previous_date.isoformat(),
             "new_date": self.state.current_date.isoformat()
         }
+        if self._skipped_days:
+            event_details["skipped_days"] = self._skipped_days
         
         event = Event(
             id=0,  # Será asignado por el repositorio
@@ -106,11 +377,180 @@ class ProductionSimulator:
         
         self.state.events_today.append(event)
         
+        with self.profiler.phase("kpis"):
+            self.state.kpi_rollup = self.kpis.close_day(
+                self.state.current_date, self._get_material_ids(), self._skipped_days
+            )
+        
+        summary = DaySummary(
+            date=self.state.current_date,
+            orders_completed=orders_completed,
+            purchases_received=purchases_received,
+            purchases_created=purchases_created,
+            events_count=len(self.state.events_today),
+            skipped_days=self._skipped_days
+        )
+        self._skipped_days = 0
+        
         # Notificar a los callbacks
-        for callback in self.day_advanced_callbacks:
-            callback(self.state)
+        with self.profiler.phase("callbacks"):
+            for callback in self.day_advanced_callbacks:
+                callback(self.state)
         
-        return self.state.current_date
+        self.profiler.end_day(self.state.current_date)
+        return summary
+    
+    def create_checkpoint(self) -> SimulationCheckpoint:
+        """
+        Captura el estado en memoria del simulador entre dos días.
+        
+        Returns:
+            Checkpoint con las colas, el reloj, la fecha y el estado aleatorio
+        """
+        production = []
+        for order_id, order in self.production_queue.items():
+            started = self._production_started.get(order_id)
+            remaining_hours = None
+            if started:
+                start_time, duration = started
+                remaining_hours = start_time + duration - self.env.now
+            production.append(ProductionCheckpointEntry(
+                order=order, remaining_hours=remaining_hours
+            ))
+        
+        return SimulationCheckpoint(
+            current_date=self.state.current_date,
+            clock=self.env.now,
+            production=production,
+            orders_completed_today=self._orders_completed_today,
+            purchases=[entry[2] for entry in sorted(self.purchase_queue)],
+            kpis=self.kpis.get_state(),
+            random_seed=self.random_streams.seed,
+            random_state=self.random_streams.get_state(),
+            demand_buffer=[
+                (product_ids.tolist(), quantities.tolist())
+                for product_ids, quantities in self._demand_buffer
+            ]
+        )
+    
+    def restore_checkpoint(self, checkpoint: SimulationCheckpoint) -> None:
+        """
+        Restaura el estado en memoria del simulador desde un checkpoint,
+        sin necesidad de reproducir el historial.
+        
+        Args:
+            checkpoint: Checkpoint creado con create_checkpoint()
+        """
+        self.state = SimulationState(current_date=checkpoint.current_date)
+        
+        # Nuevo entorno SimPy con el reloj en el mismo instante
+        self.env = simpy.Environment(initial_time=checkpoint.clock)
+        self.production_capacity = simpy.Resource(
+            self.env, capacity=self.config.production_capacity_per_day
+        )
+        self.production_queue = {}
+        self._production_started = {}
+        self._orders_completed_today = checkpoint.orders_completed_today
+        self._skipped_days = 0
+        
+        # El repositorio manda sobre qué órdenes siguen abiertas: se descartan
+        # las que ya no lo están y se añaden las liberadas o compradas después
+        # de guardar el checkpoint
+        in_production = {
+            order.id: order for order in self.manufacturing_service.get_in_production_orders()
+        }
+        pending_purchases = {
+            order.id: order for order in self.purchasing_service.get_pending_orders()
+        }
+        
+        # Primero las órdenes que ya ocupaban capacidad, después las que esperaban
+        entries = [e for e in checkpoint.production if e.order.id in in_production]
+        running = [e for e in entries if e.remaining_hours is not None]
+        waiting = [e for e in entries if e.remaining_hours is None]
+        for entry in running + waiting:
+            self._start_production(entry.order, entry.remaining_hours)
+        for order_id in sorted(in_production):
+            if order_id not in self.production_queue:
+                self._start_production(in_production[order_id])
+        
+        purchases = {
+            order.id: order for order in checkpoint.purchases if order.id in pending_purchases
+        }
+        for order_id, order in pending_purchases.items():
+            purchases.setdefault(order_id, order)
+        self.purchase_queue = [
+            self._purchase_queue_entry(order) for order in purchases.values()
+        ]
+        heapq.heapify(self.purchase_queue)
+        
+        if checkpoint.kpis is not None:
+            self.kpis = KPIAccumulator()
+            self.kpis.set_state(checkpoint.kpis)
+        else:
+            self.kpis = self._bootstrap_kpis()
+        
+        self.random_streams.seed = checkpoint.random_seed
+        self.random_streams.set_state(checkpoint.random_state)
+        self._demand_buffer = deque(
+            (np.array(product_ids, dtype=np.int64), np.array(quantities, dtype=np.int64))
+            for product_ids, quantities in checkpoint.demand_buffer
+        )
+    
+    def roll_forward(self, current_date: date) -> None:
+        """
+        Lleva el estado en memoria hasta la fecha de los repositorios cuando
+        el checkpoint restaurado es anterior (p. ej. si se guarda cada varios
+        días), sin volver a simular los días que ya están persistidos.
+        
+        Se descarta la demanda de esos días, que solo depende de los flujos
+        aleatorios, para que la de los siguientes sea la misma que sin
+        reinicio, y se adelanta el reloj. Las órdenes en fabricación vuelven
+        a la cola desde el principio y los indicadores se recalculan desde
+        los repositorios, sin el inventario medio de los días anteriores.
+        
+        Args:
+            current_date: Fecha del último día cerrado en los repositorios
+        """
+        days = (current_date - self.state.current_date).days
+        if days <= 0:
+            return
+        
+        self._take_demand(days, self._get_finished_products())
+        
+        checkpoint = self.create_checkpoint()
+        checkpoint.current_date = current_date
+        checkpoint.clock += 24 * days
+        checkpoint.production = []
+        checkpoint.orders_completed_today = 0
+        checkpoint.kpis = None
+        self.reload(checkpoint)
+    
+    def reload(
+        self,
+        checkpoint: Optional[SimulationCheckpoint] = None,
+        kpis: Optional[KPIAccumulator] = None
+    ) -> None:
+        """
+        Vuelve a sincronizar el estado en memoria con los repositorios, p. ej.
+        después de deshacer una transacción o de importar datos.
+        
+        Args:
+            checkpoint: Estado al que volver, capturado antes de la transacción
+                deshecha. Si no se indica, se conservan el reloj, la fecha y los
+                flujos aleatorios.
+            kpis: Indicadores a conservar cuando no hay checkpoint; si no se
+                indican, se recalculan desde los repositorios
+        """
+        if checkpoint is None:
+            checkpoint = self.create_checkpoint()
+            checkpoint.kpis = None
+            self._material_ids = []
+        
+        self.restore_checkpoint(checkpoint)
+        if kpis is not None:
+            self.kpis = kpis
+        if self.replenishment is not None:
+            self.replenishment.reload(self.purchasing_service.get_pending_orders())
     
     def register_day_advanced_callback(self, callback: Callable[[SimulationState], None]) -> None:
         """
@@ -134,12 +574,10 @@ class ProductionSimulator:
         # Usar el servicio para liberar la orden y consumir materiales
         order = self.manufacturing_service.release_order_to_production(order_id)
         
-        # Añadir a la cola de producción
-        self.production_queue.append(order)
+        self.kpis.order_released(order)
         
-        # Iniciar proceso de fabricación
-        production_process = self._production_process(order)
-        self.env.process(production_process)
+        # Añadir a la cola de producción e iniciar el proceso de fabricación
+        self._start_production(order)
         
         return order
     
@@ -157,118 +595,305 @@ class ProductionSimulator:
         Returns:
             La orden de compra creada
         """
-        # Usar el servicio para crear la orden
+        # Usar el servicio para crear la orden, emitida en el día simulado
         order = self.purchasing_service.create_purchase_order(
-            supplier_id, product_id, quantity
+            supplier_id, product_id, quantity, issue_date=self._issue_date()
         )
         
         # Añadir a la cola de compras pendientes
-        self.purchase_queue.append(order)
+        heapq.heappush(self.purchase_queue, self._purchase_queue_entry(order))
+        self.kpis.purchase_created(self.purchasing_service.get_order_cost(order))
         
         return order
     
-    def _generate_random_orders(self) -> None:
+    def _replenish(self) -> int:
         """
-        Genera órdenes de fabricación aleatorias según la configuración.
+        Emite en bloque las compras que piden hoy las políticas de
+        reaprovisionamiento, con la fecha simulada como fecha de emisión.
+        
+        Returns:
+            Número de órdenes de compra emitidas
         """
-        # Obtener productos terminados
-        if self.product_repository:
-            finished_products = self.product_repository.get_by_type("finished")
-        else:
-            finished_products = []
+        if self.replenishment is None:
+            return 0
         
-        if not finished_products:
-            # Si no hay productos terminados disponibles, no generar órdenes
-            return
+        items = self.replenishment.evaluate(self.state.current_date)
+        if not items:
+            return 0
         
-        # Determinar cuántas órdenes generar (distribución normal)
-        num_orders = max(0, round(random.normalvariate(
-            self.config.demand_mean, self.config.demand_std_dev
-        )))
+        orders = self.purchasing_service.create_purchase_orders(
+            [(supplier.id, product_id, quantity) for supplier, product_id, quantity in items],
+            issue_date=self._issue_date()
+        )
+        for order, (supplier, _, _) in zip(orders, items):
+            heapq.heappush(self.purchase_queue, self._purchase_queue_entry(order))
+            self.kpis.purchase_created(supplier.unit_cost * order.quantity)
+            logger.debug("Compra automática #%d: %d x producto %d", order.id, order.quantity, order.product_id)
         
-        print(f"Generando {num_orders} órdenes aleatorias...")
+        return len(orders)
+    
+    def _issue_date(self) -> datetime:
+        """Fecha de emisión de las compras: el día simulado en curso."""
+        return datetime.combine(self.state.current_date, datetime.min.time())
+    
+    def _bootstrap_kpis(self) -> KPIAccumulator:
+        """Crea los indicadores incrementales a partir del estado de los repositorios."""
+        pending = self.manufacturing_service.get_pending_orders()
+        in_production = self.manufacturing_service.get_in_production_orders()
+        completed = self.manufacturing_service.get_completed_orders()
+        
+        return KPIAccumulator.bootstrap(
+            today=self.state.current_date,
+            orders_created=len(pending) + len(in_production) + len(completed),
+            pending_orders=pending,
+            completed_orders=completed,
+            stock=self.inventory_service.get_all_stock(),
+            material_spend=self.purchasing_service.get_total_spend()
+        )
+    
+    def _on_stock_changed(self, product_id: int, previous: int, new: int) -> None:
+        """Traslada los cambios de stock a los indicadores incrementales."""
+        self.kpis.stock_changed(product_id, previous, new)
+    
+    def _get_material_ids(self) -> List[int]:
+        """Obtiene los IDs de las materias primas, consultados una sola vez."""
+        if not self._material_ids and self.product_repository:
+            self._material_ids = [
+                product.id for product in self.product_repository.get_by_type("raw")
+            ]
+        return self._material_ids
+    
+    def _get_finished_products(self) -> List[Product]:
+        """
+        Obtiene los productos terminados que pueden recibir pedidos.
+        
+        Returns:
+            Lista de productos ordenada por ID
+        """
+        if not self.product_repository:
+            return []
         
-        for _ in range(num_orders):
-            # Seleccionar un producto aleatorio
-            product = random.choice(finished_products)
+        # Orden estable para que la elección de producto sea reproducible
+        return sorted(
+            self.product_repository.get_by_type("finished"), key=lambda p: p.id
+        )
+    
+    def _take_demand(
+        self, days: int, finished_products: List[Product]
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Obtiene la demanda de los próximos días, usando primero la ya generada
+        por adelantado y generando el resto de una vez.
+        
+        Args:
+            days: Número de días
+            finished_products: Productos terminados disponibles
             
-            # Determinar cantidad (entre 1 y 10)
-            quantity = random.randint(1, 10)
+        Returns:
+            Lista con una tupla (IDs de producto, cantidades) por día
+        """
+        missing = days - len(self._demand_buffer)
+        if missing > 0:
+            self._demand_buffer.extend(self._draw_demand(missing, finished_products))
+        
+        return [self._demand_buffer.popleft() for _ in range(days)]
+    
+    def _draw_demand(
+        self, days: int, finished_products: List[Product]
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Genera de una vez la demanda aleatoria de varios días.
+        
+        El número de pedidos de cada día sigue una distribución normal; el
+        producto y la cantidad (entre 1 y 10) de cada pedido son uniformes.
+        Todos los valores se obtienen con una única llamada vectorizada por flujo.
+        
+        Args:
+            days: Número de días
+            finished_products: Productos terminados disponibles
             
-            # Crear la orden
-            try:
-                self.manufacturing_service.create_manufacturing_order(
-                    product.id, quantity
-                )
-                print(f"Orden creada para {quantity} unidades de {product.name}")
-            except Exception as e:
-                print(f"Error al crear orden: {str(e)}")
+        Returns:
+            Lista con una tupla (IDs de producto, cantidades) por día
+        """
+        if not finished_products:
+            empty = np.empty(0, dtype=np.int64)
+            return [(empty, empty) for _ in range(days)]
+        
+        product_ids = np.array([product.id for product in finished_products], dtype=np.int64)
+        
+        # Determinar cuántas órdenes generar cada día (distribución normal)
+        counts = np.maximum(0, np.rint(self.random_streams.normal(
+            "demand_count", self.config.demand_mean, self.config.demand_std_dev, days
+        ))).astype(np.int64)
+        total = int(counts.sum())
+        
+        product_indices = self.random_streams.integers("product_mix", 0, len(product_ids), total)
+        quantities = self.random_streams.integers("quantity", 1, 11, total)
+        
+        splits = np.cumsum(counts)[:-1]
+        return list(zip(
+            np.split(product_ids[product_indices], splits),
+            np.split(quantities, splits)
+        ))
+    
+    def _generate_random_orders(
+        self,
+        demand: Tuple[np.ndarray, np.ndarray],
+        product_names: Dict[int, str]
+    ) -> int:
+        """
+        Crea en bloque las órdenes de fabricación de la demanda de un día.
+        
+        Args:
+            demand: Tupla (IDs de producto, cantidades) generada por _draw_demand
+            product_names: Nombres de los productos terminados por ID
+            
+        Returns:
+            Número de órdenes creadas
+        """
+        product_ids, quantities = demand
+        
+        if len(quantities) == 0:
+            return 0
+        
+        items = list(zip(product_ids.tolist(), quantities.tolist()))
+        
+        # Crear todas las órdenes con una única escritura
+        try:
+            created_orders = self.manufacturing_service.create_manufacturing_orders(items)
+        except Exception as e:
+            logger.error("Error al crear órdenes: %s", e)
+            return 0
+        
+        for order in created_orders:
+            self.kpis.order_created(order, self.state.current_date)
+        
+        # El detalle por orden solo se formatea en nivel DEBUG
+        if logger.isEnabledFor(logging.DEBUG):
+            for order in created_orders:
+                product_name = product_names.get(order.product_id, f"ID: {order.product_id}")
+                logger.debug("Orden creada para %d unidades de %s", order.quantity, product_name)
+        
+        return len(created_orders)
+    
+    def _start_production(
+        self, order: ManufacturingOrder, remaining_hours: Optional[float] = None
+    ) -> None:
+        """
+        Registra una orden como en fabricación y lanza su proceso SimPy.
+        
+        Args:
+            order: Orden de fabricación ya liberada
+            remaining_hours: Horas de fabricación pendientes, si la orden ya
+                había empezado a fabricarse (al restaurar un checkpoint)
+        """
+        self.production_queue[order.id] = order
+        self.env.process(self._production_process(order, remaining_hours))
+    
+    def _restore_production(self) -> None:
+        """
+        Relanza los procesos de fabricación de las órdenes que figuran en
+        producción en el repositorio (por ejemplo, tras reiniciar el servicio).
+        """
+        for order in sorted(
+            self.manufacturing_service.get_in_production_orders(), key=lambda o: o.id
+        ):
+            self._start_production(order)
     
-    def _production_process(self, order: ManufacturingOrder) -> None:
+    def _production_process(
+        self, order: ManufacturingOrder, remaining_hours: Optional[float] = None
+    ) -> None:
         """
         Proceso de producción para una orden (generador SimPy).
         
+        La orden espera a que haya capacidad de producción libre, ocupa esa
+        capacidad durante su tiempo de fabricación y se completa en el instante
+        en que este termina, aunque sea en un día posterior.
+        
         Args:
             order: Orden de fabricación
+            remaining_hours: Horas pendientes si la fabricación ya había empezado
         """
         # Solicitar capacidad de producción
         with self.production_capacity.request() as req:
             yield req
             
-            # Simulamos el tiempo de producción (1 día por unidad, hasta un máximo)
-            production_time = min(24, order.quantity * 2)  # Horas
-            yield self.env.timeout(production_time)
+            # Simulamos el tiempo de producción (2 horas por unidad, hasta un máximo de 24)
+            if remaining_hours is None:
+                production_time = min(24, order.quantity * 2)  # Horas
+            else:
+                production_time = remaining_hours
             
-            # La orden quedará completada en el siguiente avance de día
+            self._production_started[order.id] = (self.env.now, production_time)
+            yield self.env.timeout(production_time)
+            del self._production_started[order.id]
+        
+        # La capacidad ya está libre para la siguiente orden en espera
+        self._complete_production(order)
     
-    def _process_manufacturing_completions(self) -> None:
-        """
-        Procesa las órdenes de fabricación completadas.
+    def _complete_production(self, order: ManufacturingOrder) -> None:
         """
-        # Verificar qué órdenes han completado su tiempo de fabricación
-        completed_orders = []
-        remaining_orders = []
+        Completa una orden cuya fabricación ha terminado.
         
-        for order in self.production_queue:
-            # Simplificación: consideramos que todas las órdenes en producción
-            # se completan después de un día
-            completed_orders.append(order)
-        
-        # Actualizar la cola
-        self.production_queue = remaining_orders
+        Args:
+            order: Orden de fabricación
+        """
+        del self.production_queue[order.id]
         
-        # Marcar órdenes como completadas
-        for order in completed_orders:
+        with self.profiler.phase("completions"):
             try:
                 self.manufacturing_service.complete_order(order.id)
-                print(f"Orden #{order.id} completada")
+                self._orders_completed_today += 1
+                self.kpis.order_completed(order)
+                logger.debug("Orden #%d completada", order.id)
             except Exception as e:
-                print(f"Error al completar orden #{order.id}: {str(e)}")
+                logger.error("Error al completar orden #%d: %s", order.id, e)
     
-    def _process_purchase_arrivals(self) -> None:
+    def _rebuild_purchase_queue(self) -> None:
+        """
+        Reconstruye la cola de compras a partir de las órdenes en estado
+        'ordered' guardadas en el repositorio.
+        """
+        self.purchase_queue = [
+            self._purchase_queue_entry(order)
+            for order in self.purchasing_service.get_pending_orders()
+        ]
+        heapq.heapify(self.purchase_queue)
+    
+    @staticmethod
+    def _purchase_queue_entry(order: PurchaseOrder) -> Tuple[int, int, PurchaseOrder]:
+        """
+        Construye la entrada de la cola de compras para una orden, con la fecha
+        de entrega convertida una sola vez a ordinal de día.
+        """
+        delivery_day = datetime.fromisoformat(order.estimated_delivery_date).date().toordinal()
+        return (delivery_day, order.id, order)
+    
+    def _process_purchase_arrivals(self) -> int:
         """
         Procesa las llegadas de órdenes de compra.
+        
+        Solo se extraen de la cola las órdenes con fecha de entrega
+        estimada hoy o antes.
+        
+        Returns:
+            Número de órdenes de compra recibidas
         """
+        today = self.state.current_date.toordinal()
         arrived_orders = []
-        remaining_orders = []
-        
-        for order in self.purchase_queue:
-            # Convertir fechas de string a objetos date
-            estimated_delivery = datetime.fromisoformat(order.estimated_delivery_date).date()
-            
-            # Verificar si la fecha de entrega estimada es hoy o antes
-            if estimated_delivery <= self.state.current_date:
-                arrived_orders.append(order)
-            else:
-                remaining_orders.append(order)
         
-        # Actualizar la cola
-        self.purchase_queue = remaining_orders
+        while self.purchase_queue and self.purchase_queue[0][0] <= today:
+            arrived_orders.append(heapq.heappop(self.purchase_queue)[2])
         
         # Procesar órdenes llegadas
+        received = 0
         for order in arrived_orders:
             try:
                 self.purchasing_service.receive_purchase_order(order.id)
-                print(f"Orden de compra #{order.id} recibida")
+                received += 1
+                logger.debug("Orden de compra #%d recibida", order.id)
             except Exception as e:
-                print(f"Error al recibir orden de compra #{order.id}: {str(e)}")
+                logger.error("Error al recibir orden de compra #%d: %s", order.id, e)
+        
+        return received
+
@@ -0,0 +1,206 @@
+import hashlib
+import itertools
+import json
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Callable
+
+from domain.models import SimulationConfig
+
+from application.replications import (
+    ReplicationRunner, ReplicationResult, SimulationFactory,
+    replication_configs, aggregate_kpis
+)
+
+
+class SweepResultCache(ABC):
+    """Interfaz para guardar los resultados de cada punto de un barrido."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[List[Dict[str, float]]]:
+        """Recupera los indicadores por réplica guardados para una clave, o None."""
+        pass
+
+    @abstractmethod
+    def put(self, key: str, samples: List[Dict[str, float]]) -> None:
+        """Guarda los indicadores por réplica de una clave."""
+        pass
+
+
+@dataclass
+class SweepPoint:
+    """Resultado de un punto del barrido."""
+    config: SimulationConfig
+    result: ReplicationResult
+    cached: bool = False
+    key: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convierte el punto en un diccionario serializable."""
+        return {
+            "config": self.config.model_dump(mode="json"),
+            "cached": self.cached,
+            "key": self.key,
+            **self.result.to_dict()
+        }
+
+
+@dataclass
+class SweepResult:
+    """Resultado completo de un barrido de parámetros."""
+    days: int
+    replications: int
+    points: List[SweepPoint] = field(default_factory=list)
+
+    @property
+    def computed(self) -> int:
+        """Número de puntos calculados en esta ejecución."""
+        return sum(1 for point in self.points if not point.cached)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convierte el resultado en un diccionario serializable."""
+        return {
+            "days": self.days,
+            "replications": self.replications,
+            "points": [point.to_dict() for point in self.points]
+        }
+
+
+def expand_grid(base: SimulationConfig, grid: Dict[str, List[Any]]) -> List[SimulationConfig]:
+    """
+    Genera una configuración por cada combinación de valores de la rejilla.
+
+    Args:
+        base: Configuración de partida
+        grid: Diccionario {parámetro: lista de valores}
+
+    Returns:
+        Lista de configuraciones, en orden determinista
+    """
+    names = sorted(grid)
+    for name in names:
+        if name not in SimulationConfig.model_fields:
+            raise ValueError(f"Parámetro de simulación desconocido: {name}")
+
+    return [
+        SimulationConfig.model_validate({**base.model_dump(), **dict(zip(names, values))})
+        for values in itertools.product(*(grid[name] for name in names))
+    ]
+
+
+def sweep_key(config: SimulationConfig, days: int, replications: int, code_version: str) -> str:
+    """
+    Calcula la clave de caché de un punto del barrido: un hash de la
+    configuración (incluida la semilla), del horizonte, del número de
+    réplicas y de la versión del código.
+    """
+    payload = json.dumps({
+        "config": config.model_dump(mode="json"),
+        "days": days,
+        "replications": replications,
+        "code_version": code_version
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SweepRunner:
+    """
+    Ejecuta un barrido de configuraciones en un pool de procesos, reutilizando
+    los resultados ya calculados que haya en la caché.
+
+    Solo se cachean los puntos con semilla fija: sin semilla, el resultado no
+    es reproducible y se recalcula siempre.
+    """
+
+    def __init__(
+        self,
+        factory: SimulationFactory,
+        cache: Optional[SweepResultCache] = None,
+        code_version: str = "",
+        max_workers: Optional[int] = None,
+        worker_initializer: Optional[Callable[[], None]] = None
+    ):
+        """
+        Args:
+            factory: Fábrica del servicio de simulación aislado
+            cache: Caché de resultados (sin caché si es None)
+            code_version: Identificador de la versión del código del simulador
+            max_workers: Número de procesos del pool
+            worker_initializer: Función que ejecuta cada proceso del pool al arrancar
+        """
+        self.runner = ReplicationRunner(factory, max_workers, worker_initializer)
+        self.cache = cache
+        self.code_version = code_version
+
+    def run(
+        self,
+        configs: List[SimulationConfig],
+        days: int,
+        replications: int = 1,
+        confidence: float = 0.95
+    ) -> SweepResult:
+        """
+        Ejecuta todos los puntos del barrido.
+
+        Las réplicas de todos los puntos pendientes se reparten juntas en el
+        pool, de modo que los procesos se aprovechan aunque haya pocos puntos.
+
+        Args:
+            configs: Configuraciones a evaluar
+            days: Horizonte de cada réplica en días
+            replications: Réplicas por punto
+            confidence: Nivel de confianza de los intervalos
+
+        Returns:
+            Resultado de cada punto, en el mismo orden que las configuraciones
+        """
+        if replications < 1:
+            raise ValueError("El número de réplicas debe ser mayor que cero")
+
+        keys = [
+            sweep_key(config, days, replications, self.code_version)
+            if config.seed is not None else None
+            for config in configs
+        ]
+
+        samples: Dict[int, List[Dict[str, float]]] = {}
+        if self.cache is not None:
+            for index, key in enumerate(keys):
+                if key is not None:
+                    cached = self.cache.get(key)
+                    if cached is not None:
+                        samples[index] = cached
+        cached_indexes = set(samples)
+
+        pending = [index for index in range(len(configs)) if index not in samples]
+        tasks = [
+            replication_config
+            for index in pending
+            for replication_config in replication_configs(configs[index], replications)
+        ]
+        results = self.runner.map(tasks, days)
+
+        for position, index in enumerate(pending):
+            samples[index] = results[position * replications:(position + 1) * replications]
+            if self.cache is not None and keys[index] is not None:
+                self.cache.put(keys[index], samples[index])
+
+        return SweepResult(
+            days=days,
+            replications=replications,
+            points=[
+                SweepPoint(
+                    config=config,
+                    result=ReplicationResult(
+                        replications=replications,
+                        days=days,
+                        confidence=confidence,
+                        kpis=aggregate_kpis(samples[index], confidence),
+                        samples=samples[index]
+                    ),
+                    cached=index in cached_indexes,
+                    key=keys[index]
+                )
+                for index, config in enumerate(configs)
+            ]
+        )
@@ -1,10 +1,11 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Callable, ContextManager
 from datetime import date
 
-from domain.models import SimulationConfig
+from domain.models import SimulationConfig, SupplierSelectionConfig
 from domain.services import (
     InventoryService, BOMService, 
-    ManufacturingService, PurchasingService
+    ManufacturingService, PurchasingService,
+    StockReservationService, SupplierSelectionService
 )
 
 from infrastructure.database import Database
@@ -12,15 +13,28 @@ from infrastructure.repositories import (
     SQLiteProductRepository, SQLiteBOMRepository, 
     SQLiteSupplierRepository, SQLiteStockRepository,
     SQLiteManufacturingOrderRepository, SQLitePurchaseOrderRepository,
-    SQLiteEventRepository
+    SQLiteEventRepository, SQLiteKPIRepository,
+    SQLiteStockReservationRepository
 )
-from infrastructure.data_export import DataExporter, DataImporter
+from infrastructure.memory_repositories import (
+    InMemoryProductRepository, InMemoryBOMRepository,
+    InMemorySupplierRepository, InMemoryStockRepository,
+    InMemoryManufacturingOrderRepository, InMemoryPurchaseOrderRepository,
+    InMemoryEventRepository, InMemoryKPIRepository,
+    InMemoryStockReservationRepository
+)
+from infrastructure.data_export import DataExporter, DataImporter, DatabaseWriter
+from infrastructure.checkpoint_store import FileCheckpointStore
 
 from application.services import SimulationApplicationService
+from application.checkpoint import CheckpointStore
+from application.profiling import PhaseProfiler
 
 from config.settings import (
     DB_FILE, DEFAULT_PRODUCTS, DEFAULT_BOM, 
-    DEFAULT_SUPPLIERS, DEFAULT_STOCK
+    DEFAULT_SUPPLIERS, DEFAULT_STOCK,
+    CHECKPOINT_FILE, CHECKPOINT_EVERY_DAYS,
+    PROFILE_PHASES, PROFILE_LOG_DAYS
 )
 
 class DIContainer:
@@ -47,9 +61,13 @@ class DIContainer:
         self.manufacturing_repository = None
         self.purchase_repository = None
         self.event_repository = None
+        self.kpi_repository = None
+        self.reservation_repository = None
         
         # Servicios de dominio
         self.inventory_service = None
+        self.reservation_service = None
+        self.supplier_selection = None
         self.bom_service = None
         self.manufacturing_service = None
         self.purchasing_service = None
@@ -88,6 +106,24 @@ class DIContainer:
         self.manufacturing_repository = SQLiteManufacturingOrderRepository(self.db)
         self.purchase_repository = SQLitePurchaseOrderRepository(self.db)
         self.event_repository = SQLiteEventRepository(self.db)
+        self.kpi_repository = SQLiteKPIRepository(self.db)
+        self.reservation_repository = SQLiteStockReservationRepository(self.db)
+    
+    def _transaction_factory(self) -> Optional[Callable[..., ContextManager]]:
+        """Devuelve la fábrica de transacciones usada para agrupar escrituras."""
+        return self.db.transaction
+    
+    def _checkpoint_store(self) -> Optional[CheckpointStore]:
+        """Devuelve el almacén de checkpoints del estado del simulador."""
+        return FileCheckpointStore(str(CHECKPOINT_FILE))
+    
+    def _profiler(self) -> PhaseProfiler:
+        """Devuelve la instrumentación por fases, con los contadores SQL si hay base de datos."""
+        return PhaseProfiler(
+            enabled=PROFILE_PHASES,
+            sql_stats=self.db.get_stats if self.db is not None else None,
+            log_each_day=PROFILE_LOG_DAYS
+        )
     
     def _initialize_domain_services(self) -> None:
         """Inicializa los servicios de dominio."""
@@ -97,6 +133,11 @@ class DIContainer:
             self.event_repository
         )
         
+        self.reservation_service = StockReservationService(
+            self.reservation_repository,
+            self.inventory_service
+        )
+        
         self.bom_service = BOMService(
             self.bom_repository,
             self.product_repository
@@ -107,7 +148,13 @@ class DIContainer:
             self.bom_service,
             self.inventory_service,
             self.event_repository,
-            self.product_repository
+            self.product_repository,
+            self.reservation_service
+        )
+        
+        self.supplier_selection = SupplierSelectionService(
+            self.supplier_repository,
+            SupplierSelectionConfig.model_validate(self.config.get("supplier_selection") or {})
         )
         
         self.purchasing_service = PurchasingService(
@@ -115,7 +162,8 @@ class DIContainer:
             self.supplier_repository,
             self.inventory_service,
             self.event_repository,
-            self.product_repository
+            self.product_repository,
+            self.supplier_selection
         )
     
     def _initialize_application_services(self) -> None:
@@ -125,7 +173,11 @@ class DIContainer:
             demand_mean=self.config["demand_mean"],
             demand_std_dev=self.config["demand_std_dev"],
             production_capacity_per_day=self.config["production_capacity_per_day"],
-            warehouse_capacity=self.config["warehouse_capacity"]
+            warehouse_capacity=self.config["warehouse_capacity"],
+            seed=self.config.get("seed"),
+            antithetic=self.config.get("antithetic", False),
+            replenishment=self.config.get("replenishment", []),
+            supplier_selection=self.supplier_selection.config
         )
         
         self.simulation_service = SimulationApplicationService(
@@ -142,7 +194,14 @@ class DIContainer:
             purchase_repository=self.purchase_repository,
             event_repository=self.event_repository,
             
-            config=simulation_config
+            config=simulation_config,
+            kpi_repository=self.kpi_repository,
+            reservation_service=self.reservation_service,
+            transaction=self._transaction_factory(),
+            checkpoint_store=self._checkpoint_store(),
+            checkpoint_every_days=CHECKPOINT_EVERY_DAYS,
+            profiler=self._profiler(),
+            sql_stats=self.db.get_stats if self.db is not None else None
         )
     
     def _initialize_utilities(self) -> None:
@@ -164,7 +223,8 @@ class DIContainer:
             self.stock_repository,
             self.manufacturing_repository,
             self.purchase_repository,
-            self.event_repository
+            self.event_repository,
+            on_imported=self.simulation_service.reload_state
         )
     
     def seed_database(self) -> None:
@@ -199,3 +259,127 @@ class DIContainer:
                 stock_data["quantity"],
                 "Stock inicial"
             )
+    
+    def fork(self) -> "ForkContainer":
+        """
+        Crea una rama aislada de la simulación a partir del estado actual:
+        copia la base de datos en memoria y el estado del simulador (reloj,
+        colas y flujos aleatorios). Los cambios en la rama no afectan al
+        estado principal.
+        
+        Returns:
+            Contenedor inicializado de la rama
+        """
+        branch = ForkContainer(self.config, self.db.fork())
+        branch.initialize()
+        branch.simulation_service.simulator.restore_checkpoint(
+            self.simulation_service.simulator.create_checkpoint()
+        )
+        return branch
+
+
+class ForkContainer(DIContainer):
+    """
+    Contenedor de una rama "what-if" de la simulación, sobre una copia en
+    memoria de la base de datos. No guarda checkpoints.
+    """
+    
+    def __init__(self, config: Dict[str, Any], db: Database):
+        """
+        Args:
+            config: Configuración de la simulación
+            db: Copia en memoria de la base de datos
+        """
+        super().__init__(config)
+        self.db = db
+    
+    def _initialize_database(self) -> None:
+        """La base de datos ya viene copiada del contenedor original."""
+        pass
+    
+    def _checkpoint_store(self) -> Optional[CheckpointStore]:
+        """Las ramas son desechables: no se guardan checkpoints."""
+        return None
+
+
+class HeadlessContainer(DIContainer):
+    """
+    Contenedor para ejecutar la simulación sin interfaz y sin base de datos.
+    
+    Todos los repositorios se mantienen en memoria, por lo que la simulación
+    no toca la base de datos de producción. Los resultados solo se vuelcan a
+    SQLite o a un archivo JSON cuando se solicita explícitamente.
+    """
+    
+    def _initialize_database(self) -> None:
+        """El modo sin interfaz no utiliza base de datos."""
+        self.db = None
+    
+    def _initialize_repositories(self) -> None:
+        """Inicializa los repositorios en memoria."""
+        self.product_repository = InMemoryProductRepository()
+        self.bom_repository = InMemoryBOMRepository()
+        self.supplier_repository = InMemorySupplierRepository()
+        self.stock_repository = InMemoryStockRepository()
+        self.manufacturing_repository = InMemoryManufacturingOrderRepository()
+        self.purchase_repository = InMemoryPurchaseOrderRepository()
+        self.event_repository = InMemoryEventRepository()
+        self.kpi_repository = InMemoryKPIRepository()
+        self.reservation_repository = InMemoryStockReservationRepository()
+    
+    def _transaction_factory(self) -> Optional[Callable[..., ContextManager]]:
+        """Los repositorios en memoria no necesitan transacciones."""
+        return None
+    
+    def _checkpoint_store(self) -> Optional[CheckpointStore]:
+        """El estado en memoria no sobrevive al proceso: no hay checkpoints."""
+        return None
+    
+    def flush_to_database(self, db_path: str) -> None:
+        """
+        Vuelca el estado en memoria a una base de datos SQLite.
+        
+        Args:
+            db_path: Ruta del archivo de base de datos de destino
+        """
+        database = Database(db_path)
+        try:
+            DatabaseWriter(
+                self.product_repository,
+                self.bom_repository,
+                self.supplier_repository,
+                self.stock_repository,
+                self.manufacturing_repository,
+                self.purchase_repository,
+                self.event_repository,
+                self.kpi_repository,
+                self.reservation_repository
+            ).write(database)
+        finally:
+            database.disconnect()
+    
+    def flush_to_file(self, file_path: str) -> None:
+        """
+        Vuelca el estado en memoria a un archivo JSON.
+        
+        Args:
+            file_path: Ruta del archivo JSON de destino
+        """
+        self.data_exporter.export_all_data(file_path)
+
+
+def create_headless_simulation(config: SimulationConfig) -> SimulationApplicationService:
+    """
+    Construye un servicio de simulación aislado, en memoria y con los datos
+    iniciales por defecto. Se usa como fábrica en las réplicas Monte Carlo.
+    
+    Args:
+        config: Configuración de la simulación
+        
+    Returns:
+        Servicio de simulación listo para avanzar días
+    """
+    container = HeadlessContainer(config.model_dump(mode="json"))
+    container.initialize()
+    container.seed_database()
+    return container.simulation_service
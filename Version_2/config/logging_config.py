@@ -0,0 +1,102 @@
+import atexit
+import json
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Formatea cada registro como una línea JSON. Los campos estructurados se
+    pasan en `extra={"data": {...}}` y se añaden al objeto.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        data = getattr(record, "data", None)
+        if data:
+            entry.update(data)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(
+    level: str = "INFO",
+    log_file: Optional[str] = 'simulator.log',
+    json_format: bool = False
+) -> QueueListener:
+    """
+    Configura el logging de la aplicación con un manejador en segundo plano.
+
+    Los registros se encolan sin bloquear al hilo que los emite y un hilo
+    aparte los escribe en la consola y en el archivo de log, de modo que la
+    escritura en disco o en stdout no ralentiza la simulación.
+
+    Args:
+        level: Nivel mínimo de los registros (DEBUG, INFO, WARNING...)
+        log_file: Archivo de log (solo consola si es None)
+        json_format: Escribir cada registro como una línea JSON
+
+    Returns:
+        Listener en segundo plano (se detiene automáticamente al salir)
+    """
+    formatter = _formatter(json_format)
+
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+
+    _set_root_handler(QueueHandler(log_queue), level)
+
+    listener.start()
+    # Vaciar la cola antes de terminar el proceso
+    atexit.register(listener.stop)
+
+    return listener
+
+
+def configure_worker_logging(level: str = "INFO", json_format: bool = False) -> None:
+    """
+    Configura el logging de un proceso del pool de réplicas (se usa como
+    `initializer` del pool).
+
+    Un proceso creado con fork hereda el QueueHandler del padre pero no el
+    hilo que vacía la cola, por lo que sus registros se perderían. Los
+    procesos del pool escriben directamente en la consola: emiten pocos
+    registros (solo avisos y errores) y no compensa un hilo por proceso.
+
+    Args:
+        level: Nivel mínimo de los registros (DEBUG, INFO, WARNING...)
+        json_format: Escribir cada registro como una línea JSON
+    """
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(_formatter(json_format))
+    _set_root_handler(handler, level)
+
+
+def _formatter(json_format: bool) -> logging.Formatter:
+    return JSONFormatter() if json_format else logging.Formatter(LOG_FORMAT)
+
+
+def _set_root_handler(handler: logging.Handler, level: str) -> None:
+    """Sustituye los manejadores del logger raíz por el indicado."""
+    root = logging.getLogger()
+    for previous in list(root.handlers):
+        root.removeHandler(previous)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
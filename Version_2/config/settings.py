@@ -17,13 +17,27 @@ DB_FILE = DATA_DIR / "simulator.db"
 # Archivo de configuración de la simulación
 CONFIG_FILE = DATA_DIR / "config.json"
 
+# Archivo de checkpoint del estado en memoria del simulador
+CHECKPOINT_FILE = DATA_DIR / "checkpoint.json"
+
+# Cada cuántos días simulados se guarda un checkpoint
+CHECKPOINT_EVERY_DAYS = int(os.getenv("CHECKPOINT_EVERY_DAYS", "1"))
+
+# Instrumentación por fases del avance de día y línea de log por cada día medido
+PROFILE_PHASES = os.getenv("PROFILE_PHASES", "0") == "1"
+PROFILE_LOG_DAYS = os.getenv("PROFILE_LOG_DAYS", "0") == "1"
+
+# Directorio de la caché de resultados de los barridos de parámetros
+SWEEP_CACHE_DIR = DATA_DIR / "sweep_cache"
+
 # Configuración por defecto de la simulación
 DEFAULT_CONFIG = {
     "initial_day": date.today().isoformat(),
     "demand_mean": 5.0,
     "demand_std_dev": 2.0,
     "production_capacity_per_day": 10,
-    "warehouse_capacity": 1000
+    "warehouse_capacity": 1000,
+    "seed": None
 }
 
 # Datos iniciales para la simulación
@@ -82,6 +96,10 @@ DEFAULT_STOCK = [
     {"product_id": 10, "quantity": 50}  # enchufe_schuko
 ]
 
+# Nivel de log (DEBUG muestra el detalle de cada orden) y formato JSON por línea
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_JSON = os.getenv("LOG_JSON", "0") == "1"
+
 # Configuración de API y Streamlit
 API_HOST = os.getenv("API_HOST", "0.0.0.0")
 API_PORT = int(os.getenv("API_PORT", "8000"))
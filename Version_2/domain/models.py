@@ -1,4 +1,4 @@
-from typing import Literal
+from typing import List, Literal, Optional
 from pydantic import BaseModel
 from datetime import date
 from enum import Enum
@@ -16,6 +16,16 @@ class PurchaseOrderStatus(str, Enum):
     RECEIVED = "received"
     CANCELLED = "cancelled"
 
+class ReplenishmentPolicyType(str, Enum):
+    REORDER_POINT_QUANTITY = "sQ"  # Si la posición cae a s o menos, pedir múltiplos de Q
+    REORDER_POINT_ORDER_UP_TO = "sS"  # Si la posición cae a s o menos, pedir hasta S
+    PERIODIC_REVIEW = "periodic"  # Cada R días, pedir hasta S
+
+class SupplierCriterion(str, Enum):
+    COST = "cost"  # Menor coste unitario
+    LEAD_TIME = "lead_time"  # Menor plazo de entrega
+    WEIGHTED = "weighted"  # Menor puntuación ponderada de coste y plazo
+
 class EventType(str, Enum):
     MANUFACTURING_ORDER_CREATED = "manufacturing_order_created"
     MANUFACTURING_ORDER_STARTED = "manufacturing_order_started"
@@ -81,6 +91,45 @@ class Event(BaseModel):
     event_date: str
     details: str
 
+# Reserva de stock: material asignado a un destino pero aún no consumido
+class StockReservation(BaseModel):
+    id: int
+    reference: str  # Destino de la reserva, p. ej. "MO-12" para la orden de fabricación 12
+    product_id: int
+    quantity: int
+    created_date: str
+
+# Resumen diario de indicadores (KPI)
+class KPIDailyRollup(BaseModel):
+    id: int
+    date: str  # Fecha simulada del cierre (ISO 8601)
+    days: int = 1  # Días cubiertos, incluidos los días sin actividad saltados
+    orders_created: int
+    orders_completed: int
+    units_completed: int
+    backlog_orders: int
+    backlog_units: int
+    backlog_avg_age_days: float
+    material_spend: float
+    inventory_units: int
+    stockout_materials: int  # Materias primas sin stock al cierre
+
+# Política de reaprovisionamiento automático de una materia prima
+class ReplenishmentPolicy(BaseModel):
+    product_id: int
+    type: ReplenishmentPolicyType
+    reorder_point: int = 0  # s
+    order_quantity: int = 0  # Q, para la política (s, Q)
+    order_up_to: int = 0  # S, para las políticas (s, S) y de revisión periódica
+    review_period_days: int = 1  # R, para la revisión periódica
+    supplier_id: Optional[int] = None  # Por defecto, el proveedor más barato
+
+# Criterio de elección de proveedor para las compras automáticas y la API
+class SupplierSelectionConfig(BaseModel):
+    criterion: SupplierCriterion = SupplierCriterion.COST
+    cost_weight: float = 1.0  # Peso del coste en la puntuación ponderada
+    lead_time_weight: float = 1.0  # Peso del plazo en la puntuación ponderada
+
 # Clase para configuración del simulador
 class SimulationConfig(BaseModel):
     initial_day: date
@@ -88,3 +137,7 @@ class SimulationConfig(BaseModel):
     demand_std_dev: float
     production_capacity_per_day: int
     warehouse_capacity: int
+    seed: Optional[int] = None  # Semilla maestra de los flujos aleatorios
+    antithetic: bool = False  # Usar las variables antitéticas de la semilla
+    replenishment: List[ReplenishmentPolicy] = []  # Políticas de compra automática
+    supplier_selection: SupplierSelectionConfig = SupplierSelectionConfig()
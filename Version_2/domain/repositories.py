@@ -1,10 +1,11 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any, TypeVar, Generic
+from typing import List, Optional, Dict, Any, TypeVar, Generic, Callable
 from datetime import date
 
 from domain.models import (
     Product, BOM, Supplier, StockCurrent, 
-    ManufacturingOrder, PurchaseOrder, Event
+    ManufacturingOrder, PurchaseOrder, Event, KPIDailyRollup,
+    StockReservation
 )
 
 T = TypeVar('T')
@@ -43,7 +44,27 @@ class ProductRepository(Repository[Product], ABC):
 
 
 class BOMRepository(Repository[BOM], ABC):
-    """Repositorio para la lista de materiales (BOM)."""
+    """
+    Repositorio para la lista de materiales (BOM).
+    
+    Notifica a los listeners registrados el ID del producto terminado cuya
+    lista de materiales se añade, modifica o elimina.
+    """
+    
+    def __init__(self):
+        self.change_listeners: List[Callable[[int], None]] = []
+    
+    def add_change_listener(self, listener: Callable[[int], None]) -> None:
+        """
+        Registra una función que se llama con el ID del producto terminado
+        cada vez que cambia su lista de materiales.
+        """
+        self.change_listeners.append(listener)
+    
+    def _notify_change(self, finished_product_id: int) -> None:
+        """Notifica a los listeners el cambio de la BOM de un producto."""
+        for listener in self.change_listeners:
+            listener(finished_product_id)
     
     @abstractmethod
     def get_by_finished_product(self, finished_product_id: int) -> List[BOM]:
@@ -52,7 +73,27 @@ class BOMRepository(Repository[BOM], ABC):
 
 
 class SupplierRepository(Repository[Supplier], ABC):
-    """Repositorio para proveedores."""
+    """
+    Repositorio para proveedores.
+    
+    Notifica a los listeners registrados el ID del proveedor que se añade,
+    modifica o elimina.
+    """
+    
+    def __init__(self):
+        self.change_listeners: List[Callable[[int], None]] = []
+    
+    def add_change_listener(self, listener: Callable[[int], None]) -> None:
+        """
+        Registra una función que se llama con el ID del proveedor cada vez
+        que cambia.
+        """
+        self.change_listeners.append(listener)
+    
+    def _notify_change(self, supplier_id: int) -> None:
+        """Notifica a los listeners el cambio de un proveedor."""
+        for listener in self.change_listeners:
+            listener(supplier_id)
     
     @abstractmethod
     def get_by_product(self, product_id: int) -> List[Supplier]:
@@ -72,11 +113,31 @@ class StockRepository(Repository[StockCurrent], ABC):
     def update_quantity(self, product_id: int, quantity: int) -> StockCurrent:
         """Actualiza la cantidad en inventario de un producto."""
         pass
+    
+    @abstractmethod
+    def consume_many(self, quantities: Dict[int, int]) -> Optional[Dict[int, int]]:
+        """
+        Descuenta de forma atómica varias cantidades del inventario: o se
+        descuentan todas o ninguna.
+        
+        Args:
+            quantities: Diccionario {product_id: cantidad a descontar}
+            
+        Returns:
+            Diccionario {product_id: cantidad nueva}, o None si algún producto
+            no tiene stock suficiente (sin cambios en el inventario)
+        """
+        pass
 
 
 class ManufacturingOrderRepository(Repository[ManufacturingOrder], ABC):
     """Repositorio para órdenes de fabricación."""
     
+    @abstractmethod
+    def add_many(self, entities: List[ManufacturingOrder]) -> List[ManufacturingOrder]:
+        """Añade varias órdenes de fabricación en una única escritura."""
+        pass
+    
     @abstractmethod
     def get_by_status(self, status: str) -> List[ManufacturingOrder]:
         """Obtiene órdenes de fabricación por estado."""
@@ -91,6 +152,11 @@ class ManufacturingOrderRepository(Repository[ManufacturingOrder], ABC):
 class PurchaseOrderRepository(Repository[PurchaseOrder], ABC):
     """Repositorio para órdenes de compra."""
     
+    @abstractmethod
+    def add_many(self, entities: List[PurchaseOrder]) -> List[PurchaseOrder]:
+        """Añade varias órdenes de compra en una única escritura."""
+        pass
+    
     @abstractmethod
     def get_by_status(self, status: str) -> List[PurchaseOrder]:
         """Obtiene órdenes de compra por estado."""
@@ -105,6 +171,11 @@ class PurchaseOrderRepository(Repository[PurchaseOrder], ABC):
 class EventRepository(Repository[Event], ABC):
     """Repositorio para eventos del sistema."""
     
+    @abstractmethod
+    def add_many(self, entities: List[Event]) -> List[Event]:
+        """Añade varios eventos en una única escritura."""
+        pass
+    
     @abstractmethod
     def get_by_type(self, type: str) -> List[Event]:
         """Obtiene eventos por tipo."""
@@ -114,3 +185,36 @@ class EventRepository(Repository[Event], ABC):
     def get_by_date_range(self, start_date: str, end_date: str) -> List[Event]:
         """Obtiene eventos dentro de un rango de fechas."""
         pass
+
+
+class StockReservationRepository(Repository[StockReservation], ABC):
+    """Repositorio para el registro de reservas de stock."""
+    
+    @abstractmethod
+    def get_by_reference(self, reference: str) -> List[StockReservation]:
+        """Obtiene las líneas de una reserva."""
+        pass
+    
+    @abstractmethod
+    def add_many(self, entities: List[StockReservation]) -> List[StockReservation]:
+        """Añade varias líneas de reserva en una única escritura."""
+        pass
+    
+    @abstractmethod
+    def delete_by_reference(self, reference: str) -> int:
+        """Elimina todas las líneas de una reserva y devuelve cuántas había."""
+        pass
+
+
+class KPIRepository(Repository[KPIDailyRollup], ABC):
+    """Repositorio para los resúmenes diarios de indicadores."""
+    
+    @abstractmethod
+    def get_by_date_range(self, start_date: str, end_date: str) -> List[KPIDailyRollup]:
+        """Obtiene los resúmenes diarios dentro de un rango de fechas."""
+        pass
+    
+    @abstractmethod
+    def get_latest(self) -> Optional[KPIDailyRollup]:
+        """Obtiene el resumen del último día cerrado, o None si no hay ninguno."""
+        pass
@@ -1,14 +1,16 @@
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Callable, Set
 from domain.models import (
     Product, BOM, Supplier, StockCurrent, 
-    ManufacturingOrder, PurchaseOrder, Event,
-    ManufacturingOrderStatus, PurchaseOrderStatus, EventType
+    ManufacturingOrder, PurchaseOrder, Event, StockReservation,
+    ManufacturingOrderStatus, PurchaseOrderStatus, EventType,
+    SupplierCriterion, SupplierSelectionConfig
 )
 from domain.repositories import (
     ProductRepository, BOMRepository, SupplierRepository, 
     StockRepository, ManufacturingOrderRepository, 
-    PurchaseOrderRepository, EventRepository
+    PurchaseOrderRepository, EventRepository, StockReservationRepository
 )
+from bisect import bisect_right
 from datetime import datetime, date, timedelta
 import json
 
@@ -24,11 +26,30 @@ class InventoryService:
         self.stock_repository = stock_repository
         self.product_repository = product_repository
         self.event_repository = event_repository
+        
+        # Funciones notificadas en cada cambio de stock: (product_id, anterior, nuevo)
+        self.stock_listeners: List[Callable[[int, int, int], None]] = []
+    
+    def add_stock_listener(self, listener: Callable[[int, int, int], None]) -> None:
+        """
+        Registra una función que se llamará tras cada cambio de stock con el
+        ID del producto y las cantidades anterior y nueva.
+        """
+        self.stock_listeners.append(listener)
+    
+    def _notify_stock_change(self, product_id: int, previous: int, new: int) -> None:
+        """Notifica un cambio de stock a las funciones registradas."""
+        for listener in self.stock_listeners:
+            listener(product_id, previous, new)
     
     def get_current_stock(self, product_id: int) -> Optional[StockCurrent]:
         """Obtiene el nivel actual de stock para un producto."""
         return self.stock_repository.get_by_product(product_id)
     
+    def get_all_stock(self) -> List[StockCurrent]:
+        """Obtiene el nivel actual de stock de todos los productos."""
+        return self.stock_repository.get_all()
+    
     def update_stock(self, product_id: int, quantity_change: int, reason: str) -> StockCurrent:
         """
         Actualiza el stock de un producto.
@@ -65,6 +86,7 @@ class InventoryService:
             )
             self.event_repository.add(event)
             
+            self._notify_stock_change(product_id, current_stock.quantity, new_quantity)
             return updated_stock
         else:
             # Si no existe, crear nuevo registro de stock
@@ -95,8 +117,66 @@ class InventoryService:
             )
             self.event_repository.add(event)
             
+            self._notify_stock_change(product_id, 0, quantity_change)
             return added_stock
     
+    def consume_many(self, quantities: Dict[int, int], reason: str) -> Dict[int, int]:
+        """
+        Consume varios productos de forma atómica: valida y descuenta todas
+        las cantidades en una única operación del repositorio y registra los
+        eventos de cambio de stock con una sola escritura en bloque.
+        
+        Args:
+            quantities: Diccionario {product_id: cantidad a consumir}
+            reason: Motivo del consumo para registro en eventos
+        
+        Returns:
+            Diccionario {product_id: cantidad nueva}
+        
+        Raises:
+            ValueError: Si alguna cantidad es negativa o falta stock (no se
+                consume nada)
+        """
+        quantities = {product_id: quantity for product_id, quantity in quantities.items() if quantity}
+        if any(quantity < 0 for quantity in quantities.values()):
+            raise ValueError("No se puede consumir una cantidad negativa")
+        if not quantities:
+            return {}
+        
+        new_quantities = self.stock_repository.consume_many(quantities)
+        if new_quantities is None:
+            # Identificar el primer producto sin stock suficiente para el mensaje
+            for product_id, quantity in quantities.items():
+                if not self.check_stock_availability(product_id, quantity):
+                    product = self.product_repository.get_by_id(product_id)
+                    product_name = product.name if product else f"ID: {product_id}"
+                    raise ValueError(f"Stock insuficiente de {product_name}")
+            raise ValueError("Stock insuficiente")
+        
+        event_date = datetime.now().isoformat()
+        self.event_repository.add_many([
+            Event(
+                id=0,  # Será asignado por el repositorio
+                type=EventType.STOCK_LEVEL_CHANGED,
+                event_date=event_date,
+                details=json.dumps({
+                    "product_id": product_id,
+                    "previous_quantity": new_quantities[product_id] + quantity,
+                    "new_quantity": new_quantities[product_id],
+                    "change": -quantity,
+                    "reason": reason
+                })
+            )
+            for product_id, quantity in quantities.items()
+        ])
+        
+        for product_id, quantity in quantities.items():
+            self._notify_stock_change(
+                product_id, new_quantities[product_id] + quantity, new_quantities[product_id]
+            )
+        
+        return new_quantities
+    
     def check_stock_availability(self, product_id: int, required_quantity: int) -> bool:
         """Verifica si hay suficiente stock disponible."""
         current_stock = self.stock_repository.get_by_product(product_id)
@@ -105,8 +185,223 @@ class InventoryService:
         return current_stock.quantity >= required_quantity
 
 
+class StockReservationService:
+    """
+    Servicio para el registro de reservas de stock.
+    
+    Una reserva asigna material a un destino (p. ej. una orden de fabricación)
+    sin consumirlo todavía. El servicio mantiene en memoria el stock físico y
+    el reservado de cada producto, de modo que el disponible
+    (físico - reservado) se consulta en O(1) sin acceder al repositorio.
+    """
+    
+    def __init__(
+        self,
+        reservation_repository: StockReservationRepository,
+        inventory_service: InventoryService
+    ):
+        self.reservation_repository = reservation_repository
+        self.inventory_service = inventory_service
+        
+        self._on_hand: Dict[int, int] = {}
+        self._reserved: Dict[int, int] = {}
+        self._by_reference: Dict[str, Dict[int, int]] = {}
+        self._load()
+        
+        # Funciones notificadas cuando cambia el disponible de un producto
+        self.available_listeners: List[Callable[[int], None]] = []
+        
+        inventory_service.add_stock_listener(self._on_stock_changed)
+    
+    def _load(self) -> None:
+        """Lee el stock físico y las reservas vigentes de los repositorios."""
+        self._on_hand = {
+            stock.product_id: stock.quantity for stock in self.inventory_service.get_all_stock()
+        }
+        self._reserved = {}
+        self._by_reference = {}
+        for reservation in self.reservation_repository.get_all():
+            lines = self._by_reference.setdefault(reservation.reference, {})
+            lines[reservation.product_id] = lines.get(reservation.product_id, 0) + reservation.quantity
+            self._reserved[reservation.product_id] = (
+                self._reserved.get(reservation.product_id, 0) + reservation.quantity
+            )
+    
+    def reload(self) -> None:
+        """
+        Vuelve a leer el stock y las reservas de los repositorios (p. ej. tras
+        deshacer una transacción o importar datos) y notifica el disponible de
+        todos los productos afectados.
+        """
+        product_ids = set(self._on_hand) | set(self._reserved)
+        self._load()
+        for product_id in sorted(product_ids | set(self._on_hand) | set(self._reserved)):
+            self._notify_available_change(product_id)
+    
+    def add_available_listener(self, listener: Callable[[int], None]) -> None:
+        """
+        Registra una función que se llamará con el ID del producto cada vez
+        que cambie su disponible, ya sea por el stock o por las reservas.
+        """
+        self.available_listeners.append(listener)
+    
+    def _notify_available_change(self, product_id: int) -> None:
+        for listener in self.available_listeners:
+            listener(product_id)
+    
+    @staticmethod
+    def order_reference(order_id: int) -> str:
+        """Referencia de reserva de una orden de fabricación."""
+        return f"MO-{order_id}"
+    
+    def _on_stock_changed(self, product_id: int, previous: int, new: int) -> None:
+        self._on_hand[product_id] = new
+        self._notify_available_change(product_id)
+    
+    def _apply(self, reference: str, quantities: Dict[int, int], sign: int = 1) -> None:
+        """Suma (o resta) cantidades al reservado total y al de la referencia."""
+        lines = self._by_reference.setdefault(reference, {})
+        for product_id, quantity in quantities.items():
+            self._reserved[product_id] = self._reserved.get(product_id, 0) + sign * quantity
+            lines[product_id] = lines.get(product_id, 0) + sign * quantity
+            if not self._reserved[product_id]:
+                del self._reserved[product_id]
+            if not lines[product_id]:
+                del lines[product_id]
+        if not lines:
+            del self._by_reference[reference]
+        for product_id in quantities:
+            self._notify_available_change(product_id)
+    
+    def get_on_hand(self, product_id: int) -> int:
+        """Stock físico de un producto."""
+        return self._on_hand.get(product_id, 0)
+    
+    def get_reserved(self, product_id: int) -> int:
+        """Cantidad reservada de un producto entre todas las reservas."""
+        return self._reserved.get(product_id, 0)
+    
+    def get_available(self, product_id: int) -> int:
+        """Stock disponible de un producto: físico menos reservado."""
+        return self._on_hand.get(product_id, 0) - self._reserved.get(product_id, 0)
+    
+    def get_reserved_for(self, reference: str, product_id: int) -> int:
+        """Cantidad de un producto reservada para una referencia."""
+        return self._by_reference.get(reference, {}).get(product_id, 0)
+    
+    def get_reservation(self, reference: str) -> Dict[int, int]:
+        """Cantidades reservadas para una referencia ({} si no tiene reserva)."""
+        return dict(self._by_reference.get(reference, {}))
+    
+    def get_all_reservations(self) -> Dict[str, Dict[int, int]]:
+        """Todas las reservas vigentes, por referencia."""
+        return {reference: dict(lines) for reference, lines in self._by_reference.items()}
+    
+    def find_shortage(
+        self, quantities: Dict[int, int], reference: Optional[str] = None
+    ) -> Optional[int]:
+        """
+        Busca un producto cuyo disponible no cubra la cantidad pedida.
+        
+        Args:
+            quantities: Diccionario {product_id: cantidad}
+            reference: Reserva propia, cuyas cantidades cuentan como disponibles
+        
+        Returns:
+            ID del primer producto sin disponible suficiente, o None si todo está cubierto
+        """
+        own = self._by_reference.get(reference, {}) if reference else {}
+        for product_id, quantity in quantities.items():
+            if quantity > self.get_available(product_id) + own.get(product_id, 0):
+                return product_id
+        return None
+    
+    def reserve(self, reference: str, quantities: Dict[int, int]) -> List[StockReservation]:
+        """
+        Reserva material para una referencia.
+        
+        Args:
+            reference: Destino de la reserva
+            quantities: Diccionario {product_id: cantidad a reservar}
+        
+        Returns:
+            Líneas de reserva creadas
+        
+        Raises:
+            ValueError: Si la referencia ya tiene reserva, alguna cantidad es
+                negativa o no hay disponible suficiente (no se reserva nada)
+        """
+        if reference in self._by_reference:
+            raise ValueError(f"Ya existe una reserva para {reference}")
+        quantities = {product_id: quantity for product_id, quantity in quantities.items() if quantity}
+        if any(quantity < 0 for quantity in quantities.values()):
+            raise ValueError("No se puede reservar una cantidad negativa")
+        if not quantities:
+            return []
+        
+        shortage = self.find_shortage(quantities)
+        if shortage is not None:
+            product = self.inventory_service.product_repository.get_by_id(shortage)
+            product_name = product.name if product else f"ID: {shortage}"
+            raise ValueError(f"Stock disponible insuficiente de {product_name}")
+        
+        created_date = datetime.now().isoformat()
+        reservations = self.reservation_repository.add_many([
+            StockReservation(
+                id=0,  # Será asignado por el repositorio
+                reference=reference,
+                product_id=product_id,
+                quantity=quantity,
+                created_date=created_date
+            )
+            for product_id, quantity in quantities.items()
+        ])
+        self._apply(reference, quantities)
+        return reservations
+    
+    def release(self, reference: str) -> Dict[int, int]:
+        """
+        Anula la reserva de una referencia y devuelve el material al disponible.
+        
+        Returns:
+            Cantidades que estaban reservadas ({} si no había reserva)
+        """
+        quantities = self.get_reservation(reference)
+        if quantities:
+            self.reservation_repository.delete_by_reference(reference)
+            self._apply(reference, quantities, sign=-1)
+        return quantities
+    
+    def consume(self, reference: str, reason: str) -> Dict[int, int]:
+        """
+        Convierte una reserva en consumo: descuenta del stock las cantidades
+        reservadas y elimina la reserva.
+        
+        Returns:
+            Cantidades consumidas
+        
+        Raises:
+            ValueError: Si la referencia no tiene reserva o falta stock físico
+                (la reserva se mantiene)
+        """
+        quantities = self.get_reservation(reference)
+        if not quantities:
+            raise ValueError(f"No existe ninguna reserva para {reference}")
+        self.inventory_service.consume_many(quantities, reason)
+        self.release(reference)
+        return quantities
+
+
 class BOMService:
-    """Servicio para gestionar las listas de materiales (BOM)."""
+    """
+    Servicio para gestionar las listas de materiales (BOM).
+    
+    Las BOM pueden tener varios niveles: un material que tiene su propia
+    lista de materiales (un subconjunto) se descompone a su vez hasta llegar
+    a materiales sin BOM. Cada producto se descompone una sola vez y sus
+    requisitos aplanados se guardan en caché hasta que el repositorio
+    notifica un cambio en su BOM o en la de alguno de sus componentes.
+    """
     
     def __init__(
         self,
@@ -115,39 +410,132 @@ class BOMService:
     ):
         self.bom_repository = bom_repository
         self.product_repository = product_repository
+        
+        # Caché por producto: materiales directos y requisitos aplanados por unidad
+        self._materials_cache: Dict[int, List[Tuple[Product, int]]] = {}
+        self._requirements_cache: Dict[int, Dict[int, int]] = {}
+        # Índice inverso: componente -> productos descompuestos que lo usan
+        self._parents: Dict[int, Set[int]] = {}
+        self.bom_repository.add_change_listener(self.invalidate)
+    
+    def invalidate(self, product_id: Optional[int] = None) -> None:
+        """
+        Descarta la BOM cacheada de un producto y los requisitos aplanados de
+        todos los productos que lo contienen, o toda la caché si no se indica.
+        Se llama automáticamente cuando cambia el repositorio de BOM.
+        """
+        if product_id is None:
+            self._materials_cache.clear()
+            self._requirements_cache.clear()
+            self._parents.clear()
+            return
+        
+        self._materials_cache.pop(product_id, None)
+        pending = [product_id]
+        visited = {product_id}
+        while pending:
+            current = pending.pop()
+            self._requirements_cache.pop(current, None)
+            for parent in self._parents.get(current, ()):
+                if parent not in visited:
+                    visited.add(parent)
+                    pending.append(parent)
+    
+    def _direct_materials(self, product_id: int) -> List[Tuple[Product, int]]:
+        """Materiales directos de un producto (lista cacheada: no modificar)."""
+        materials = self._materials_cache.get(product_id)
+        if materials is None:
+            materials = []
+            for bom_entry in self.bom_repository.get_by_finished_product(product_id):
+                material = self.product_repository.get_by_id(bom_entry.material_id)
+                if material:
+                    materials.append((material, bom_entry.quantity))
+            self._materials_cache[product_id] = materials
+        return materials
     
     def get_materials_for_product(self, product_id: int) -> List[Tuple[Product, int]]:
         """
-        Obtiene la lista de materiales necesarios para fabricar un producto.
+        Obtiene la lista de materiales directos (primer nivel) necesarios
+        para fabricar un producto.
         
         Returns:
             Lista de tuplas (Producto, Cantidad requerida)
         """
-        bom_entries = self.bom_repository.get_by_finished_product(product_id)
-        result = []
+        return list(self._direct_materials(product_id))
+    
+    def get_requirements(self, product_id: int) -> Dict[int, int]:
+        """
+        Obtiene los materiales finales (sin BOM propia) necesarios para
+        fabricar una unidad de un producto, descomponiendo los subconjuntos.
+        
+        Los productos se descomponen en orden topológico (postorden de un
+        recorrido en profundidad iterativo): cada subconjunto se descompone
+        una sola vez y el coste es lineal en el tamaño de la BOM.
+        
+        Returns:
+            Diccionario {material_id: cantidad_por_unidad} (compartido: no modificar)
+            
+        Raises:
+            ValueError: Si la BOM contiene un ciclo
+        """
+        requirements = self._requirements_cache.get(product_id)
+        if requirements is not None:
+            return requirements
+        
+        # Pila de (producto, iterador sobre sus materiales directos)
+        stack = [(product_id, iter(self._direct_materials(product_id)))]
+        on_path = {product_id}
         
-        for bom_entry in bom_entries:
-            material = self.product_repository.get_by_id(bom_entry.material_id)
-            if material:
-                result.append((material, bom_entry.quantity))
+        while stack:
+            current, materials = stack[-1]
+            for material, _ in materials:
+                self._parents.setdefault(material.id, set()).add(current)
+                if material.id in self._requirements_cache:
+                    continue
+                if material.id in on_path:
+                    cycle = [node for node, _ in stack] + [material.id]
+                    cycle = cycle[cycle.index(material.id):]
+                    raise ValueError(
+                        "Ciclo en la lista de materiales: "
+                        + " -> ".join(str(node) for node in cycle)
+                    )
+                stack.append((material.id, iter(self._direct_materials(material.id))))
+                on_path.add(material.id)
+                break
+            else:
+                # Todos los componentes ya están descompuestos
+                stack.pop()
+                on_path.discard(current)
+                self._requirements_cache[current] = self._flatten(current)
         
+        return self._requirements_cache[product_id]
+    
+    def _flatten(self, product_id: int) -> Dict[int, int]:
+        """
+        Combina los requisitos ya descompuestos de los materiales directos de
+        un producto. Un material sin BOM propia cuenta como material final.
+        """
+        result: Dict[int, int] = {}
+        for material, quantity in self._direct_materials(product_id):
+            if self._direct_materials(material.id):
+                for leaf_id, leaf_quantity in self._requirements_cache[material.id].items():
+                    result[leaf_id] = result.get(leaf_id, 0) + leaf_quantity * quantity
+            else:
+                result[material.id] = result.get(material.id, 0) + quantity
         return result
     
     def calculate_materials_needed(self, product_id: int, quantity: int) -> Dict[int, int]:
         """
-        Calcula la cantidad total de materiales necesarios para fabricar 
-        una cantidad específica de un producto.
+        Calcula la cantidad total de materiales finales necesarios para
+        fabricar una cantidad específica de un producto.
         
         Returns:
             Diccionario {material_id: cantidad_requerida}
         """
-        materials = self.get_materials_for_product(product_id)
-        result = {}
-        
-        for material, req_quantity in materials:
-            result[material.id] = req_quantity * quantity
-        
-        return result
+        return {
+            material_id: req_quantity * quantity
+            for material_id, req_quantity in self.get_requirements(product_id).items()
+        }
 
 
 class ManufacturingService:
@@ -159,52 +547,102 @@ class ManufacturingService:
         bom_service: BOMService,
         inventory_service: InventoryService,
         event_repository: EventRepository,
-        product_repository: ProductRepository
+        product_repository: ProductRepository,
+        reservation_service: Optional[StockReservationService] = None
     ):
         self.manufacturing_repository = manufacturing_repository
         self.bom_service = bom_service
         self.inventory_service = inventory_service
         self.event_repository = event_repository
         self.product_repository = product_repository
+        self.reservation_service = reservation_service
+        
+        # Funciones notificadas al crear una orden o cambiar su estado
+        self.order_listeners: List[Callable[[ManufacturingOrder], None]] = []
+    
+    def add_order_listener(self, listener: Callable[[ManufacturingOrder], None]) -> None:
+        """
+        Registra una función que se llamará con la orden tras crearla o
+        cambiar su estado.
+        """
+        self.order_listeners.append(listener)
+    
+    def _notify_order_change(self, order: ManufacturingOrder) -> None:
+        """Notifica la creación o el cambio de estado de una orden."""
+        for listener in self.order_listeners:
+            listener(order)
     
     def create_manufacturing_order(self, product_id: int, quantity: int) -> ManufacturingOrder:
         """Crea una nueva orden de fabricación."""
-        product = self.product_repository.get_by_id(product_id)
-        if not product or product.type != "finished":
-            raise ValueError("Producto no válido para fabricación")
+        return self.create_manufacturing_orders([(product_id, quantity)])[0]
+    
+    def create_manufacturing_orders(
+        self, items: List[Tuple[int, int]]
+    ) -> List[ManufacturingOrder]:
+        """
+        Crea varias órdenes de fabricación con una única escritura en bloque
+        para las órdenes y otra para sus eventos de creación.
         
-        # Crear orden (repositorio asignará ID real)
-        order = ManufacturingOrder(
-            id=0,  # Será asignado por el repositorio
-            creation_date=datetime.now().isoformat(),
-            product_id=product_id,
-            quantity=quantity,
-            status=ManufacturingOrderStatus.PENDING
-        )
+        Args:
+            items: Lista de tuplas (product_id, cantidad)
+            
+        Returns:
+            Lista de órdenes creadas, en el mismo orden que items
+        """
+        if not items:
+            return []
         
-        created_order = self.manufacturing_repository.add(order)
+        # Validar cada producto distinto una sola vez
+        for product_id in {product_id for product_id, _ in items}:
+            product = self.product_repository.get_by_id(product_id)
+            if not product or product.type != "finished":
+                raise ValueError("Producto no válido para fabricación")
         
-        # Registrar evento
-        event_details = {
-            "manufacturing_order_id": created_order.id,
-            "product_id": product_id,
-            "quantity": quantity
-        }
+        creation_date = datetime.now().isoformat()
         
-        event = Event(
-            id=0,  # Será asignado por el repositorio
-            type=EventType.MANUFACTURING_ORDER_CREATED,
-            event_date=datetime.now().isoformat(),
-            details=json.dumps(event_details)
-        )
-        self.event_repository.add(event)
+        # Crear órdenes (repositorio asignará IDs reales)
+        orders = [
+            ManufacturingOrder(
+                id=0,  # Será asignado por el repositorio
+                creation_date=creation_date,
+                product_id=product_id,
+                quantity=quantity,
+                status=ManufacturingOrderStatus.PENDING
+            )
+            for product_id, quantity in items
+        ]
         
-        return created_order
+        created_orders = self.manufacturing_repository.add_many(orders)
+        
+        # Registrar eventos
+        events = [
+            Event(
+                id=0,  # Será asignado por el repositorio
+                type=EventType.MANUFACTURING_ORDER_CREATED,
+                event_date=creation_date,
+                details=json.dumps({
+                    "manufacturing_order_id": order.id,
+                    "product_id": order.product_id,
+                    "quantity": order.quantity
+                })
+            )
+            for order in created_orders
+        ]
+        self.event_repository.add_many(events)
+        
+        for order in created_orders:
+            self._notify_order_change(order)
+        
+        return created_orders
     
     def release_order_to_production(self, order_id: int) -> ManufacturingOrder:
         """
         Libera una orden a producción si hay materiales disponibles.
         Esto consumirá los materiales del inventario.
+        
+        Con registro de reservas, el material reservado para otros destinos no
+        cuenta como disponible y la reserva propia de la orden, si existe, se
+        convierte en consumo.
         """
         order = self.manufacturing_repository.get_by_id(order_id)
         if not order or order.status != ManufacturingOrderStatus.PENDING:
@@ -215,20 +653,22 @@ class ManufacturingService:
             order.product_id, order.quantity
         )
         
-        # Verificar disponibilidad de todos los materiales
-        for material_id, quantity_needed in materials_needed.items():
-            if not self.inventory_service.check_stock_availability(material_id, quantity_needed):
-                product = self.product_repository.get_by_id(material_id)
-                product_name = product.name if product else f"ID: {material_id}"
+        reference = None
+        if self.reservation_service is not None:
+            reference = self.reservation_service.order_reference(order.id)
+            shortage = self.reservation_service.find_shortage(materials_needed, reference)
+            if shortage is not None:
+                product = self.product_repository.get_by_id(shortage)
+                product_name = product.name if product else f"ID: {shortage}"
                 raise ValueError(f"Stock insuficiente de {product_name}")
         
-        # Consumir materiales
-        for material_id, quantity_needed in materials_needed.items():
-            self.inventory_service.update_stock(
-                material_id, 
-                -quantity_needed, 
-                f"Consumido para orden de fabricación #{order.id}"
-            )
+        # Verificar y consumir todos los materiales en una sola operación atómica
+        self.inventory_service.consume_many(
+            materials_needed,
+            f"Consumido para orden de fabricación #{order.id}"
+        )
+        if reference is not None:
+            self.reservation_service.release(reference)
         
         # Actualizar estado de la orden
         order.status = ManufacturingOrderStatus.IN_PRODUCTION
@@ -250,6 +690,8 @@ class ManufacturingService:
         )
         self.event_repository.add(event)
         
+        self._notify_order_change(updated_order)
+        
         return updated_order
     
     def complete_order(self, order_id: int) -> ManufacturingOrder:
@@ -291,6 +733,8 @@ class ManufacturingService:
         )
         self.event_repository.add(event)
         
+        self._notify_order_change(updated_order)
+        
         return updated_order
     
     def get_pending_orders(self) -> List[ManufacturingOrder]:
@@ -300,6 +744,164 @@ class ManufacturingService:
     def get_in_production_orders(self) -> List[ManufacturingOrder]:
         """Obtiene todas las órdenes en producción."""
         return self.manufacturing_repository.get_by_status(ManufacturingOrderStatus.IN_PRODUCTION.value)
+    
+    def get_completed_orders(self) -> List[ManufacturingOrder]:
+        """Obtiene todas las órdenes completadas."""
+        return self.manufacturing_repository.get_by_status(ManufacturingOrderStatus.COMPLETED.value)
+
+
+class SupplierSelectionService:
+    """
+    Índice de proveedores por producto para elegirlos sin consultar el repositorio.
+    
+    Para cada producto guarda sus proveedores ordenados por plazo de entrega
+    y, sobre ese orden, el mejor proveedor de cada prefijo según cada
+    criterio (coste, plazo o puntuación ponderada). El mejor proveedor que
+    llega a tiempo se obtiene así con una búsqueda binaria del plazo. El
+    índice se construye al crear el servicio y se mantiene con los avisos del
+    repositorio de proveedores.
+    """
+    
+    def __init__(
+        self,
+        supplier_repository: SupplierRepository,
+        config: Optional[SupplierSelectionConfig] = None
+    ):
+        self.supplier_repository = supplier_repository
+        self.config = config or SupplierSelectionConfig()
+        
+        self._suppliers: Dict[int, Supplier] = {}
+        self._by_product: Dict[int, Dict[int, Supplier]] = {}
+        # Por producto: plazos en orden creciente y, por criterio, el ranking
+        # completo y el mejor proveedor de cada prefijo del orden por plazo
+        self._lead_times: Dict[int, List[int]] = {}
+        self._rankings: Dict[int, Dict[SupplierCriterion, List[Supplier]]] = {}
+        self._prefix_best: Dict[int, Dict[SupplierCriterion, List[Supplier]]] = {}
+        
+        for supplier in supplier_repository.get_all():
+            self._suppliers[supplier.id] = supplier
+            self._by_product.setdefault(supplier.product_id, {})[supplier.id] = supplier
+        for product_id in self._by_product:
+            self._index_product(product_id)
+        supplier_repository.add_change_listener(self.supplier_changed)
+    
+    def supplier_changed(self, supplier_id: int) -> None:
+        """
+        Vuelve a indexar los productos afectados por el alta, el cambio o la
+        baja de un proveedor. Se llama automáticamente desde el repositorio.
+        """
+        previous = self._suppliers.pop(supplier_id, None)
+        current = self.supplier_repository.get_by_id(supplier_id)
+        affected = set()
+        if previous is not None:
+            del self._by_product[previous.product_id][supplier_id]
+            affected.add(previous.product_id)
+        if current is not None:
+            self._suppliers[supplier_id] = current
+            self._by_product.setdefault(current.product_id, {})[supplier_id] = current
+            affected.add(current.product_id)
+        for product_id in affected:
+            self._index_product(product_id)
+    
+    def _index_product(self, product_id: int) -> None:
+        suppliers = list(self._by_product.get(product_id, {}).values())
+        if not suppliers:
+            self._by_product.pop(product_id, None)
+            self._lead_times.pop(product_id, None)
+            self._rankings.pop(product_id, None)
+            self._prefix_best.pop(product_id, None)
+            return
+        
+        keys = self._sort_keys(suppliers)
+        by_lead_time = sorted(suppliers, key=keys[SupplierCriterion.LEAD_TIME])
+        self._lead_times[product_id] = [supplier.lead_time_days for supplier in by_lead_time]
+        self._rankings[product_id] = {
+            criterion: sorted(suppliers, key=key) for criterion, key in keys.items()
+        }
+        
+        prefix_best: Dict[SupplierCriterion, List[Supplier]] = {}
+        for criterion, key in keys.items():
+            best = []
+            for supplier in by_lead_time:
+                best.append(supplier if not best or key(supplier) < key(best[-1]) else best[-1])
+            prefix_best[criterion] = best
+        self._prefix_best[product_id] = prefix_best
+    
+    def _sort_keys(self, suppliers: List[Supplier]) -> Dict[SupplierCriterion, Callable[[Supplier], tuple]]:
+        """
+        Claves de ordenación de cada criterio; los empates se deshacen por el
+        otro atributo y por ID. La puntuación ponderada normaliza coste y plazo
+        por el máximo entre los proveedores del producto.
+        """
+        max_cost = max(supplier.unit_cost for supplier in suppliers) or 1.0
+        max_lead_time = max(supplier.lead_time_days for supplier in suppliers) or 1
+        
+        def score(supplier: Supplier) -> float:
+            return (
+                self.config.cost_weight * supplier.unit_cost / max_cost
+                + self.config.lead_time_weight * supplier.lead_time_days / max_lead_time
+            )
+        
+        return {
+            SupplierCriterion.COST: lambda supplier: (
+                supplier.unit_cost, supplier.lead_time_days, supplier.id
+            ),
+            SupplierCriterion.LEAD_TIME: lambda supplier: (
+                supplier.lead_time_days, supplier.unit_cost, supplier.id
+            ),
+            SupplierCriterion.WEIGHTED: lambda supplier: (
+                score(supplier), supplier.unit_cost, supplier.lead_time_days, supplier.id
+            )
+        }
+    
+    def get_supplier(self, supplier_id: int) -> Optional[Supplier]:
+        """Obtiene un proveedor por su ID."""
+        return self._suppliers.get(supplier_id)
+    
+    def has_suppliers(self, product_id: int) -> bool:
+        """Indica si algún proveedor suministra el producto."""
+        return product_id in self._by_product
+    
+    def get_suppliers(
+        self, product_id: int, criterion: Optional[SupplierCriterion] = None
+    ) -> List[Supplier]:
+        """
+        Proveedores de un producto, en orden de ID o, si se indica un
+        criterio, del mejor al peor según él.
+        """
+        if criterion is not None:
+            return list(self._rankings.get(product_id, {}).get(criterion, []))
+        return sorted(self._by_product.get(product_id, {}).values(), key=lambda supplier: supplier.id)
+    
+    def best(
+        self,
+        product_id: int,
+        days_until_needed: Optional[int] = None,
+        criterion: Optional[SupplierCriterion] = None
+    ) -> Optional[Supplier]:
+        """
+        Mejor proveedor de un producto en O(log n).
+        
+        Args:
+            product_id: ID del producto
+            days_until_needed: Días hasta la fecha en que se necesita el
+                material; si se indica, solo se eligen proveedores que lleguen
+                a tiempo y, si no hay ninguno, el más rápido
+            criterion: Criterio de elección (por defecto, el configurado)
+        
+        Returns:
+            Proveedor elegido, o None si nadie suministra el producto
+        """
+        if product_id not in self._by_product:
+            return None
+        criterion = criterion or self.config.criterion
+        if days_until_needed is None:
+            return self._rankings[product_id][criterion][0]
+        
+        on_time = bisect_right(self._lead_times[product_id], days_until_needed)
+        if on_time == 0:
+            return self._prefix_best[product_id][SupplierCriterion.LEAD_TIME][0]
+        return self._prefix_best[product_id][criterion][on_time - 1]
 
 
 class PurchasingService:
@@ -311,62 +913,113 @@ class PurchasingService:
         supplier_repository: SupplierRepository,
         inventory_service: InventoryService,
         event_repository: EventRepository,
-        product_repository: ProductRepository
+        product_repository: ProductRepository,
+        supplier_selection: Optional[SupplierSelectionService] = None
     ):
         self.purchase_repository = purchase_repository
         self.supplier_repository = supplier_repository
         self.inventory_service = inventory_service
         self.event_repository = event_repository
         self.product_repository = product_repository
+        self.supplier_selection = supplier_selection
+        
+        # Funciones notificadas al crear o recibir una orden de compra
+        self.order_listeners: List[Callable[[PurchaseOrder], None]] = []
+    
+    def add_order_listener(self, listener: Callable[[PurchaseOrder], None]) -> None:
+        """
+        Registra una función que se llamará con la orden tras crearla o
+        cambiar su estado.
+        """
+        self.order_listeners.append(listener)
+    
+    def _notify_order_change(self, order: PurchaseOrder) -> None:
+        """Notifica la creación o el cambio de estado de una orden de compra."""
+        for listener in self.order_listeners:
+            listener(order)
     
     def create_purchase_order(
-        self, supplier_id: int, product_id: int, quantity: int
+        self, supplier_id: int, product_id: int, quantity: int,
+        issue_date: Optional[datetime] = None
     ) -> PurchaseOrder:
-        """Crea una nueva orden de compra."""
-        supplier = self.supplier_repository.get_by_id(supplier_id)
-        if not supplier or supplier.product_id != product_id:
-            raise ValueError("Proveedor no válido para este producto")
+        """Crea una nueva orden de compra (por defecto, con la fecha actual como emisión)."""
+        return self.create_purchase_orders([(supplier_id, product_id, quantity)], issue_date)[0]
+    
+    def create_purchase_orders(
+        self, items: List[Tuple[int, int, int]], issue_date: Optional[datetime] = None
+    ) -> List[PurchaseOrder]:
+        """
+        Crea varias órdenes de compra con una única escritura en bloque para
+        las órdenes y otra para sus eventos de creación.
         
-        product = self.product_repository.get_by_id(product_id)
-        if not product or product.type != "raw":
-            raise ValueError("Solo se pueden comprar materias primas")
+        Args:
+            items: Lista de tuplas (supplier_id, product_id, cantidad)
+            issue_date: Fecha de emisión, de la que parte el plazo de entrega
+                (por defecto, la actual)
+            
+        Returns:
+            Lista de órdenes creadas, en el mismo orden que items
+        """
+        if not items:
+            return []
         
-        issue_date = datetime.now()
-        estimated_delivery = issue_date + timedelta(days=supplier.lead_time_days)
+        # Validar cada par proveedor-producto distinto una sola vez
+        suppliers: Dict[int, Supplier] = {}
+        for supplier_id, product_id in {(supplier_id, product_id) for supplier_id, product_id, _ in items}:
+            supplier = self._get_supplier(supplier_id)
+            if not supplier or supplier.product_id != product_id:
+                raise ValueError("Proveedor no válido para este producto")
+            
+            product = self.product_repository.get_by_id(product_id)
+            if not product or product.type != "raw":
+                raise ValueError("Solo se pueden comprar materias primas")
+            suppliers[supplier_id] = supplier
         
-        # Crear orden (repositorio asignará ID real)
-        order = PurchaseOrder(
-            id=0,  # Será asignado por el repositorio
-            supplier_id=supplier_id,
-            product_id=product_id,
-            quantity=quantity,
-            issue_date=issue_date.isoformat(),
-            estimated_delivery_date=estimated_delivery.isoformat(),
-            status=PurchaseOrderStatus.ORDERED
-        )
+        issue_date = issue_date or datetime.now()
         
-        created_order = self.purchase_repository.add(order)
+        # Crear órdenes (repositorio asignará IDs reales)
+        orders = [
+            PurchaseOrder(
+                id=0,  # Será asignado por el repositorio
+                supplier_id=supplier_id,
+                product_id=product_id,
+                quantity=quantity,
+                issue_date=issue_date.isoformat(),
+                estimated_delivery_date=(
+                    issue_date + timedelta(days=suppliers[supplier_id].lead_time_days)
+                ).isoformat(),
+                status=PurchaseOrderStatus.ORDERED
+            )
+            for supplier_id, product_id, quantity in items
+        ]
         
-        # Registrar evento
-        event_details = {
-            "purchase_order_id": created_order.id,
-            "supplier_id": supplier_id,
-            "product_id": product_id,
-            "quantity": quantity,
-            "estimated_delivery": estimated_delivery.isoformat(),
-            "unit_cost": supplier.unit_cost,
-            "total_cost": supplier.unit_cost * quantity
-        }
+        created_orders = self.purchase_repository.add_many(orders)
         
-        event = Event(
-            id=0,  # Será asignado por el repositorio
-            type=EventType.PURCHASE_ORDER_CREATED,
-            event_date=datetime.now().isoformat(),
-            details=json.dumps(event_details)
-        )
-        self.event_repository.add(event)
+        # Registrar eventos
+        event_date = datetime.now().isoformat()
+        events = [
+            Event(
+                id=0,  # Será asignado por el repositorio
+                type=EventType.PURCHASE_ORDER_CREATED,
+                event_date=event_date,
+                details=json.dumps({
+                    "purchase_order_id": order.id,
+                    "supplier_id": order.supplier_id,
+                    "product_id": order.product_id,
+                    "quantity": order.quantity,
+                    "estimated_delivery": order.estimated_delivery_date,
+                    "unit_cost": suppliers[order.supplier_id].unit_cost,
+                    "total_cost": suppliers[order.supplier_id].unit_cost * order.quantity
+                })
+            )
+            for order in created_orders
+        ]
+        self.event_repository.add_many(events)
         
-        return created_order
+        for order in created_orders:
+            self._notify_order_change(order)
+        
+        return created_orders
     
     def receive_purchase_order(self, order_id: int) -> PurchaseOrder:
         """
@@ -405,10 +1058,31 @@ class PurchasingService:
         )
         self.event_repository.add(event)
         
+        self._notify_order_change(updated_order)
+        
         return updated_order
     
+    def get_order_cost(self, order: PurchaseOrder) -> float:
+        """Calcula el coste total de una orden de compra según su proveedor."""
+        supplier = self._get_supplier(order.supplier_id)
+        return supplier.unit_cost * order.quantity if supplier else 0.0
+    
+    def _get_supplier(self, supplier_id: int) -> Optional[Supplier]:
+        """Obtiene un proveedor del índice de selección, o del repositorio si no hay."""
+        if self.supplier_selection is not None:
+            return self.supplier_selection.get_supplier(supplier_id)
+        return self.supplier_repository.get_by_id(supplier_id)
+    
+    def get_total_spend(self) -> float:
+        """Calcula el gasto total en todas las órdenes de compra emitidas."""
+        return sum(
+            (self.get_order_cost(order) for order in self.purchase_repository.get_all()), 0.0
+        )
+    
     def get_suppliers_for_product(self, product_id: int) -> List[Supplier]:
         """Obtiene todos los proveedores que suministran un producto específico."""
+        if self.supplier_selection is not None:
+            return self.supplier_selection.get_suppliers(product_id)
         return self.supplier_repository.get_by_product(product_id)
     
     def get_pending_orders(self) -> List[PurchaseOrder]:
@@ -0,0 +1,37 @@
+import os
+from pathlib import Path
+from typing import Optional
+
+from application.checkpoint import CheckpointStore, SimulationCheckpoint, CHECKPOINT_VERSION
+
+
+class FileCheckpointStore(CheckpointStore):
+    """Guarda los checkpoints del simulador en un archivo JSON compacto."""
+
+    def __init__(self, file_path: str):
+        """
+        Args:
+            file_path: Ruta del archivo de checkpoint
+        """
+        self.file_path = Path(file_path)
+
+    def save(self, checkpoint: SimulationCheckpoint) -> None:
+        """
+        Guarda el checkpoint de forma atómica: se escribe en un archivo
+        temporal que luego sustituye al anterior.
+        """
+        temp_path = self.file_path.with_suffix(self.file_path.suffix + ".tmp")
+        temp_path.write_text(checkpoint.model_dump_json(), encoding="utf-8")
+        os.replace(temp_path, self.file_path)
+
+    def load(self) -> Optional[SimulationCheckpoint]:
+        """Recupera el checkpoint guardado, si existe y es de la versión actual."""
+        if not self.file_path.exists():
+            return None
+
+        checkpoint = SimulationCheckpoint.model_validate_json(
+            self.file_path.read_text(encoding="utf-8")
+        )
+        if checkpoint.version != CHECKPOINT_VERSION:
+            return None
+        return checkpoint
@@ -1,5 +1,5 @@
 import json
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable
 from pydantic import BaseModel
 from datetime import datetime, date
 import os
@@ -14,9 +14,12 @@ from domain.models import (
 from domain.repositories import (
     ProductRepository, BOMRepository, SupplierRepository, 
     StockRepository, ManufacturingOrderRepository, 
-    PurchaseOrderRepository, EventRepository
+    PurchaseOrderRepository, EventRepository, KPIRepository,
+    StockReservationRepository
 )
 
+from infrastructure.database import Database
+
 class DataExporter:
     """Clase para exportar datos del simulador a JSON."""
     
@@ -106,7 +109,8 @@ class DataImporter:
         stock_repository: StockRepository,
         manufacturing_repository: ManufacturingOrderRepository,
         purchase_repository: PurchaseOrderRepository,
-        event_repository: EventRepository
+        event_repository: EventRepository,
+        on_imported: Optional[Callable[[], None]] = None
     ):
         self.product_repository = product_repository
         self.bom_repository = bom_repository
@@ -115,6 +119,10 @@ class DataImporter:
         self.manufacturing_repository = manufacturing_repository
         self.purchase_repository = purchase_repository
         self.event_repository = event_repository
+        # Se invoca tras cada importación: los datos se escriben directamente en
+        # los repositorios, así que el estado mantenido en memoria (reservas,
+        # vector de stock, índice de viabilidad, simulador) debe reconstruirse
+        self.on_imported = on_imported
     
     def import_all_data(self, file_path: str) -> None:
         """
@@ -126,6 +134,19 @@ class DataImporter:
         with open(file_path, 'r', encoding='utf-8') as f:
             data = json.load(f)
         
+        self._import_data(data)
+    
+    def import_from_json_string(self, json_string: str) -> None:
+        """
+        Importa datos desde una cadena JSON.
+        
+        Args:
+            json_string: Cadena JSON con los datos a importar
+        """
+        self._import_data(json.loads(json_string))
+    
+    def _import_data(self, data: Dict[str, Any]) -> None:
+        """Añade a los repositorios los datos de un volcado ya decodificado."""
         # Importar productos primero (dependencia básica)
         for product_data in data.get("products", []):
             product = Product(**product_data)
@@ -160,20 +181,142 @@ class DataImporter:
         for event_data in data.get("events", []):
             event = Event(**event_data)
             self.event_repository.add(event)
+        
+        if self.on_imported is not None:
+            self.on_imported()
+
+
+class DatabaseWriter:
+    """
+    Clase para volcar el contenido de un conjunto de repositorios
+    (por ejemplo, los repositorios en memoria de una simulación sin interfaz)
+    a una base de datos SQLite, conservando los IDs originales.
+    """
     
-    def import_from_json_string(self, json_string: str) -> None:
+    def __init__(
+        self,
+        product_repository: ProductRepository,
+        bom_repository: BOMRepository,
+        supplier_repository: SupplierRepository,
+        stock_repository: StockRepository,
+        manufacturing_repository: ManufacturingOrderRepository,
+        purchase_repository: PurchaseOrderRepository,
+        event_repository: EventRepository,
+        kpi_repository: Optional[KPIRepository] = None,
+        reservation_repository: Optional[StockReservationRepository] = None
+    ):
+        self.product_repository = product_repository
+        self.bom_repository = bom_repository
+        self.supplier_repository = supplier_repository
+        self.stock_repository = stock_repository
+        self.manufacturing_repository = manufacturing_repository
+        self.purchase_repository = purchase_repository
+        self.event_repository = event_repository
+        self.kpi_repository = kpi_repository
+        self.reservation_repository = reservation_repository
+    
+    def write(self, database: Database) -> None:
         """
-        Importa datos desde una cadena JSON.
+        Escribe todos los datos en la base de datos en una única transacción.
+        Las tablas de destino se vacían antes de escribir.
         
         Args:
-            json_string: Cadena JSON con los datos a importar
+            database: Base de datos de destino
         """
-        data = json.loads(json_string)
-        
-        # Importar productos primero (dependencia básica)
-        for product_data in data.get("products", []):
-            product = Product(**product_data)
-            self.product_repository.add(product)
+        database.initialize_db()
         
-        # Continuar con el resto de los datos como en import_all_data
-        # ...
+        with database.transaction():
+            for table in (
+                "stock_reservations", "kpi_daily", "events", "purchase_orders", "manufacturing_orders",
+                "stock_current", "suppliers", "bom", "products"
+            ):
+                database.execute(f"DELETE FROM {table}")
+            
+            database.executemany(
+                "INSERT INTO products (id, name, type) VALUES (?, ?, ?)",
+                [(p.id, p.name, p.type) for p in self.product_repository.get_all()]
+            )
+            database.executemany(
+                "INSERT INTO bom (finished_product_id, material_id, quantity) VALUES (?, ?, ?)",
+                [
+                    (b.finished_product_id, b.material_id, b.quantity)
+                    for b in self.bom_repository.get_all()
+                ]
+            )
+            database.executemany(
+                """
+                INSERT INTO suppliers (id, name, product_id, unit_cost, lead_time_days) 
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                [
+                    (s.id, s.name, s.product_id, s.unit_cost, s.lead_time_days)
+                    for s in self.supplier_repository.get_all()
+                ]
+            )
+            database.executemany(
+                "INSERT INTO stock_current (product_id, quantity) VALUES (?, ?)",
+                [(s.product_id, s.quantity) for s in self.stock_repository.get_all()]
+            )
+            database.executemany(
+                """
+                INSERT INTO manufacturing_orders 
+                (id, creation_date, product_id, quantity, status) 
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                [
+                    (o.id, o.creation_date, o.product_id, o.quantity, o.status)
+                    for o in self.manufacturing_repository.get_all()
+                ]
+            )
+            database.executemany(
+                """
+                INSERT INTO purchase_orders 
+                (id, supplier_id, product_id, quantity, issue_date, estimated_delivery_date, status) 
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        o.id, o.supplier_id, o.product_id, o.quantity,
+                        o.issue_date, o.estimated_delivery_date, o.status
+                    )
+                    for o in self.purchase_repository.get_all()
+                ]
+            )
+            database.executemany(
+                "INSERT INTO events (id, type, event_date, details) VALUES (?, ?, ?, ?)",
+                [
+                    (e.id, e.type, e.event_date, e.details)
+                    for e in self.event_repository.get_all()
+                ]
+            )
+            if self.kpi_repository is not None:
+                database.executemany(
+                    """
+                    INSERT INTO kpi_daily 
+                    (id, date, days, orders_created, orders_completed, units_completed,
+                     backlog_orders, backlog_units, backlog_avg_age_days,
+                     material_spend, inventory_units, stockout_materials) 
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    [
+                        (
+                            k.id, k.date, k.days, k.orders_created, k.orders_completed,
+                            k.units_completed, k.backlog_orders, k.backlog_units,
+                            k.backlog_avg_age_days, k.material_spend,
+                            k.inventory_units, k.stockout_materials
+                        )
+                        for k in self.kpi_repository.get_all()
+                    ]
+                )
+            if self.reservation_repository is not None:
+                database.executemany(
+                    """
+                    INSERT INTO stock_reservations 
+                    (id, reference, product_id, quantity, created_date) 
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    [
+                        (r.id, r.reference, r.product_id, r.quantity, r.created_date)
+                        for r in self.reservation_repository.get_all()
+                    ]
+                )
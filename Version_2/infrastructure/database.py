@@ -1,5 +1,6 @@
 import sqlite3
-from typing import Dict, List, Any, Optional, Tuple
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Any, Optional, Tuple, Iterator, ContextManager
 from pathlib import Path
 import os
 import json
@@ -16,6 +17,11 @@ class Database:
         """
         self.db_path = db_path
         self.connection = None
+        # Profundidad de transacciones anidadas abiertas con transaction()
+        self._transaction_depth = 0
+        # Contadores acumulados de sentencias ejecutadas y filas escritas
+        self.statements = 0
+        self.rows_written = 0
         
     def connect(self) -> None:
         """Establece la conexión a la base de datos."""
@@ -29,6 +35,39 @@ class Database:
             self.connection.close()
             self.connection = None
     
+    def get_stats(self) -> Tuple[int, int]:
+        """
+        Obtiene los contadores acumulados de la conexión.
+        
+        Returns:
+            Tupla (sentencias ejecutadas, filas escritas)
+        """
+        return self.statements, self.rows_written
+    
+    def _count(self, cursor: sqlite3.Cursor, statements: int) -> None:
+        """Actualiza los contadores con el resultado de una ejecución."""
+        self.statements += statements
+        # rowcount es -1 en las consultas que no escriben
+        if cursor.rowcount > 0:
+            self.rows_written += cursor.rowcount
+    
+    def fork(self) -> "Database":
+        """
+        Crea una copia independiente de la base de datos en memoria mediante
+        la API de copia en línea de SQLite. La copia es página a página, por
+        lo que tarda milisegundos y no bloquea la base de datos original.
+        
+        Returns:
+            Nueva base de datos en memoria con el mismo contenido
+        """
+        if not self.connection:
+            self.connect()
+        
+        fork = Database(":memory:")
+        fork.connect()
+        self.connection.backup(fork.connection)
+        return fork
+    
     def execute(self, query: str, params: Tuple = ()) -> sqlite3.Cursor:
         """
         Ejecuta una consulta SQL sin retornar resultados.
@@ -45,9 +84,107 @@ class Database:
         
         cursor = self.connection.cursor()
         cursor.execute(query, params)
-        self.connection.commit()
+        self._count(cursor, 1)
+        # Dentro de una transacción explícita el commit se hace al cerrarla
+        if not self._transaction_depth:
+            self.connection.commit()
+        return cursor
+    
+    def executemany(self, query: str, params_seq: List[Tuple]) -> sqlite3.Cursor:
+        """
+        Ejecuta una misma sentencia SQL para cada conjunto de parámetros.
+        
+        Args:
+            query: Consulta SQL a ejecutar
+            params_seq: Secuencia de tuplas de parámetros
+            
+        Returns:
+            Cursor de SQLite
+        """
+        if not self.connection:
+            self.connect()
+        
+        cursor = self.connection.cursor()
+        cursor.executemany(query, params_seq)
+        self._count(cursor, len(params_seq))
+        if not self._transaction_depth:
+            self.connection.commit()
         return cursor
     
+    def insert_many(self, query: str, params_seq: List[Tuple]) -> List[int]:
+        """
+        Inserta varias filas con una sola sentencia preparada y devuelve sus IDs.
+        
+        Todas las filas se insertan dentro de la misma transacción, por lo que
+        los IDs asignados por AUTOINCREMENT son consecutivos.
+        
+        Args:
+            query: Sentencia INSERT a ejecutar
+            params_seq: Secuencia de tuplas de parámetros
+            
+        Returns:
+            Lista de IDs asignados, en el mismo orden que los parámetros
+        """
+        params_seq = list(params_seq)
+        if not params_seq:
+            return []
+        
+        with self.transaction():
+            cursor = self.connection.cursor()
+            cursor.executemany(query, params_seq)
+            self._count(cursor, len(params_seq))
+            last_id = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+        
+        return list(range(last_id - len(params_seq) + 1, last_id + 1))
+    
+    @contextmanager
+    def transaction(self, commit_phase: Optional[ContextManager] = None) -> Iterator[None]:
+        """
+        Agrupa todas las sentencias ejecutadas dentro del bloque en una única
+        transacción, con un solo commit al final.
+        
+        Las transacciones anidadas se implementan con SAVEPOINT, de modo que
+        un error dentro de un bloque interno solo deshace ese bloque.
+        
+        Args:
+            commit_phase: Contexto que envuelve solo el commit final, p. ej.
+                una fase del perfilador para medirlo
+        
+        Ejemplo:
+            with db.transaction():
+                db.execute(...)
+                db.execute(...)
+        """
+        if not self.connection:
+            self.connect()
+        
+        depth = self._transaction_depth
+        savepoint = f"sp_{depth}"
+        
+        if depth == 0:
+            self.connection.execute("BEGIN")
+        else:
+            self.connection.execute(f"SAVEPOINT {savepoint}")
+        
+        self._transaction_depth += 1
+        try:
+            yield
+        except BaseException:
+            self._transaction_depth -= 1
+            if depth == 0:
+                self.connection.rollback()
+            else:
+                self.connection.execute(f"ROLLBACK TO {savepoint}")
+                self.connection.execute(f"RELEASE {savepoint}")
+            raise
+        else:
+            self._transaction_depth -= 1
+            if depth == 0:
+                with commit_phase or nullcontext():
+                    self.connection.commit()
+            else:
+                self.connection.execute(f"RELEASE {savepoint}")
+    
     def execute_and_fetchall(self, query: str, params: Tuple = ()) -> List[Dict[str, Any]]:
         """
         Ejecuta una consulta SQL y retorna todos los resultados.
@@ -169,6 +306,40 @@ class Database:
         )
         ''')
         
+        # Tabla de resúmenes diarios de indicadores
+        self.execute('''
+        CREATE TABLE IF NOT EXISTS kpi_daily (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            days INTEGER NOT NULL,
+            orders_created INTEGER NOT NULL,
+            orders_completed INTEGER NOT NULL,
+            units_completed INTEGER NOT NULL,
+            backlog_orders INTEGER NOT NULL,
+            backlog_units INTEGER NOT NULL,
+            backlog_avg_age_days REAL NOT NULL,
+            material_spend REAL NOT NULL,
+            inventory_units INTEGER NOT NULL,
+            stockout_materials INTEGER NOT NULL
+        )
+        ''')
+        
+        # Tabla de reservas de stock (material asignado aún no consumido)
+        self.execute('''
+        CREATE TABLE IF NOT EXISTS stock_reservations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            reference TEXT NOT NULL,
+            product_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            created_date TEXT NOT NULL,
+            FOREIGN KEY (product_id) REFERENCES products (id)
+        )
+        ''')
+        self.execute(
+            "CREATE INDEX IF NOT EXISTS idx_stock_reservations_reference "
+            "ON stock_reservations (reference)"
+        )
+        
         # Tabla de configuración de simulación
         self.execute('''
         CREATE TABLE IF NOT EXISTS simulation_config (
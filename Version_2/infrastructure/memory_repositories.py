@@ -0,0 +1,536 @@
+from typing import List, Optional, Dict, Any
+from collections import defaultdict
+
+from domain.models import (
+    Product, BOM, Supplier, StockCurrent,
+    ManufacturingOrder, PurchaseOrder, Event, KPIDailyRollup, StockReservation
+)
+from domain.repositories import (
+    ProductRepository, BOMRepository, SupplierRepository,
+    StockRepository, ManufacturingOrderRepository,
+    PurchaseOrderRepository, EventRepository, KPIRepository,
+    StockReservationRepository
+)
+
+
+def _status_key(status: Any) -> str:
+    """Normaliza un estado (enum o cadena) a su valor de texto."""
+    return getattr(status, "value", status)
+
+
+class InMemoryProductRepository(ProductRepository):
+    """Implementación en memoria del repositorio de productos."""
+
+    def __init__(self):
+        self._products: Dict[int, Product] = {}
+        self._next_id = 1
+
+    def get_by_id(self, id: int) -> Optional[Product]:
+        """Obtiene un producto por su ID."""
+        product = self._products.get(id)
+        return product.model_copy() if product else None
+
+    def get_all(self) -> List[Product]:
+        """Obtiene todos los productos."""
+        return [product.model_copy() for product in self._products.values()]
+
+    def add(self, entity: Product) -> Product:
+        """Añade un nuevo producto."""
+        entity.id = self._next_id
+        self._next_id += 1
+        self._products[entity.id] = entity.model_copy()
+        return entity
+
+    def update(self, entity: Product) -> Product:
+        """Actualiza un producto existente."""
+        if entity.id in self._products:
+            self._products[entity.id] = entity.model_copy()
+        return entity
+
+    def delete(self, id: int) -> bool:
+        """Elimina un producto por su ID."""
+        return self._products.pop(id, None) is not None
+
+    def get_by_type(self, type: str) -> List[Product]:
+        """Obtiene productos por su tipo (raw/finished)."""
+        return [
+            product.model_copy()
+            for product in self._products.values()
+            if product.type == type
+        ]
+
+
+class InMemoryBOMRepository(BOMRepository):
+    """Implementación en memoria del repositorio de BOM."""
+
+    def __init__(self):
+        super().__init__()
+        # Las filas se indexan por un ID interno, igual que en la tabla SQLite
+        self._rows: Dict[int, BOM] = {}
+        self._by_product: Dict[int, List[int]] = defaultdict(list)
+        self._next_id = 1
+
+    def get_by_id(self, id: int) -> Optional[BOM]:
+        """Obtiene un registro BOM por su ID."""
+        row = self._rows.get(id)
+        return row.model_copy() if row else None
+
+    def get_all(self) -> List[BOM]:
+        """Obtiene todos los registros BOM."""
+        return [row.model_copy() for row in self._rows.values()]
+
+    def add(self, entity: BOM) -> BOM:
+        """Añade un nuevo registro BOM."""
+        row_id = self._next_id
+        self._next_id += 1
+        self._rows[row_id] = entity.model_copy()
+        self._by_product[entity.finished_product_id].append(row_id)
+        self._notify_change(entity.finished_product_id)
+        return entity
+
+    def update(self, entity: BOM) -> BOM:
+        """Actualiza un registro BOM existente."""
+        for row_id in self._by_product.get(entity.finished_product_id, []):
+            if self._rows[row_id].material_id == entity.material_id:
+                self._rows[row_id] = entity.model_copy()
+        self._notify_change(entity.finished_product_id)
+        return entity
+
+    def delete(self, id: int) -> bool:
+        """Elimina un registro BOM por su ID."""
+        row = self._rows.pop(id, None)
+        if row is None:
+            return False
+        self._by_product[row.finished_product_id].remove(id)
+        self._notify_change(row.finished_product_id)
+        return True
+
+    def get_by_finished_product(self, finished_product_id: int) -> List[BOM]:
+        """Obtiene materiales requeridos para un producto terminado."""
+        return [
+            self._rows[row_id].model_copy()
+            for row_id in self._by_product.get(finished_product_id, [])
+        ]
+
+
+class InMemorySupplierRepository(SupplierRepository):
+    """Implementación en memoria del repositorio de proveedores."""
+
+    def __init__(self):
+        super().__init__()
+        self._suppliers: Dict[int, Supplier] = {}
+        self._next_id = 1
+
+    def get_by_id(self, id: int) -> Optional[Supplier]:
+        """Obtiene un proveedor por su ID."""
+        supplier = self._suppliers.get(id)
+        return supplier.model_copy() if supplier else None
+
+    def get_all(self) -> List[Supplier]:
+        """Obtiene todos los proveedores."""
+        return [supplier.model_copy() for supplier in self._suppliers.values()]
+
+    def add(self, entity: Supplier) -> Supplier:
+        """Añade un nuevo proveedor."""
+        entity.id = self._next_id
+        self._next_id += 1
+        self._suppliers[entity.id] = entity.model_copy()
+        self._notify_change(entity.id)
+        return entity
+
+    def update(self, entity: Supplier) -> Supplier:
+        """Actualiza un proveedor existente."""
+        if entity.id in self._suppliers:
+            self._suppliers[entity.id] = entity.model_copy()
+            self._notify_change(entity.id)
+        return entity
+
+    def delete(self, id: int) -> bool:
+        """Elimina un proveedor por su ID."""
+        if self._suppliers.pop(id, None) is None:
+            return False
+        self._notify_change(id)
+        return True
+
+    def get_by_product(self, product_id: int) -> List[Supplier]:
+        """Obtiene proveedores que suministran un producto específico."""
+        return [
+            supplier.model_copy()
+            for supplier in self._suppliers.values()
+            if supplier.product_id == product_id
+        ]
+
+
+class InMemoryStockRepository(StockRepository):
+    """Implementación en memoria del repositorio de inventario."""
+
+    def __init__(self):
+        self._stock: Dict[int, StockCurrent] = {}
+        # ID interno de fila -> ID de producto, igual que en la tabla SQLite
+        self._row_ids: Dict[int, int] = {}
+        self._next_id = 1
+
+    def get_by_id(self, id: int) -> Optional[StockCurrent]:
+        """Obtiene un registro de inventario por su ID."""
+        product_id = self._row_ids.get(id)
+        if product_id is None:
+            return None
+        return self.get_by_product(product_id)
+
+    def get_all(self) -> List[StockCurrent]:
+        """Obtiene todos los registros de inventario."""
+        return [stock.model_copy() for stock in self._stock.values()]
+
+    def add(self, entity: StockCurrent) -> StockCurrent:
+        """Añade un nuevo registro de inventario."""
+        if entity.product_id in self._stock:
+            raise ValueError(f"Ya existe inventario para el producto {entity.product_id}")
+        self._row_ids[self._next_id] = entity.product_id
+        self._next_id += 1
+        self._stock[entity.product_id] = entity.model_copy()
+        return entity
+
+    def update(self, entity: StockCurrent) -> StockCurrent:
+        """Actualiza un registro de inventario existente."""
+        if entity.product_id in self._stock:
+            self._stock[entity.product_id] = entity.model_copy()
+        return entity
+
+    def delete(self, id: int) -> bool:
+        """Elimina un registro de inventario por su ID."""
+        product_id = self._row_ids.pop(id, None)
+        if product_id is None:
+            return False
+        del self._stock[product_id]
+        return True
+
+    def get_by_product(self, product_id: int) -> Optional[StockCurrent]:
+        """Obtiene el nivel de inventario para un producto específico."""
+        stock = self._stock.get(product_id)
+        return stock.model_copy() if stock else None
+
+    def update_quantity(self, product_id: int, quantity: int) -> StockCurrent:
+        """Actualiza la cantidad en inventario de un producto."""
+        stock = StockCurrent(product_id=product_id, quantity=quantity)
+        if product_id in self._stock:
+            self.update(stock)
+        else:
+            self.add(stock)
+        return stock
+
+    def consume_many(self, quantities: Dict[int, int]) -> Optional[Dict[int, int]]:
+        """Descuenta varias cantidades: todas o ninguna."""
+        for product_id, quantity in quantities.items():
+            stock = self._stock.get(product_id)
+            if stock is None or stock.quantity < quantity:
+                return None
+
+        result = {}
+        for product_id, quantity in quantities.items():
+            stock = self._stock[product_id]
+            stock.quantity -= quantity
+            result[product_id] = stock.quantity
+        return result
+
+
+class InMemoryManufacturingOrderRepository(ManufacturingOrderRepository):
+    """Implementación en memoria del repositorio de órdenes de fabricación."""
+
+    def __init__(self):
+        self._orders: Dict[int, ManufacturingOrder] = {}
+        # Índice por estado para que las consultas no recorran todo el histórico
+        self._by_status: Dict[str, Dict[int, ManufacturingOrder]] = defaultdict(dict)
+        self._next_id = 1
+
+    def get_by_id(self, id: int) -> Optional[ManufacturingOrder]:
+        """Obtiene una orden de fabricación por su ID."""
+        order = self._orders.get(id)
+        return order.model_copy() if order else None
+
+    def get_all(self) -> List[ManufacturingOrder]:
+        """Obtiene todas las órdenes de fabricación."""
+        return [order.model_copy() for order in self._orders.values()]
+
+    def add(self, entity: ManufacturingOrder) -> ManufacturingOrder:
+        """Añade una nueva orden de fabricación."""
+        entity.id = self._next_id
+        self._next_id += 1
+        self._store(entity)
+        return entity
+
+    def add_many(self, entities: List[ManufacturingOrder]) -> List[ManufacturingOrder]:
+        """Añade varias órdenes de fabricación."""
+        for entity in entities:
+            self.add(entity)
+        return entities
+
+    def update(self, entity: ManufacturingOrder) -> ManufacturingOrder:
+        """Actualiza una orden de fabricación existente."""
+        previous = self._orders.get(entity.id)
+        if previous:
+            del self._by_status[_status_key(previous.status)][entity.id]
+            self._store(entity)
+        return entity
+
+    def delete(self, id: int) -> bool:
+        """Elimina una orden de fabricación por su ID."""
+        order = self._orders.pop(id, None)
+        if order is None:
+            return False
+        del self._by_status[_status_key(order.status)][id]
+        return True
+
+    def get_by_status(self, status: str) -> List[ManufacturingOrder]:
+        """Obtiene órdenes de fabricación por estado."""
+        return [
+            order.model_copy()
+            for order in self._by_status.get(_status_key(status), {}).values()
+        ]
+
+    def get_by_date_range(self, start_date: str, end_date: str) -> List[ManufacturingOrder]:
+        """Obtiene órdenes de fabricación dentro de un rango de fechas."""
+        return [
+            order.model_copy()
+            for order in self._orders.values()
+            if start_date <= order.creation_date <= end_date
+        ]
+
+    def _store(self, entity: ManufacturingOrder) -> None:
+        """Guarda una copia de la orden y la indexa por estado."""
+        stored = entity.model_copy()
+        self._orders[stored.id] = stored
+        self._by_status[_status_key(stored.status)][stored.id] = stored
+
+
+class InMemoryPurchaseOrderRepository(PurchaseOrderRepository):
+    """Implementación en memoria del repositorio de órdenes de compra."""
+
+    def __init__(self):
+        self._orders: Dict[int, PurchaseOrder] = {}
+        # Índice por estado para que las consultas no recorran todo el histórico
+        self._by_status: Dict[str, Dict[int, PurchaseOrder]] = defaultdict(dict)
+        self._next_id = 1
+
+    def get_by_id(self, id: int) -> Optional[PurchaseOrder]:
+        """Obtiene una orden de compra por su ID."""
+        order = self._orders.get(id)
+        return order.model_copy() if order else None
+
+    def get_all(self) -> List[PurchaseOrder]:
+        """Obtiene todas las órdenes de compra."""
+        return [order.model_copy() for order in self._orders.values()]
+
+    def add(self, entity: PurchaseOrder) -> PurchaseOrder:
+        """Añade una nueva orden de compra."""
+        entity.id = self._next_id
+        self._next_id += 1
+        self._store(entity)
+        return entity
+
+    def add_many(self, entities: List[PurchaseOrder]) -> List[PurchaseOrder]:
+        """Añade varias órdenes de compra."""
+        for entity in entities:
+            self.add(entity)
+        return entities
+
+    def update(self, entity: PurchaseOrder) -> PurchaseOrder:
+        """Actualiza una orden de compra existente."""
+        previous = self._orders.get(entity.id)
+        if previous:
+            del self._by_status[_status_key(previous.status)][entity.id]
+            self._store(entity)
+        return entity
+
+    def delete(self, id: int) -> bool:
+        """Elimina una orden de compra por su ID."""
+        order = self._orders.pop(id, None)
+        if order is None:
+            return False
+        del self._by_status[_status_key(order.status)][id]
+        return True
+
+    def get_by_status(self, status: str) -> List[PurchaseOrder]:
+        """Obtiene órdenes de compra por estado."""
+        return [
+            order.model_copy()
+            for order in self._by_status.get(_status_key(status), {}).values()
+        ]
+
+    def get_by_date_range(self, start_date: str, end_date: str) -> List[PurchaseOrder]:
+        """Obtiene órdenes de compra dentro de un rango de fechas."""
+        return [
+            order.model_copy()
+            for order in self._orders.values()
+            if start_date <= order.issue_date <= end_date
+        ]
+
+    def _store(self, entity: PurchaseOrder) -> None:
+        """Guarda una copia de la orden y la indexa por estado."""
+        stored = entity.model_copy()
+        self._orders[stored.id] = stored
+        self._by_status[_status_key(stored.status)][stored.id] = stored
+
+
+class InMemoryEventRepository(EventRepository):
+    """Implementación en memoria del repositorio de eventos."""
+
+    def __init__(self):
+        self._events: Dict[int, Event] = {}
+        self._next_id = 1
+
+    def get_by_id(self, id: int) -> Optional[Event]:
+        """Obtiene un evento por su ID."""
+        event = self._events.get(id)
+        return event.model_copy() if event else None
+
+    def get_all(self) -> List[Event]:
+        """Obtiene todos los eventos."""
+        return [event.model_copy() for event in self._events.values()]
+
+    def add(self, entity: Event) -> Event:
+        """Añade un nuevo evento."""
+        entity.id = self._next_id
+        self._next_id += 1
+        self._events[entity.id] = entity.model_copy()
+        return entity
+
+    def add_many(self, entities: List[Event]) -> List[Event]:
+        """Añade varios eventos."""
+        for entity in entities:
+            self.add(entity)
+        return entities
+
+    def update(self, entity: Event) -> Event:
+        """Actualiza un evento existente."""
+        if entity.id in self._events:
+            self._events[entity.id] = entity.model_copy()
+        return entity
+
+    def delete(self, id: int) -> bool:
+        """Elimina un evento por su ID."""
+        return self._events.pop(id, None) is not None
+
+    def get_by_type(self, type: str) -> List[Event]:
+        """Obtiene eventos por tipo."""
+        type_value = _status_key(type)
+        return [
+            event.model_copy()
+            for event in self._events.values()
+            if _status_key(event.type) == type_value
+        ]
+
+    def get_by_date_range(self, start_date: str, end_date: str) -> List[Event]:
+        """Obtiene eventos dentro de un rango de fechas."""
+        return [
+            event.model_copy()
+            for event in self._events.values()
+            if start_date <= event.event_date <= end_date
+        ]
+
+
+class InMemoryStockReservationRepository(StockReservationRepository):
+    """Implementación en memoria del registro de reservas de stock."""
+
+    def __init__(self):
+        self._reservations: Dict[int, StockReservation] = {}
+        self._by_reference: Dict[str, List[int]] = defaultdict(list)
+        self._next_id = 1
+
+    def get_by_id(self, id: int) -> Optional[StockReservation]:
+        """Obtiene una línea de reserva por su ID."""
+        reservation = self._reservations.get(id)
+        return reservation.model_copy() if reservation else None
+
+    def get_all(self) -> List[StockReservation]:
+        """Obtiene todas las líneas de reserva."""
+        return [reservation.model_copy() for reservation in self._reservations.values()]
+
+    def add(self, entity: StockReservation) -> StockReservation:
+        """Añade una línea de reserva."""
+        entity.id = self._next_id
+        self._next_id += 1
+        self._reservations[entity.id] = entity.model_copy()
+        self._by_reference[entity.reference].append(entity.id)
+        return entity
+
+    def add_many(self, entities: List[StockReservation]) -> List[StockReservation]:
+        """Añade varias líneas de reserva."""
+        for entity in entities:
+            self.add(entity)
+        return entities
+
+    def update(self, entity: StockReservation) -> StockReservation:
+        """Actualiza una línea de reserva existente (sin cambiar su referencia)."""
+        if entity.id in self._reservations:
+            self._reservations[entity.id] = entity.model_copy()
+        return entity
+
+    def delete(self, id: int) -> bool:
+        """Elimina una línea de reserva por su ID."""
+        reservation = self._reservations.pop(id, None)
+        if reservation is None:
+            return False
+        self._by_reference[reservation.reference].remove(id)
+        return True
+
+    def get_by_reference(self, reference: str) -> List[StockReservation]:
+        """Obtiene las líneas de una reserva."""
+        return [
+            self._reservations[id].model_copy()
+            for id in self._by_reference.get(reference, [])
+        ]
+
+    def delete_by_reference(self, reference: str) -> int:
+        """Elimina todas las líneas de una reserva."""
+        ids = self._by_reference.pop(reference, [])
+        for id in ids:
+            del self._reservations[id]
+        return len(ids)
+
+
+class InMemoryKPIRepository(KPIRepository):
+    """Implementación en memoria del repositorio de resúmenes diarios de indicadores."""
+
+    def __init__(self):
+        self._rollups: Dict[int, KPIDailyRollup] = {}
+        self._next_id = 1
+
+    def get_by_id(self, id: int) -> Optional[KPIDailyRollup]:
+        """Obtiene un resumen diario por su ID."""
+        rollup = self._rollups.get(id)
+        return rollup.model_copy() if rollup else None
+
+    def get_all(self) -> List[KPIDailyRollup]:
+        """Obtiene todos los resúmenes diarios."""
+        return [rollup.model_copy() for rollup in self._rollups.values()]
+
+    def add(self, entity: KPIDailyRollup) -> KPIDailyRollup:
+        """Añade un nuevo resumen diario."""
+        entity.id = self._next_id
+        self._next_id += 1
+        self._rollups[entity.id] = entity.model_copy()
+        return entity
+
+    def update(self, entity: KPIDailyRollup) -> KPIDailyRollup:
+        """Actualiza un resumen diario existente."""
+        if entity.id in self._rollups:
+            self._rollups[entity.id] = entity.model_copy()
+        return entity
+
+    def delete(self, id: int) -> bool:
+        """Elimina un resumen diario por su ID."""
+        return self._rollups.pop(id, None) is not None
+
+    def get_by_date_range(self, start_date: str, end_date: str) -> List[KPIDailyRollup]:
+        """Obtiene los resúmenes diarios dentro de un rango de fechas."""
+        return [
+            rollup.model_copy()
+            for rollup in self._rollups.values()
+            if start_date <= rollup.date <= end_date
+        ]
+
+    def get_latest(self) -> Optional[KPIDailyRollup]:
+        """Obtiene el resumen del último día cerrado, o None si no hay ninguno."""
+        if not self._rollups:
+            return None
+        return self._rollups[max(self._rollups)].model_copy()
@@ -4,13 +4,14 @@ from datetime import datetime, date
 
 from domain.models import (
     Product, BOM, Supplier, StockCurrent, 
-    ManufacturingOrder, PurchaseOrder, Event,
+    ManufacturingOrder, PurchaseOrder, Event, KPIDailyRollup, StockReservation,
     ManufacturingOrderStatus, PurchaseOrderStatus, EventType
 )
 from domain.repositories import (
     ProductRepository, BOMRepository, SupplierRepository, 
     StockRepository, ManufacturingOrderRepository, 
-    PurchaseOrderRepository, EventRepository
+    PurchaseOrderRepository, EventRepository, KPIRepository,
+    StockReservationRepository
 )
 from infrastructure.database import Database
 
@@ -68,6 +69,7 @@ class SQLiteBOMRepository(BOMRepository):
     """Implementación SQLite del repositorio de BOM."""
     
     def __init__(self, database: Database):
+        super().__init__()
         self.db = database
     
     def get_by_id(self, id: int) -> Optional[BOM]:
@@ -90,6 +92,7 @@ class SQLiteBOMRepository(BOMRepository):
             "INSERT INTO bom (finished_product_id, material_id, quantity) VALUES (?, ?, ?)",
             (entity.finished_product_id, entity.material_id, entity.quantity)
         )
+        self._notify_change(entity.finished_product_id)
         # No actualizamos el ID ya que el modelo BOM no tiene un campo ID en el dominio
         return entity
     
@@ -103,11 +106,19 @@ class SQLiteBOMRepository(BOMRepository):
             """,
             (entity.quantity, entity.finished_product_id, entity.material_id)
         )
+        self._notify_change(entity.finished_product_id)
         return entity
     
     def delete(self, id: int) -> bool:
         """Elimina un registro BOM por su ID."""
+        row = self.db.execute_and_fetchone(
+            "SELECT finished_product_id FROM bom WHERE id = ?", (id,)
+        )
+        if not row:
+            return False
+        
         cursor = self.db.execute("DELETE FROM bom WHERE id = ?", (id,))
+        self._notify_change(row["finished_product_id"])
         return cursor.rowcount > 0
     
     def get_by_finished_product(self, finished_product_id: int) -> List[BOM]:
@@ -123,6 +134,7 @@ class SQLiteSupplierRepository(SupplierRepository):
     """Implementación SQLite del repositorio de proveedores."""
     
     def __init__(self, database: Database):
+        super().__init__()
         self.db = database
     
     def get_by_id(self, id: int) -> Optional[Supplier]:
@@ -149,6 +161,7 @@ class SQLiteSupplierRepository(SupplierRepository):
             (entity.name, entity.product_id, entity.unit_cost, entity.lead_time_days)
         )
         entity.id = cursor.lastrowid
+        self._notify_change(entity.id)
         return entity
     
     def update(self, entity: Supplier) -> Supplier:
@@ -164,11 +177,14 @@ class SQLiteSupplierRepository(SupplierRepository):
                 entity.lead_time_days, entity.id
             )
         )
+        self._notify_change(entity.id)
         return entity
     
     def delete(self, id: int) -> bool:
         """Elimina un proveedor por su ID."""
         cursor = self.db.execute("DELETE FROM suppliers WHERE id = ?", (id,))
+        if cursor.rowcount > 0:
+            self._notify_change(id)
         return cursor.rowcount > 0
     
     def get_by_product(self, product_id: int) -> List[Supplier]:
@@ -180,6 +196,10 @@ class SQLiteSupplierRepository(SupplierRepository):
         return [Supplier(**result) for result in results]
 
 
+class _InsufficientStock(Exception):
+    """Deshace la transacción de consume_many cuando falta stock."""
+
+
 class SQLiteStockRepository(StockRepository):
     """Implementación SQLite del repositorio de inventario."""
     
@@ -247,6 +267,35 @@ class SQLiteStockRepository(StockRepository):
             new_stock = StockCurrent(product_id=product_id, quantity=quantity)
             self.add(new_stock)
             return new_stock
+    
+    def consume_many(self, quantities: Dict[int, int]) -> Optional[Dict[int, int]]:
+        """
+        Descuenta varias cantidades en una transacción, con una actualización
+        condicional por fila. Si alguna fila no tiene stock suficiente se
+        deshace toda la operación.
+        """
+        if not quantities:
+            return {}
+        
+        params = [(quantity, product_id, quantity) for product_id, quantity in quantities.items()]
+        try:
+            with self.db.transaction():
+                cursor = self.db.executemany(
+                    "UPDATE stock_current SET quantity = quantity - ? "
+                    "WHERE product_id = ? AND quantity >= ?",
+                    params
+                )
+                if cursor.rowcount < len(params):
+                    raise _InsufficientStock()
+        except _InsufficientStock:
+            return None
+        
+        placeholders = ", ".join("?" for _ in quantities)
+        results = self.db.execute_and_fetchall(
+            f"SELECT product_id, quantity FROM stock_current WHERE product_id IN ({placeholders})",
+            tuple(quantities)
+        )
+        return {result["product_id"]: result["quantity"] for result in results}
 
 
 class SQLiteManufacturingOrderRepository(ManufacturingOrderRepository):
@@ -285,6 +334,23 @@ class SQLiteManufacturingOrderRepository(ManufacturingOrderRepository):
         entity.id = cursor.lastrowid
         return entity
     
+    def add_many(self, entities: List[ManufacturingOrder]) -> List[ManufacturingOrder]:
+        """Añade varias órdenes de fabricación en una única escritura."""
+        ids = self.db.insert_many(
+            """
+            INSERT INTO manufacturing_orders 
+            (creation_date, product_id, quantity, status) 
+            VALUES (?, ?, ?, ?)
+            """,
+            [
+                (entity.creation_date, entity.product_id, entity.quantity, entity.status)
+                for entity in entities
+            ]
+        )
+        for entity, id in zip(entities, ids):
+            entity.id = id
+        return entities
+    
     def update(self, entity: ManufacturingOrder) -> ManufacturingOrder:
         """Actualiza una orden de fabricación existente."""
         self.db.execute(
@@ -361,6 +427,26 @@ class SQLitePurchaseOrderRepository(PurchaseOrderRepository):
         entity.id = cursor.lastrowid
         return entity
     
+    def add_many(self, entities: List[PurchaseOrder]) -> List[PurchaseOrder]:
+        """Añade varias órdenes de compra en una única escritura."""
+        ids = self.db.insert_many(
+            """
+            INSERT INTO purchase_orders 
+            (supplier_id, product_id, quantity, issue_date, estimated_delivery_date, status) 
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (
+                    entity.supplier_id, entity.product_id, entity.quantity,
+                    entity.issue_date, entity.estimated_delivery_date, entity.status
+                )
+                for entity in entities
+            ]
+        )
+        for entity, id in zip(entities, ids):
+            entity.id = id
+        return entities
+    
     def update(self, entity: PurchaseOrder) -> PurchaseOrder:
         """Actualiza una orden de compra existente."""
         self.db.execute(
@@ -432,6 +518,16 @@ class SQLiteEventRepository(EventRepository):
         entity.id = cursor.lastrowid
         return entity
     
+    def add_many(self, entities: List[Event]) -> List[Event]:
+        """Añade varios eventos en una única escritura."""
+        ids = self.db.insert_many(
+            "INSERT INTO events (type, event_date, details) VALUES (?, ?, ?)",
+            [(entity.type, entity.event_date, entity.details) for entity in entities]
+        )
+        for entity, id in zip(entities, ids):
+            entity.id = id
+        return entities
+    
     def update(self, entity: Event) -> Event:
         """Actualiza un evento existente."""
         self.db.execute(
@@ -460,3 +556,143 @@ class SQLiteEventRepository(EventRepository):
             (start_date, end_date)
         )
         return [Event(**result) for result in results]
+
+
+class SQLiteStockReservationRepository(StockReservationRepository):
+    """Implementación SQLite del registro de reservas de stock."""
+    
+    def __init__(self, database: Database):
+        self.db = database
+    
+    def get_by_id(self, id: int) -> Optional[StockReservation]:
+        """Obtiene una línea de reserva por su ID."""
+        result = self.db.execute_and_fetchone(
+            "SELECT * FROM stock_reservations WHERE id = ?", (id,)
+        )
+        if result:
+            return StockReservation(**result)
+        return None
+    
+    def get_all(self) -> List[StockReservation]:
+        """Obtiene todas las líneas de reserva."""
+        results = self.db.execute_and_fetchall("SELECT * FROM stock_reservations ORDER BY id")
+        return [StockReservation(**result) for result in results]
+    
+    def add(self, entity: StockReservation) -> StockReservation:
+        """Añade una línea de reserva."""
+        return self.add_many([entity])[0]
+    
+    def add_many(self, entities: List[StockReservation]) -> List[StockReservation]:
+        """Añade varias líneas de reserva en una única escritura."""
+        ids = self.db.insert_many(
+            "INSERT INTO stock_reservations (reference, product_id, quantity, created_date) "
+            "VALUES (?, ?, ?, ?)",
+            [
+                (entity.reference, entity.product_id, entity.quantity, entity.created_date)
+                for entity in entities
+            ]
+        )
+        for entity, id in zip(entities, ids):
+            entity.id = id
+        return entities
+    
+    def update(self, entity: StockReservation) -> StockReservation:
+        """Actualiza una línea de reserva existente."""
+        self.db.execute(
+            "UPDATE stock_reservations SET reference = ?, product_id = ?, quantity = ?, "
+            "created_date = ? WHERE id = ?",
+            (entity.reference, entity.product_id, entity.quantity, entity.created_date, entity.id)
+        )
+        return entity
+    
+    def delete(self, id: int) -> bool:
+        """Elimina una línea de reserva por su ID."""
+        cursor = self.db.execute("DELETE FROM stock_reservations WHERE id = ?", (id,))
+        return cursor.rowcount > 0
+    
+    def get_by_reference(self, reference: str) -> List[StockReservation]:
+        """Obtiene las líneas de una reserva."""
+        results = self.db.execute_and_fetchall(
+            "SELECT * FROM stock_reservations WHERE reference = ? ORDER BY id", (reference,)
+        )
+        return [StockReservation(**result) for result in results]
+    
+    def delete_by_reference(self, reference: str) -> int:
+        """Elimina todas las líneas de una reserva."""
+        cursor = self.db.execute(
+            "DELETE FROM stock_reservations WHERE reference = ?", (reference,)
+        )
+        return cursor.rowcount
+
+
+class SQLiteKPIRepository(KPIRepository):
+    """Implementación SQLite del repositorio de resúmenes diarios de indicadores."""
+    
+    # Columnas en el orden de las sentencias INSERT y UPDATE
+    COLUMNS = (
+        "date", "days", "orders_created", "orders_completed", "units_completed",
+        "backlog_orders", "backlog_units", "backlog_avg_age_days",
+        "material_spend", "inventory_units", "stockout_materials"
+    )
+    
+    def __init__(self, database: Database):
+        self.db = database
+    
+    def _values(self, entity: KPIDailyRollup) -> tuple:
+        """Valores de las columnas de un resumen, en el orden de COLUMNS."""
+        return tuple(getattr(entity, column) for column in self.COLUMNS)
+    
+    def get_by_id(self, id: int) -> Optional[KPIDailyRollup]:
+        """Obtiene un resumen diario por su ID."""
+        result = self.db.execute_and_fetchone(
+            "SELECT * FROM kpi_daily WHERE id = ?", (id,)
+        )
+        if result:
+            return KPIDailyRollup(**result)
+        return None
+    
+    def get_all(self) -> List[KPIDailyRollup]:
+        """Obtiene todos los resúmenes diarios."""
+        results = self.db.execute_and_fetchall("SELECT * FROM kpi_daily ORDER BY id")
+        return [KPIDailyRollup(**result) for result in results]
+    
+    def add(self, entity: KPIDailyRollup) -> KPIDailyRollup:
+        """Añade un nuevo resumen diario."""
+        cursor = self.db.execute(
+            f"INSERT INTO kpi_daily ({', '.join(self.COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in self.COLUMNS)})",
+            self._values(entity)
+        )
+        entity.id = cursor.lastrowid
+        return entity
+    
+    def update(self, entity: KPIDailyRollup) -> KPIDailyRollup:
+        """Actualiza un resumen diario existente."""
+        self.db.execute(
+            f"UPDATE kpi_daily SET {', '.join(f'{column} = ?' for column in self.COLUMNS)} "
+            "WHERE id = ?",
+            self._values(entity) + (entity.id,)
+        )
+        return entity
+    
+    def delete(self, id: int) -> bool:
+        """Elimina un resumen diario por su ID."""
+        cursor = self.db.execute("DELETE FROM kpi_daily WHERE id = ?", (id,))
+        return cursor.rowcount > 0
+    
+    def get_by_date_range(self, start_date: str, end_date: str) -> List[KPIDailyRollup]:
+        """Obtiene los resúmenes diarios dentro de un rango de fechas."""
+        results = self.db.execute_and_fetchall(
+            "SELECT * FROM kpi_daily WHERE date BETWEEN ? AND ? ORDER BY id",
+            (start_date, end_date)
+        )
+        return [KPIDailyRollup(**result) for result in results]
+    
+    def get_latest(self) -> Optional[KPIDailyRollup]:
+        """Obtiene el resumen del último día cerrado, o None si no hay ninguno."""
+        result = self.db.execute_and_fetchone(
+            "SELECT * FROM kpi_daily ORDER BY id DESC LIMIT 1"
+        )
+        if result:
+            return KPIDailyRollup(**result)
+        return None
@@ -0,0 +1,71 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from application.sweeps import SweepResultCache
+
+# Paquetes cuyo código determina el resultado de una simulación
+SIMULATION_PACKAGES = ("domain", "application", "infrastructure", "config")
+
+
+class FileSweepCache(SweepResultCache):
+    """
+    Caché direccionada por contenido de los resultados de un barrido: cada
+    punto se guarda en un archivo JSON cuyo nombre es su clave.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory: Directorio de la caché (se crea si no existe)
+        """
+        self.directory = Path(directory)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        """Ruta del archivo de una clave, repartida en subdirectorios por prefijo."""
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[List[Dict[str, float]]]:
+        """Recupera los indicadores guardados para una clave, o None si no existen."""
+        path = self._path(key)
+        if not path.exists():
+            return None
+
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def put(self, key: str, samples: List[Dict[str, float]]) -> None:
+        """Guarda los indicadores de una clave de forma atómica."""
+        path = self._path(key)
+        os.makedirs(path.parent, exist_ok=True)
+
+        temp_path = path.with_suffix(".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(samples, f)
+        os.replace(temp_path, path)
+
+
+def source_code_version(base_dir: str) -> str:
+    """
+    Calcula un identificador de la versión del código del simulador como el
+    hash de todos sus archivos fuente. Cualquier cambio en el código invalida
+    los resultados cacheados.
+
+    Args:
+        base_dir: Directorio raíz de la aplicación
+
+    Returns:
+        Hash SHA-256 en hexadecimal
+    """
+    digest = hashlib.sha256()
+    base_path = Path(base_dir)
+
+    for package in SIMULATION_PACKAGES:
+        for source in sorted((base_path / package).rglob("*.py")):
+            digest.update(source.relative_to(base_path).as_posix().encode("utf-8"))
+            digest.update(source.read_bytes())
+
+    return digest.hexdigest()
@@ -7,23 +7,27 @@ from pathlib import Path
 import logging
 import threading
 import time
+import json
+from functools import partial
 
-from config.settings import API_HOST, API_PORT, STREAMLIT_PORT, load_config
-from config.di_container import DIContainer
-from presentation.api import create_api
-
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('simulator.log')
-    ]
+from config.settings import (
+    API_HOST, API_PORT, STREAMLIT_PORT, BASE_DIR, SWEEP_CACHE_DIR,
+    LOG_LEVEL, LOG_JSON, load_config
 )
+from config.logging_config import configure_logging, configure_worker_logging
+from config.di_container import DIContainer, HeadlessContainer, create_headless_simulation
+from application.replications import ReplicationRunner
+from application.forks import SimulationForkRegistry
+from application.sweeps import SweepRunner, expand_grid
+from infrastructure.sweep_cache import FileSweepCache, source_code_version
+from domain.models import SimulationConfig
+from presentation.api import create_api
 
 logger = logging.getLogger("3d_printer_simulator")
 
+# Logging de los procesos del pool de réplicas, con el mismo nivel y formato
+worker_logging = partial(configure_worker_logging, LOG_LEVEL, LOG_JSON)
+
 def start_api(host: str = API_HOST, port: int = API_PORT) -> None:
     """
     Inicia el servidor de la API.
@@ -40,8 +44,14 @@ def start_api(host: str = API_HOST, port: int = API_PORT) -> None:
     container.initialize()
     container.seed_database()
     
+    # Restaurar el estado del simulador desde el último checkpoint
+    container.simulation_service.start_simulation()
+    
     # Crear la aplicación FastAPI
-    app = create_api(container.simulation_service)
+    fork_registry = SimulationForkRegistry(
+        lambda: container.fork().simulation_service
+    )
+    app = create_api(container.simulation_service, fork_registry)
     
     # Iniciar servidor uvicorn
     logger.info(f"Iniciando servidor API en http://{host}:{port}")
@@ -83,8 +93,192 @@ def start_streamlit(streamlit_port: int = STREAMLIT_PORT, api_port: int = API_PO
         # En modo normal, iniciamos como proceso separado
         subprocess.Popen(cmd)
 
+def run_headless(days: int, output: str = None) -> None:
+    """
+    Ejecuta la simulación sin interfaz, con todo el estado en memoria.
+    
+    Args:
+        days: Número de días a simular
+        output: Ruta opcional donde volcar los resultados (.db para SQLite, JSON en otro caso)
+    """
+    config = load_config()
+    
+    container = HeadlessContainer(config)
+    container.initialize()
+    container.seed_database()
+    
+    start = time.perf_counter()
+    container.simulation_service.advance_days(days)
+    elapsed = time.perf_counter() - start
+    
+    logger.info(
+        f"Simulados {days} días en {elapsed:.2f} s "
+        f"(fecha final: {container.simulation_service.get_current_date().isoformat()})"
+    )
+    
+    if output:
+        if output.endswith(".db"):
+            container.flush_to_database(output)
+        else:
+            container.flush_to_file(output)
+        logger.info(f"Resultados guardados en {output}")
+
+def run_replications(
+    days: int,
+    replications: int,
+    output: str = None,
+    antithetic: bool = False,
+    half_width: float = None,
+    kpi: str = "service_level"
+) -> None:
+    """
+    Ejecuta réplicas Monte Carlo independientes en un pool de procesos.
+    
+    Args:
+        days: Horizonte de cada réplica en días
+        replications: Número de réplicas (máximo si se indica half_width)
+        output: Ruta opcional del archivo JSON con los indicadores agregados
+        antithetic: Usar pares de variables antitéticas
+        half_width: Semirrango objetivo; si se indica, se para al alcanzarlo
+        kpi: Indicador que decide la parada con half_width
+    """
+    config = SimulationConfig(**load_config())
+    runner = ReplicationRunner(create_headless_simulation, worker_initializer=worker_logging)
+    
+    start = time.perf_counter()
+    if half_width is not None:
+        result = runner.run_sequential(
+            config, days, half_width, kpi=kpi, antithetic=antithetic,
+            min_replications=min(10, replications), max_replications=replications
+        )
+    else:
+        result = runner.run(config, days, replications, antithetic=antithetic)
+    elapsed = time.perf_counter() - start
+    
+    logger.info(f"{result.replications} réplicas de {days} días en {elapsed:.2f} s")
+    _log_kpis(result.kpis, result.confidence)
+    
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(result.to_dict(), f, indent=2, ensure_ascii=False)
+        logger.info(f"Resultados guardados en {output}")
+
+def run_comparison(
+    compare_file: str,
+    days: int,
+    replications: int,
+    output: str = None,
+    antithetic: bool = False
+) -> None:
+    """
+    Compara variantes de la configuración con números aleatorios comunes.
+    
+    Args:
+        compare_file: Archivo JSON con una lista de variantes [{parámetro: valor}, ...];
+            la primera es la referencia
+        days: Horizonte de cada réplica en días
+        replications: Réplicas por variante
+        output: Ruta opcional del archivo JSON con los resultados
+        antithetic: Usar pares de variables antitéticas
+    """
+    base = SimulationConfig(**load_config())
+    
+    with open(compare_file, 'r', encoding='utf-8') as f:
+        variants = json.load(f)
+    
+    configs = [
+        SimulationConfig.model_validate({**base.model_dump(), **variant})
+        for variant in variants
+    ]
+    
+    start = time.perf_counter()
+    result = ReplicationRunner(create_headless_simulation, worker_initializer=worker_logging).compare(
+        configs, days, replications, antithetic=antithetic
+    )
+    elapsed = time.perf_counter() - start
+    
+    logger.info(f"{len(configs)} escenarios x {replications} réplicas de {days} días en {elapsed:.2f} s")
+    for index, difference in enumerate(result.differences):
+        if index == result.baseline:
+            continue
+        logger.info(f"Escenario {index} {variants[index]} frente a la referencia:")
+        _log_kpis(difference, result.scenarios[index].confidence)
+    
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(result.to_dict(), f, indent=2, ensure_ascii=False)
+        logger.info(f"Resultados guardados en {output}")
+
+def _log_kpis(kpis: dict, confidence: float) -> None:
+    """Escribe en el log la media e intervalo de confianza de cada indicador."""
+    for name, stat in kpis.items():
+        logger.info(
+            f"{name}: {stat.mean:.2f} ± {stat.half_width:.2f} "
+            f"(IC {confidence:.0%}: [{stat.ci_low:.2f}, {stat.ci_high:.2f}])"
+        )
+
+def run_sweep(sweep_file: str, days: int, replications: int = 1, output: str = None) -> None:
+    """
+    Ejecuta un barrido de parámetros, reutilizando los puntos ya calculados.
+    
+    Args:
+        sweep_file: Archivo JSON con una rejilla {parámetro: [valores]} o una
+            lista de variantes [{parámetro: valor}, ...] sobre la configuración actual
+        days: Horizonte de cada réplica en días
+        replications: Réplicas por punto
+        output: Ruta opcional del archivo JSON con los resultados
+    """
+    base = SimulationConfig(**load_config())
+    
+    with open(sweep_file, 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+    
+    if isinstance(spec, dict):
+        configs = expand_grid(base, spec)
+    else:
+        configs = [
+            SimulationConfig.model_validate({**base.model_dump(), **variant})
+            for variant in spec
+        ]
+    
+    if base.seed is None:
+        logger.warning("Sin semilla en la configuración: los resultados no se guardarán en caché")
+    
+    runner = SweepRunner(
+        create_headless_simulation,
+        cache=FileSweepCache(str(SWEEP_CACHE_DIR)),
+        code_version=source_code_version(str(BASE_DIR)),
+        worker_initializer=worker_logging
+    )
+    
+    start = time.perf_counter()
+    result = runner.run(configs, days, replications)
+    elapsed = time.perf_counter() - start
+    
+    logger.info(
+        f"Barrido de {len(configs)} puntos en {elapsed:.2f} s "
+        f"({result.computed} calculados, {len(configs) - result.computed} desde caché)"
+    )
+    for point in result.points:
+        service_level = point.result.kpis["service_level"]
+        logger.info(
+            f"demand_mean={point.config.demand_mean} "
+            f"capacity={point.config.production_capacity_per_day} "
+            f"warehouse={point.config.warehouse_capacity}: "
+            f"service_level {service_level.mean:.3f} ± {service_level.half_width:.3f}"
+        )
+    
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(result.to_dict(), f, indent=2, ensure_ascii=False)
+        logger.info(f"Resultados guardados en {output}")
+
 def main():
     """Función principal de la aplicación."""
+    # Configurar logging (escritura en segundo plano a consola y archivo) solo
+    # en el proceso principal; los procesos del pool usan worker_logging
+    configure_logging(LOG_LEVEL, 'simulator.log', LOG_JSON)
+    
     # Parsear argumentos de línea de comandos
     parser = argparse.ArgumentParser(description="Simulador de Producción de Impresoras 3D")
     
@@ -113,8 +307,65 @@ def main():
         help=f"Puerto para la interfaz Streamlit (predeterminado: {STREAMLIT_PORT})"
     )
     
+    parser.add_argument(
+        "--headless", type=int, metavar="DIAS",
+        help="Simular DIAS días sin interfaz, con el estado en memoria"
+    )
+    
+    parser.add_argument(
+        "--replications", type=int, metavar="N",
+        help="Con --headless, ejecutar N réplicas Monte Carlo en paralelo y agregar sus indicadores"
+    )
+    
+    parser.add_argument(
+        "--antithetic", action="store_true",
+        help="Con --replications, usar pares de variables antitéticas"
+    )
+    
+    parser.add_argument(
+        "--half-width", type=float, metavar="H",
+        help="Con --replications, parar al alcanzar un semirrango H del intervalo de confianza"
+    )
+    
+    parser.add_argument(
+        "--kpi", type=str, default="service_level",
+        help="Indicador que decide la parada con --half-width (predeterminado: service_level)"
+    )
+    
+    parser.add_argument(
+        "--compare", type=str, metavar="ARCHIVO",
+        help="Con --headless, comparar las variantes de ARCHIVO (JSON) con números aleatorios comunes"
+    )
+    
+    parser.add_argument(
+        "--sweep", type=str, metavar="ARCHIVO",
+        help="Con --headless, ejecutar el barrido de parámetros descrito en ARCHIVO (JSON)"
+    )
+    
+    parser.add_argument(
+        "--output", type=str,
+        help="Archivo donde guardar los resultados del modo --headless (.db o .json)"
+    )
+    
     args = parser.parse_args()
     
+    if args.headless:
+        if args.sweep:
+            run_sweep(args.sweep, args.headless, args.replications or 1, args.output)
+        elif args.compare:
+            run_comparison(
+                args.compare, args.headless, args.replications or 10,
+                args.output, args.antithetic
+            )
+        elif args.replications:
+            run_replications(
+                args.headless, args.replications, args.output,
+                args.antithetic, args.half_width, args.kpi
+            )
+        else:
+            run_headless(args.headless, args.output)
+        return
+    
     if not args.ui_only:
         # Iniciar servidor API
         logger.info("Iniciando servidor API...")
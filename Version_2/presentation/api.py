@@ -5,8 +5,10 @@ import json
 from datetime import date, datetime
 
 from application.services import SimulationApplicationService
+from application.forks import SimulationForkRegistry, compare_summaries
+from application.release_planner import EXACT_LIMIT
 from domain.models import (
-    ManufacturingOrderStatus, PurchaseOrderStatus, EventType
+    ManufacturingOrderStatus, PurchaseOrderStatus, EventType, SupplierCriterion
 )
 
 # Modelos Pydantic para la API
@@ -24,6 +26,10 @@ class SupplierResponse(BaseModel):
     lead_time_days: int
     estimated_arrival: str
 
+class BestSupplierResponse(SupplierResponse):
+    criterion: str
+    on_time: bool
+
 class MaterialRequirement(BaseModel):
     id: int
     name: str
@@ -75,8 +81,47 @@ class AdvanceDayResponse(BaseModel):
     events_count: int
     message: str
 
+class DaySummaryResponse(BaseModel):
+    date: str
+    orders_created: int
+    orders_completed: int
+    purchases_received: int
+    purchases_created: int = 0
+    events_count: int
+    skipped_days: int = 0
+
+class AdvanceDaysResponse(BaseModel):
+    new_date: str
+    days: List[DaySummaryResponse]
+    message: str
+
+class KPIDailyResponse(BaseModel):
+    date: str
+    days: int
+    orders_created: int
+    orders_completed: int
+    units_completed: int
+    backlog_orders: int
+    backlog_units: int
+    backlog_avg_age_days: float
+    material_spend: float
+    inventory_units: int
+    stockout_materials: int
+
+class ForkResponse(BaseModel):
+    fork_id: int
+    current_date: str
+
+class CheckpointResponse(BaseModel):
+    saved: bool
+    current_date: str
+    message: str
+
 # Función para crear la API
-def create_api(simulation_service: SimulationApplicationService) -> FastAPI:
+def create_api(
+    simulation_service: SimulationApplicationService,
+    fork_registry: Optional[SimulationForkRegistry] = None
+) -> FastAPI:
     app = FastAPI(
         title="Simulador de Producción de Impresoras 3D API",
         description="API REST para interactuar con el simulador de producción",
@@ -112,6 +157,39 @@ def create_api(simulation_service: SimulationApplicationService) -> FastAPI:
             "message": f"Día avanzado correctamente a {new_date.isoformat()}"
         }
     
+    @app.post("/simulation/advance", response_model=AdvanceDaysResponse, tags=["Simulation"])
+    async def advance_days(
+        days: int = Query(1, ge=1, le=3650, description="Número de días a avanzar"),
+        skip_idle: bool = Query(False, description="Saltar los días sin actividad"),
+        service: SimulationApplicationService = Depends(get_simulation_service)
+    ):
+        """Avanza varios días en la simulación en una única ejecución."""
+        summaries = service.advance_days(days, skip_idle=skip_idle)
+        new_date = service.get_current_date()
+        
+        return {
+            "new_date": new_date.isoformat(),
+            "days": summaries,
+            "message": f"Simulación avanzada {days} días hasta {new_date.isoformat()}"
+        }
+    
+    @app.post("/simulation/checkpoint", response_model=CheckpointResponse, tags=["Simulation"])
+    async def save_checkpoint(
+        service: SimulationApplicationService = Depends(get_simulation_service)
+    ):
+        """Guarda un checkpoint del estado en memoria del simulador."""
+        saved = service.save_checkpoint()
+        current_date = service.get_current_date().isoformat()
+        
+        return {
+            "saved": saved,
+            "current_date": current_date,
+            "message": (
+                f"Checkpoint guardado en la fecha {current_date}" if saved
+                else "No hay almacén de checkpoints configurado"
+            )
+        }
+    
     @app.get("/products", response_model=List[ProductResponse], tags=["Products"])
     async def get_products(
         service: SimulationApplicationService = Depends(get_simulation_service)
@@ -145,10 +223,11 @@ def create_api(simulation_service: SimulationApplicationService) -> FastAPI:
     @app.get("/products/{product_id}/suppliers", response_model=List[SupplierResponse], tags=["Products"])
     async def get_product_suppliers(
         product_id: int,
+        criterion: Optional[SupplierCriterion] = Query(None, description="Ordenar del mejor al peor según el criterio"),
         service: SimulationApplicationService = Depends(get_simulation_service)
     ):
         """Obtiene los proveedores para un producto."""
-        supplier_data = service.get_suppliers_for_product(product_id)
+        supplier_data = service.get_suppliers_for_product(product_id, criterion)
         result = []
         
         for supplier_info in supplier_data:
@@ -167,6 +246,30 @@ def create_api(simulation_service: SimulationApplicationService) -> FastAPI:
         
         return result
     
+    @app.get("/products/{product_id}/suppliers/best", response_model=BestSupplierResponse, tags=["Products"])
+    async def get_best_product_supplier(
+        product_id: int,
+        required_date: Optional[date] = Query(None, description="Fecha en que se necesita el material"),
+        criterion: Optional[SupplierCriterion] = Query(None, description="Criterio de elección (por defecto, el configurado)"),
+        service: SimulationApplicationService = Depends(get_simulation_service)
+    ):
+        """Elige el mejor proveedor de un producto, el que llega a tiempo si se indica la fecha."""
+        supplier_info = service.get_best_supplier(product_id, required_date, criterion)
+        if supplier_info is None:
+            raise HTTPException(status_code=404, detail="No hay proveedores para este producto")
+        
+        supplier = supplier_info["supplier"]
+        return {
+            "id": supplier["id"],
+            "name": supplier["name"],
+            "product_id": supplier["product_id"],
+            "unit_cost": supplier["unit_cost"],
+            "lead_time_days": supplier["lead_time_days"],
+            "estimated_arrival": supplier_info["estimated_arrival"],
+            "criterion": supplier_info["criterion"],
+            "on_time": supplier_info["on_time"]
+        }
+    
     @app.get("/inventory", response_model=List[StockResponse], tags=["Inventory"])
     async def get_inventory(
         service: SimulationApplicationService = Depends(get_simulation_service)
@@ -174,6 +277,20 @@ def create_api(simulation_service: SimulationApplicationService) -> FastAPI:
         """Obtiene el inventario actual."""
         return service.get_current_inventory()
     
+    @app.get("/inventory/buildable", tags=["Inventory"])
+    async def get_buildable_units(
+        service: SimulationApplicationService = Depends(get_simulation_service)
+    ):
+        """Obtiene las unidades de cada producto terminado fabricables con el stock actual."""
+        return service.get_buildable_units()
+    
+    @app.get("/inventory/reservations", tags=["Inventory"])
+    async def get_stock_reservations(
+        service: SimulationApplicationService = Depends(get_simulation_service)
+    ):
+        """Obtiene las reservas de stock vigentes y el disponible de cada producto."""
+        return service.get_stock_reservations()
+    
     @app.get("/orders/manufacturing", tags=["Manufacturing"])
     async def get_manufacturing_orders(
         status: Optional[str] = Query(None, description="Filtro por estado"),
@@ -182,10 +299,32 @@ def create_api(simulation_service: SimulationApplicationService) -> FastAPI:
         """Obtiene las órdenes de fabricación."""
         if status == "pending":
             return service.get_pending_manufacturing_orders()
+        elif status == "releasable":
+            return service.get_pending_manufacturing_orders(releasable_only=True)
         else:
             # Aquí se implementaría la lógica para otros estados
             return []
     
+    @app.get("/orders/manufacturing/release-plan", tags=["Manufacturing"])
+    async def get_release_plan(
+        exact_limit: int = Query(EXACT_LIMIT, ge=0, le=30, description="Máximo de órdenes viables para buscar el plan óptimo"),
+        service: SimulationApplicationService = Depends(get_simulation_service)
+    ):
+        """Calcula qué órdenes pendientes liberar a la vez sin liberarlas."""
+        return service.plan_release_batch(execute=False, exact_limit=exact_limit)
+    
+    @app.post("/orders/manufacturing/release-plan", tags=["Manufacturing"])
+    async def execute_release_plan(
+        exact_limit: int = Query(EXACT_LIMIT, ge=0, le=30, description="Máximo de órdenes viables para buscar el plan óptimo"),
+        service: SimulationApplicationService = Depends(get_simulation_service)
+    ):
+        """Calcula el plan de liberación y libera todas sus órdenes en una única transacción."""
+        result = service.plan_release_batch(execute=True, exact_limit=exact_limit)
+        if not result["success"]:
+            raise HTTPException(status_code=400, detail=result["message"])
+        
+        return result
+    
     @app.post(
         "/orders/manufacturing/{order_id}/release", 
         tags=["Manufacturing"]
@@ -201,6 +340,36 @@ def create_api(simulation_service: SimulationApplicationService) -> FastAPI:
         
         return result
     
+    @app.post(
+        "/orders/manufacturing/{order_id}/reserve", 
+        tags=["Manufacturing"]
+    )
+    async def reserve_manufacturing_order(
+        order_id: int,
+        service: SimulationApplicationService = Depends(get_simulation_service)
+    ):
+        """Reserva los materiales de una orden de fabricación pendiente."""
+        result = service.reserve_order_materials(order_id)
+        if not result["success"]:
+            raise HTTPException(status_code=400, detail=result["message"])
+        
+        return result
+    
+    @app.delete(
+        "/orders/manufacturing/{order_id}/reserve", 
+        tags=["Manufacturing"]
+    )
+    async def release_manufacturing_order_reservation(
+        order_id: int,
+        service: SimulationApplicationService = Depends(get_simulation_service)
+    ):
+        """Anula la reserva de materiales de una orden de fabricación."""
+        result = service.release_order_reservation(order_id)
+        if not result["success"]:
+            raise HTTPException(status_code=400, detail=result["message"])
+        
+        return result
+    
     @app.post(
         "/orders/purchase", 
         tags=["Purchasing"]
@@ -220,6 +389,44 @@ def create_api(simulation_service: SimulationApplicationService) -> FastAPI:
         # sin forzar la validación con el modelo PurchaseOrderResponse
         return result
     
+    @app.get("/orders/purchase/mrp", tags=["Purchasing"])
+    async def run_mrp(
+        service: SimulationApplicationService = Depends(get_simulation_service)
+    ):
+        """Calcula las necesidades netas de material de la cartera y sugiere órdenes de compra."""
+        return service.run_mrp()
+    
+    @app.get("/kpis", tags=["KPIs"])
+    async def get_kpis(
+        service: SimulationApplicationService = Depends(get_simulation_service)
+    ):
+        """Obtiene los indicadores acumulados de la simulación."""
+        return service.get_kpis()
+    
+    @app.get("/kpis/daily", response_model=List[KPIDailyResponse], tags=["KPIs"])
+    async def get_kpi_history(
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        service: SimulationApplicationService = Depends(get_simulation_service)
+    ):
+        """Obtiene los resúmenes diarios de indicadores."""
+        return service.get_kpi_history(start_date, end_date)
+
+    @app.get("/metrics/phases", tags=["Metrics"])
+    async def get_phase_metrics(
+        service: SimulationApplicationService = Depends(get_simulation_service)
+    ):
+        """Obtiene el tiempo, las sentencias SQL y las filas escritas por fase del avance de día."""
+        return service.get_phase_metrics()
+
+    @app.post("/metrics/profiling", tags=["Metrics"])
+    async def set_profiling(
+        enabled: bool = Query(..., description="Activar o desactivar la instrumentación"),
+        service: SimulationApplicationService = Depends(get_simulation_service)
+    ):
+        """Activa o desactiva la instrumentación por fases del avance de día."""
+        return service.set_profiling(enabled)
+
     @app.get("/events", response_model=List[EventResponse], tags=["Events"])
     async def get_events(
         start_date: Optional[str] = None,
@@ -230,4 +437,102 @@ def create_api(simulation_service: SimulationApplicationService) -> FastAPI:
         """Obtiene el historial de eventos."""
         return service.get_events_history(start_date, end_date, event_type)
     
+    if fork_registry is not None:
+        _register_fork_routes(app, simulation_service, fork_registry)
+    
     return app
+
+def _register_fork_routes(
+    app: FastAPI,
+    simulation_service: SimulationApplicationService,
+    fork_registry: SimulationForkRegistry
+) -> None:
+    """Registra los endpoints de las ramas "what-if" de la simulación."""
+    
+    def get_fork(fork_id: int) -> SimulationApplicationService:
+        try:
+            return fork_registry.get(fork_id)
+        except KeyError as e:
+            raise HTTPException(status_code=404, detail=str(e.args[0]))
+    
+    @app.post("/forks", response_model=ForkResponse, tags=["Forks"])
+    async def create_fork():
+        """Crea una rama aislada a partir del estado actual de la simulación."""
+        try:
+            fork_id = fork_registry.create()
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        return {
+            "fork_id": fork_id,
+            "current_date": fork_registry.get(fork_id).get_current_date().isoformat()
+        }
+    
+    @app.get("/forks", response_model=List[ForkResponse], tags=["Forks"])
+    async def list_forks():
+        """Lista las ramas abiertas."""
+        return fork_registry.list()
+    
+    @app.get("/forks/{fork_id}", tags=["Forks"])
+    async def get_fork_summary(fork: SimulationApplicationService = Depends(get_fork)):
+        """Obtiene el resumen del estado de una rama."""
+        return fork.get_state_summary()
+    
+    @app.get("/forks/{fork_id}/compare", tags=["Forks"])
+    async def compare_fork(fork: SimulationApplicationService = Depends(get_fork)):
+        """Compara el estado de una rama con el de la simulación principal."""
+        return compare_summaries(
+            simulation_service.get_state_summary(), fork.get_state_summary()
+        )
+    
+    @app.post("/forks/{fork_id}/advance", response_model=AdvanceDaysResponse, tags=["Forks"])
+    async def advance_fork(
+        days: int = Query(1, ge=1, le=3650, description="Número de días a avanzar"),
+        skip_idle: bool = Query(False, description="Saltar los días sin actividad"),
+        fork: SimulationApplicationService = Depends(get_fork)
+    ):
+        """Avanza varios días en una rama."""
+        summaries = fork.advance_days(days, skip_idle=skip_idle)
+        new_date = fork.get_current_date()
+        
+        return {
+            "new_date": new_date.isoformat(),
+            "days": summaries,
+            "message": f"Rama avanzada {days} días hasta {new_date.isoformat()}"
+        }
+    
+    @app.post("/forks/{fork_id}/orders/manufacturing/{order_id}/release", tags=["Forks"])
+    async def release_fork_order(
+        order_id: int,
+        fork: SimulationApplicationService = Depends(get_fork)
+    ):
+        """Libera una orden de fabricación a producción en una rama."""
+        result = fork.release_order_to_production(order_id)
+        if not result["success"]:
+            raise HTTPException(status_code=400, detail=result["message"])
+        
+        return result
+    
+    @app.post("/forks/{fork_id}/orders/purchase", tags=["Forks"])
+    async def create_fork_purchase_order(
+        order: PurchaseOrderRequest,
+        fork: SimulationApplicationService = Depends(get_fork)
+    ):
+        """Crea una orden de compra en una rama."""
+        result = fork.create_purchase_order(
+            order.supplier_id, order.product_id, order.quantity
+        )
+        if not result["success"]:
+            raise HTTPException(status_code=400, detail=result["message"])
+        
+        return result
+    
+    @app.delete("/forks/{fork_id}", tags=["Forks"])
+    async def delete_fork(fork_id: int):
+        """Descarta una rama."""
+        try:
+            fork_registry.delete(fork_id)
+        except KeyError as e:
+            raise HTTPException(status_code=404, detail=str(e.args[0]))
+        
+        return {"fork_id": fork_id, "message": f"Rama {fork_id} descartada"}
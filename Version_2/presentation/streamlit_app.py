@@ -51,6 +51,8 @@ class StreamlitApp:
             st.session_state.pending_orders = []
             st.session_state.inventory = []
             st.session_state.events = []
+            st.session_state.kpis = {}
+            st.session_state.kpi_history = []
         
         # Cargar los datos actuales
         self.load_data()
@@ -69,6 +71,13 @@ class StreamlitApp:
             response = requests.get(f"{self.api_url}/inventory")
             st.session_state.inventory = response.json() if response.ok else []
             
+            # Cargar indicadores acumulados y resúmenes diarios
+            response = requests.get(f"{self.api_url}/kpis")
+            st.session_state.kpis = response.json() if response.ok else {}
+            
+            response = requests.get(f"{self.api_url}/kpis/daily")
+            st.session_state.kpi_history = response.json() if response.ok else []
+            
             # Cargar eventos recientes
             try:
                 today = datetime.fromisoformat(st.session_state.current_date).date()
@@ -498,10 +507,47 @@ class StreamlitApp:
         except Exception as e:
             st.error(f"Error al cargar panel de compras: {str(e)}")
     
+    def render_kpis(self):
+        """Renderiza los indicadores acumulados y su evolución diaria."""
+        kpis = st.session_state.get("kpis") or {}
+        if not kpis:
+            return
+        
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Nivel de servicio", f"{kpis.get('service_level', 0):.1%}")
+        col2.metric("Unidades/día", f"{kpis.get('throughput_per_day', 0):.1f}")
+        col3.metric(
+            "Pedidos pendientes", kpis.get("backlog_orders", 0),
+            help=f"Antigüedad media: {kpis.get('backlog_avg_age_days', 0):.1f} días"
+        )
+        col4.metric("Gasto en materiales", f"{kpis.get('material_spend', 0):,.2f} €")
+        
+        history = st.session_state.get("kpi_history") or []
+        if history:
+            history_df = pd.DataFrame(history)[
+                ["date", "backlog_orders", "orders_created", "orders_completed"]
+            ].melt("date", var_name="indicador", value_name="valor")
+            
+            chart = alt.Chart(history_df).mark_line(point=True).encode(
+                x="date:T",
+                y="valor:Q",
+                color="indicador:N",
+                tooltip=["date", "indicador", "valor"]
+            ).properties(
+                width=700,
+                height=300,
+                title="Indicadores diarios"
+            )
+            
+            st.altair_chart(chart, use_container_width=True)
+    
     def render_charts(self):
         """Renderiza las gráficas de análisis."""
         st.subheader("📊 Análisis")
         
+        # Indicadores acumulados (calculados de forma incremental por el simulador)
+        self.render_kpis()
+        
         # Crear datasets para las gráficas
         if not st.session_state.events:
             st.info("No hay suficientes datos para mostrar gráficas. Avance algunos días en la simulación.")
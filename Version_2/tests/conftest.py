@@ -0,0 +1,52 @@
+import pytest
+
+import config.di_container as di_container
+from config.settings import DEFAULT_CONFIG
+
+
+@pytest.fixture
+def config():
+    """Configuración por defecto con semilla y fecha fijas."""
+    return dict(DEFAULT_CONFIG, seed=7, initial_day="2025-01-01")
+
+
+@pytest.fixture
+def make_sqlite_container(tmp_path, monkeypatch):
+    """Fábrica de contenedores con base de datos SQLite propia en un directorio temporal."""
+    containers = []
+
+    def make(config):
+        directory = tmp_path / str(len(containers))
+        directory.mkdir()
+        monkeypatch.setattr(di_container, "DB_FILE", directory / "simulator.db")
+        monkeypatch.setattr(di_container, "CHECKPOINT_FILE", directory / "checkpoint.json")
+        container = di_container.DIContainer(config)
+        container.initialize()
+        container.seed_database()
+        containers.append(container)
+        return container
+
+    yield make
+    for container in containers:
+        container.db.disconnect()
+
+
+@pytest.fixture
+def sqlite_container(make_sqlite_container, config):
+    """Contenedor con base de datos SQLite y los datos iniciales por defecto."""
+    return make_sqlite_container(config)
+
+
+@pytest.fixture
+def headless_container(config):
+    """Contenedor en memoria con los datos iniciales por defecto."""
+    container = di_container.HeadlessContainer(config)
+    container.initialize()
+    container.seed_database()
+    return container
+
+
+@pytest.fixture(params=["headless_container", "sqlite_container"])
+def container(request):
+    """Contenedor con los datos iniciales, en memoria y con SQLite."""
+    return request.getfixturevalue(request.param)
@@ -0,0 +1,78 @@
+import pytest
+
+from domain.models import BOM, Product
+
+
+def add_products(container, *product_ids):
+    for product_id in product_ids:
+        container.product_repository.add(Product(id=product_id, name=f"conjunto_{product_id}", type="finished"))
+
+
+def add_bom(container, *rows):
+    for finished_product_id, material_id, quantity in rows:
+        container.bom_repository.add(
+            BOM(finished_product_id=finished_product_id, material_id=material_id, quantity=quantity)
+        )
+
+
+@pytest.fixture
+def shared_subassembly(container):
+    """El subconjunto 13 llega al producto 14 a través de los padres 11 y 12."""
+    add_products(container, 11, 12, 13, 14)
+    add_bom(
+        container,
+        (13, 8, 2), (13, 3, 1),
+        (11, 13, 1), (11, 9, 1),
+        (12, 13, 2),
+        (14, 11, 1), (14, 12, 1),
+    )
+    return container
+
+
+def test_cycle_is_detected(container):
+    add_products(container, 11, 12, 13)
+    add_bom(container, (11, 12, 1), (12, 13, 1), (13, 8, 1))
+    assert container.bom_service.get_requirements(11) == {8: 1}
+
+    # La fila que cierra el ciclo invalida los requisitos ya calculados
+    add_bom(container, (13, 11, 1))
+    with pytest.raises(ValueError, match="11 -> 12 -> 13 -> 11"):
+        container.bom_service.get_requirements(11)
+    with pytest.raises(ValueError, match="Ciclo"):
+        container.bom_service.calculate_materials_needed(12, 5)
+
+
+def test_shared_subassembly_is_counted_through_each_parent(shared_subassembly, monkeypatch):
+    container = shared_subassembly
+    reads = []
+    get_by_finished_product = container.bom_repository.get_by_finished_product
+
+    def counting_get_by_finished_product(product_id):
+        reads.append(product_id)
+        return get_by_finished_product(product_id)
+
+    monkeypatch.setattr(container.bom_repository, "get_by_finished_product", counting_get_by_finished_product)
+
+    assert container.bom_service.calculate_materials_needed(14, 2) == {8: 12, 3: 6, 9: 2}
+    # El subconjunto compartido se descompone una sola vez
+    assert reads.count(13) == 1
+    assert container.bom_service.get_requirements(12) == {8: 4, 3: 2}
+    assert reads.count(13) == 1
+
+
+def test_bom_change_invalidates_every_product_that_contains_it(shared_subassembly):
+    container = shared_subassembly
+    bom_service = container.bom_service
+    assert bom_service.get_requirements(14) == {8: 6, 3: 3, 9: 1}
+    unrelated = bom_service.get_requirements(1)
+
+    container.bom_repository.update(BOM(finished_product_id=13, material_id=8, quantity=5))
+    assert bom_service.get_requirements(14) == {8: 15, 3: 3, 9: 1}
+    assert bom_service.get_requirements(11) == {8: 5, 3: 1, 9: 1}
+
+    add_bom(container, (13, 4, 1))
+    assert bom_service.get_requirements(14) == {8: 15, 3: 3, 9: 1, 4: 3}
+    assert bom_service.get_requirements(12) == {8: 10, 3: 2, 4: 2}
+
+    # Los productos que no contienen el subconjunto conservan su caché
+    assert bom_service.get_requirements(1) is unrelated
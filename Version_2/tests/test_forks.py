@@ -0,0 +1,99 @@
+import pytest
+
+from application.forks import SimulationForkRegistry, compare_summaries
+
+
+def release_feasible_orders(service):
+    """Libera todas las órdenes pendientes que tienen material suficiente."""
+    for order_id in sorted(service.feasibility_index.feasible_orders()):
+        if service.feasibility_index.is_feasible(order_id):
+            service.release_order_to_production(order_id)
+
+
+def database_state(container):
+    """Resumen de lo persistido: órdenes, compras, stock, eventos e indicadores."""
+    return {
+        "summary": container.simulation_service.get_state_summary(),
+        "events": len(container.event_repository.get_all()),
+        "kpi_days": [rollup.date for rollup in container.kpi_repository.get_all()],
+    }
+
+
+@pytest.fixture
+def main_service(sqlite_container):
+    """Simulación principal con algunos días simulados y órdenes en fabricación."""
+    service = sqlite_container.simulation_service
+    service.advance_days(3)
+    release_feasible_orders(service)
+    return service
+
+
+def test_fork_continues_the_same_trajectory(sqlite_container, main_service):
+    fork = sqlite_container.fork()
+    branch = fork.simulation_service
+
+    assert branch.get_current_date() == main_service.get_current_date()
+    assert database_state(fork) == database_state(sqlite_container)
+
+    # Misma base de datos, reloj, colas y flujos aleatorios: mismo futuro
+    assert branch.advance_days(5) == main_service.advance_days(5)
+    assert branch.get_state_summary() == main_service.get_state_summary()
+    assert branch.get_kpis() == main_service.get_kpis()
+
+
+def test_fork_changes_do_not_reach_the_main_simulation(sqlite_container, main_service):
+    checkpoint = main_service.checkpoint_store.load()
+    main_before = database_state(sqlite_container)
+    date_before = main_service.get_current_date()
+
+    fork = sqlite_container.fork()
+    branch = fork.simulation_service
+    branch.create_purchase_order(supplier_id=1, product_id=3, quantity=50)
+    branch.advance_days(4)
+    release_feasible_orders(branch)
+
+    assert database_state(fork) != main_before
+    assert database_state(sqlite_container) == main_before
+    assert main_service.get_current_date() == date_before
+    # Las ramas no guardan checkpoints ni pisan el de la simulación principal
+    assert branch.checkpoint_store is None
+    assert main_service.checkpoint_store.load() == checkpoint
+
+
+def test_registry_creates_lists_and_deletes_forks(sqlite_container, main_service):
+    registry = SimulationForkRegistry(lambda: sqlite_container.fork().simulation_service, max_forks=2)
+
+    first = registry.create()
+    second = registry.create()
+    assert first != second
+    with pytest.raises(ValueError):
+        registry.create()
+
+    registry.get(second).advance_days(2)
+    today = main_service.get_current_date()
+    assert registry.list() == [
+        {"fork_id": first, "current_date": today.isoformat()},
+        {"fork_id": second, "current_date": registry.get(second).get_current_date().isoformat()},
+    ]
+    assert registry.get(second).get_current_date() > today
+
+    registry.delete(first)
+    with pytest.raises(KeyError):
+        registry.get(first)
+    with pytest.raises(KeyError):
+        registry.delete(first)
+    # Al borrar una rama queda sitio para otra, con un ID nuevo
+    assert registry.create() not in (first, second)
+
+
+def test_compare_summaries_reports_branch_minus_base():
+    base = {"current_date": "2025-01-04", "pending_orders": 5, "inventory": {"kit_piezas": 30, "extrusor": 40}}
+    branch = {"current_date": "2025-01-06", "pending_orders": 2, "inventory": {"kit_piezas": 80, "pcb": 5}}
+
+    comparison = compare_summaries(base, branch)
+
+    assert comparison["base"] is base and comparison["fork"] is branch
+    assert comparison["difference"] == {
+        "pending_orders": -3,
+        "inventory": {"extrusor": -40, "kit_piezas": 50, "pcb": 5},
+    }
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from domain.models import BOM, EventType, Product
+
+
+def stock_levels(container):
+    return {stock.product_id: stock.quantity for stock in container.stock_repository.get_all()}
+
+
+def stock_events(container, since):
+    """Detalles de los eventos de cambio de stock registrados desde la posición indicada."""
+    return [
+        json.loads(event.details)
+        for event in container.event_repository.get_all()[since:]
+        if event.type == EventType.STOCK_LEVEL_CHANGED
+    ]
+
+
+def test_consume_many_is_all_or_nothing(container):
+    stock_before = stock_levels(container)
+    events_before = len(container.event_repository.get_all())
+
+    with pytest.raises(ValueError, match="cables_conexion"):
+        container.inventory_service.consume_many({3: 10, 8: 101}, "Prueba")
+
+    assert stock_levels(container) == stock_before
+    assert len(container.event_repository.get_all()) == events_before
+    assert container.simulation_service.stock_vector.get(3) == stock_before[3]
+    assert container.reservation_service.get_available(3) == stock_before[3]
+
+    assert container.inventory_service.consume_many({3: 10, 8: 100}, "Prueba") == {3: 20, 8: 0}
+    assert stock_levels(container) == {**stock_before, 3: 20, 8: 0}
+
+
+def test_consume_many_notifies_listeners_only_on_success(container):
+    calls = []
+    container.inventory_service.add_stock_listener(lambda *change: calls.append(change))
+
+    with pytest.raises(ValueError):
+        container.inventory_service.consume_many({3: 10, 8: 101}, "Prueba")
+    assert calls == []
+
+    container.inventory_service.consume_many({3: 10, 8: 40}, "Prueba")
+    assert sorted(calls) == [(3, 30, 20), (8, 100, 60)]
+
+
+def test_material_reached_twice_is_consumed_for_the_combined_quantity(container):
+    # El producto 12 lleva cables (8) directamente y a través del subconjunto 11
+    container.product_repository.add(Product(id=11, name="mazo_cables", type="finished"))
+    container.product_repository.add(Product(id=12, name="P3D-Mini", type="finished"))
+    container.bom_repository.add(BOM(finished_product_id=11, material_id=8, quantity=2))
+    container.bom_repository.add(BOM(finished_product_id=12, material_id=11, quantity=1))
+    container.bom_repository.add(BOM(finished_product_id=12, material_id=8, quantity=1))
+    manufacturing = container.manufacturing_service
+
+    # Cada línea por separado cabe en las 100 unidades de stock, pero no la suma
+    too_large = manufacturing.create_manufacturing_order(12, 40)
+    with pytest.raises(ValueError, match="cables_conexion"):
+        manufacturing.release_order_to_production(too_large.id)
+    assert stock_levels(container)[8] == 100
+
+    events_before = len(container.event_repository.get_all())
+    order = manufacturing.create_manufacturing_order(12, 30)
+    manufacturing.release_order_to_production(order.id)
+
+    assert stock_levels(container)[8] == 10
+    assert container.simulation_service.stock_vector.get(8) == 10
+    assert [(event["product_id"], event["change"]) for event in stock_events(container, events_before)] == [(8, -90)]
@@ -0,0 +1,139 @@
+import statistics
+from datetime import date, timedelta
+
+import pytest
+
+import config.di_container as di_container
+from application.kpis import KPIAccumulator
+from domain.models import ManufacturingOrder, ManufacturingOrderStatus, StockCurrent
+
+
+DAYS = 30
+
+REPLENISHMENT = [
+    {"product_id": 3, "type": "sS", "reorder_point": 20, "order_up_to": 60},
+    {"product_id": 8, "type": "sQ", "reorder_point": 40, "order_quantity": 50},
+]
+
+
+def order(order_id, quantity):
+    """Orden de fabricación pendiente de P3D-Classic."""
+    return ManufacturingOrder(
+        id=order_id, creation_date="2025-01-01T00:00:00", product_id=1,
+        quantity=quantity, status=ManufacturingOrderStatus.PENDING
+    )
+
+
+@pytest.fixture
+def accumulator():
+    """Acumuladores con dos materiales, uno de ellos sin stock."""
+    return KPIAccumulator.bootstrap(
+        today=date(2025, 1, 1), orders_created=0, pending_orders=[], completed_orders=[],
+        stock=[StockCurrent(product_id=3, quantity=10), StockCurrent(product_id=4, quantity=0)],
+        material_spend=0.0
+    )
+
+
+def test_accumulators_match_a_recount_of_the_run(config):
+    container = di_container.HeadlessContainer(dict(config, replenishment=REPLENISHMENT))
+    container.initialize()
+    container.seed_database()
+    service = container.simulation_service
+
+    # Stock al cierre de cada día y día simulado de creación de cada orden
+    stock_by_day, created_on = [], {}
+
+    def record_day(state):
+        stock_by_day.append({stock.product_id: stock.quantity for stock in container.stock_repository.get_all()})
+        for pending in container.manufacturing_service.get_pending_orders():
+            created_on.setdefault(pending.id, state.current_date - timedelta(days=1))
+        for order_id in sorted(service.feasibility_index.feasible_orders()):
+            if service.feasibility_index.is_feasible(order_id):
+                service.release_order_to_production(order_id)
+
+    service.simulator.register_day_advanced_callback(record_day)
+    service.advance_days(DAYS)
+
+    today = service.get_current_date()
+    kpis = service.simulator.kpis.snapshot(today)
+    orders = container.manufacturing_repository.get_all()
+    completed = [o for o in orders if o.status == ManufacturingOrderStatus.COMPLETED]
+    pending = container.manufacturing_service.get_pending_orders()
+
+    assert kpis["days"] == DAYS
+    assert kpis["orders_created"] == len(orders)
+    assert kpis["orders_completed"] == len(completed)
+    assert kpis["units_completed"] == sum(o.quantity for o in completed)
+    assert kpis["backlog_orders"] == len(pending)
+    assert kpis["backlog_units"] == sum(o.quantity for o in pending)
+    assert kpis["backlog_avg_age_days"] == pytest.approx(
+        statistics.mean((today - created_on[o.id]).days for o in pending) if pending else 0.0
+    )
+    assert kpis["material_spend"] == pytest.approx(container.purchasing_service.get_total_spend())
+
+    products = set().union(*stock_by_day)
+    assert kpis["average_inventory"] == pytest.approx({
+        product_id: sum(day.get(product_id, 0) for day in stock_by_day) / DAYS
+        for product_id in products
+    })
+    stockouts = {
+        product_id: sum(1 for day in stock_by_day if product_id in day and day[product_id] <= 0)
+        for product_id in products
+    }
+    assert kpis["stockout_days"] == {product_id: days for product_id, days in stockouts.items() if days}
+
+    # Los resúmenes diarios persistidos suman los mismos totales
+    rollups = container.kpi_repository.get_all()
+    assert len(rollups) == DAYS
+    assert sum(r.orders_created for r in rollups) == len(orders)
+    assert sum(r.orders_completed for r in rollups) == len(completed)
+
+
+def test_close_day_reports_the_day_and_resets_its_counters(accumulator):
+    accumulator.order_created(order(1, 4), date(2025, 1, 1))
+    accumulator.order_created(order(2, 6), date(2025, 1, 2))
+    accumulator.order_released(order(1, 4))
+    accumulator.order_completed(order(1, 4))
+    accumulator.purchase_created(90.0)
+    accumulator.stock_changed(3, 10, 7)
+
+    rollup = accumulator.close_day(date(2025, 1, 3), [3, 4])
+    assert (rollup.days, rollup.orders_created, rollup.orders_completed, rollup.units_completed) == (1, 2, 1, 4)
+    assert (rollup.backlog_orders, rollup.backlog_units, rollup.backlog_avg_age_days) == (1, 6, 1.0)
+    assert (rollup.material_spend, rollup.inventory_units, rollup.stockout_materials) == (90.0, 7, 1)
+
+    rollup = accumulator.close_day(date(2025, 1, 4), [3, 4])
+    assert (rollup.orders_created, rollup.orders_completed, rollup.material_spend) == (0, 0, 0.0)
+    assert rollup.backlog_avg_age_days == 2.0
+
+
+def test_skipped_days_accumulate_like_consecutive_closes(accumulator):
+    day_by_day = accumulator.copy()
+    for offset in (1, 2, 3):
+        day_by_day.close_day(date(2025, 1, 1) + timedelta(days=offset), [3, 4])
+
+    accumulator.skip_days(2)
+    rollup = accumulator.close_day(date(2025, 1, 4), [3, 4], skipped_days=2)
+
+    assert rollup.days == 3
+    assert accumulator.snapshot(date(2025, 1, 4)) == day_by_day.snapshot(date(2025, 1, 4))
+    assert accumulator.snapshot(date(2025, 1, 4))["stockout_days"] == {4: 3}
+
+
+def test_state_round_trip_and_independent_copies(accumulator):
+    accumulator.order_created(order(1, 4), date(2025, 1, 1))
+    accumulator.close_day(date(2025, 1, 2), [3, 4])
+    accumulator.order_created(order(2, 6), date(2025, 1, 2))
+
+    restored = KPIAccumulator()
+    restored.set_state(accumulator.get_state())
+    assert restored.get_state() == accumulator.get_state()
+    assert restored.snapshot(date(2025, 1, 3)) == accumulator.snapshot(date(2025, 1, 3))
+
+    # Una copia no ve los cambios posteriores del original
+    clone = accumulator.copy()
+    state = clone.get_state()
+    accumulator.order_released(order(2, 6))
+    accumulator.stock_changed(3, 10, 0)
+    accumulator.close_day(date(2025, 1, 3), [3, 4])
+    assert clone.get_state() == state
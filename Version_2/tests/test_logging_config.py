@@ -0,0 +1,47 @@
+import atexit
+import logging
+from functools import partial
+
+import pytest
+
+from application.replications import ReplicationRunner
+from config.di_container import create_headless_simulation
+from config.logging_config import configure_logging, configure_worker_logging
+from domain.models import SimulationConfig
+
+
+def warning_simulation(config):
+    """Fábrica de réplicas que deja un aviso en el log del proceso."""
+    logging.getLogger("3d_printer_simulator.test").warning("réplica con semilla %s", config.seed)
+    return create_headless_simulation(config)
+
+
+@pytest.fixture
+def application_logging():
+    """Logging de la aplicación (cola y listener), restaurando el anterior al terminar."""
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    listener = configure_logging("INFO", log_file=None)
+    yield
+    atexit.unregister(listener.stop)
+    listener.stop()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def test_pool_workers_keep_their_log_records(application_logging, config, capfd):
+    simulation_config = SimulationConfig(**config)
+    runner = ReplicationRunner(
+        warning_simulation, max_workers=2,
+        worker_initializer=partial(configure_worker_logging, "INFO")
+    )
+
+    configs = [simulation_config.model_copy(update={"seed": seed}) for seed in (101, 102)]
+    runner.map(configs, 1)
+
+    output = capfd.readouterr().out
+    assert "réplica con semilla 101" in output
+    assert "réplica con semilla 102" in output
@@ -0,0 +1,110 @@
+from datetime import date, timedelta
+
+import config.di_container as di_container
+from application.profiling import PhaseProfiler, _NO_PHASE
+
+
+DAY = date(2025, 1, 2)
+
+
+class SQLCounter:
+    """Contadores SQL simulados: (sentencias, filas escritas) acumuladas."""
+
+    def __init__(self):
+        self.statements = 0
+        self.rows = 0
+        self.reads = 0
+
+    def write(self, statements, rows):
+        self.statements += statements
+        self.rows += rows
+
+    def __call__(self):
+        self.reads += 1
+        return self.statements, self.rows
+
+
+def test_enabled_profiler_records_sql_per_phase():
+    sql = SQLCounter()
+    profiler = PhaseProfiler(enabled=True, sql_stats=sql)
+
+    profiler.start_day()
+    with profiler.phase("demand"):
+        sql.write(2, 1)
+    with profiler.phase("kpis"):
+        sql.write(3, 0)
+    with profiler.phase("demand"):
+        sql.write(1, 4)
+    sql.write(1, 1)  # Fuera de cualquier fase
+    profiler.end_day(DAY)
+
+    # El commit llega después del cierre y se imputa al último día
+    with profiler.phase("commit"):
+        sql.write(1, 0)
+
+    last_day = profiler.summary()["last_day"]
+    assert last_day["date"] == DAY.isoformat()
+    counts = {
+        name: (phase["statements"], phase["rows_written"])
+        for name, phase in last_day["phases"].items()
+    }
+    assert counts == {"demand": (3, 5), "kpis": (3, 0), "other": (1, 1), "commit": (1, 0), "total": (8, 6)}
+    assert all(phase["ms"] >= 0 for phase in last_day["phases"].values())
+
+
+def test_disabled_profiler_does_nothing():
+    sql = SQLCounter()
+    profiler = PhaseProfiler(enabled=False, sql_stats=sql)
+
+    profiler.start_day()
+    # El mismo contexto vacío para cualquier fase, sin medir nada
+    assert profiler.phase("demand") is _NO_PHASE
+    assert profiler.phase("kpis") is _NO_PHASE
+    with profiler.phase("demand"):
+        sql.write(2, 1)
+    profiler.end_day(DAY)
+
+    assert sql.reads == 0
+    assert profiler.summary() == {"enabled": False, "window_days": 0, "last_day": None, "phases": {}}
+
+
+def test_window_keeps_only_the_last_days():
+    sql = SQLCounter()
+    profiler = PhaseProfiler(enabled=True, window=3, sql_stats=sql)
+
+    for day in range(1, 6):
+        profiler.start_day()
+        with profiler.phase("completions"):
+            sql.write(1, day)
+        profiler.end_day(DAY + timedelta(days=day))
+
+    summary = profiler.summary()
+    assert summary["window_days"] == 3
+    assert summary["last_day"]["date"] == (DAY + timedelta(days=5)).isoformat()
+    completions = summary["phases"]["completions"]
+    assert completions["days"] == 3
+    # Solo cuentan los días 3, 4 y 5
+    assert completions["mean_rows_written"] == 4
+    assert sum(completions["histogram"].values()) == 3
+
+    profiler.reset()
+    assert profiler.summary()["window_days"] == 0
+
+
+def test_service_profiles_each_simulated_day(make_sqlite_container, config, monkeypatch):
+    monkeypatch.setattr(di_container, "PROFILE_PHASES", True)
+    service = make_sqlite_container(config).simulation_service
+
+    service.advance_days(3)
+
+    summary = service.profiler.summary()
+    assert summary["enabled"] and summary["window_days"] == 3
+    # La demanda del lote se genera el primer día; el commit, al final del último
+    assert "demand" in summary["phases"]
+    phases = summary["last_day"]["phases"]
+    assert {"order_creation", "kpis", "callbacks", "commit", "other", "total"} <= set(phases)
+    # Las filas del día (órdenes, eventos, indicadores) se reparten entre las fases
+    assert phases["total"]["rows_written"] > 0
+    assert phases["total"]["rows_written"] == sum(
+        phase["rows_written"] for name, phase in phases.items() if name != "total"
+    )
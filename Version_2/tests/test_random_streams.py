@@ -0,0 +1,100 @@
+import logging
+
+import numpy as np
+
+from application.random_streams import STREAM_NAMES, RandomStreams
+from application.replications import ReplicationRunner
+from config.di_container import create_headless_simulation
+from domain.models import SimulationConfig
+
+
+def draw(streams, size=50):
+    """Muestra de cada flujo con las mismas llamadas que hace el simulador."""
+    return {
+        name: streams.integers(name, 0, 1000, size).tolist()
+        for name in STREAM_NAMES
+    }
+
+
+def test_same_seed_gives_same_streams():
+    assert draw(RandomStreams(42)) == draw(RandomStreams(42))
+    assert draw(RandomStreams(42)) != draw(RandomStreams(43))
+
+    # Sin semilla se toma entropía del sistema, pero la efectiva la reproduce
+    streams = RandomStreams()
+    assert draw(RandomStreams(streams.seed)) == draw(streams)
+
+
+def test_streams_are_independent():
+    reference = draw(RandomStreams(42))
+
+    streams = RandomStreams(42)
+    # Consumir más números de un flujo no desplaza a los demás
+    streams.integers("product_mix", 0, 1000, 500)
+    streams.normal("demand_count", 0.0, 1.0, 7)
+    sample = draw(streams)
+    for name in ("quantity", "lead_time"):
+        assert sample[name] == reference[name]
+    assert sample["product_mix"] != reference["product_mix"]
+
+    # Flujos distintos no repiten la misma secuencia
+    values = list(reference.values())
+    assert all(first != second for index, first in enumerate(values) for second in values[index + 1:])
+
+
+def test_antithetic_streams_mirror_the_base_streams():
+    base = RandomStreams(42)
+    mirrored = RandomStreams(42, antithetic=True)
+
+    z = base.normal("demand_count", 0.0, 1.0, 100)
+    assert np.array_equal(mirrored.normal("demand_count", 10.0, 2.0, 100), 10.0 - 2.0 * z)
+
+    low, high = 1, 11
+    values = base.integers("quantity", low, high, 1000)
+    mirrored_values = mirrored.integers("quantity", low, high, 1000)
+    assert ((values + mirrored_values == low + high - 1) | (mirrored_values == high - 1)).all()
+    assert mirrored_values.min() >= low and mirrored_values.max() < high
+
+
+def test_state_round_trip_resumes_the_sequence():
+    streams = RandomStreams(42)
+    streams.integers("quantity", 0, 1000, 10)
+    state = streams.get_state()
+    expected = draw(streams)
+
+    restored = RandomStreams(7)
+    restored.set_state(state)
+    assert draw(restored) == expected
+
+
+def test_same_master_seed_gives_identical_replications(config):
+    simulation_config = SimulationConfig(**config)
+    runner = ReplicationRunner(create_headless_simulation, max_workers=1)
+
+    samples = runner.samples(simulation_config, 20, 0, 3)
+    assert runner.samples(simulation_config, 20, 0, 3) == samples
+    # La réplica i tiene siempre la misma semilla, aunque se ejecute por lotes
+    assert runner.samples(simulation_config, 20, 1, 2) == samples[1:]
+    # Réplicas distintas no comparten la demanda
+    assert samples[0] != samples[1] != samples[2]
+
+
+def test_replications_do_not_depend_on_the_number_of_processes(config):
+    simulation_config = SimulationConfig(**config)
+    sequential = ReplicationRunner(create_headless_simulation, max_workers=1)
+    parallel = ReplicationRunner(create_headless_simulation, max_workers=2)
+
+    assert parallel.samples(simulation_config, 10, 0, 4) == sequential.samples(simulation_config, 10, 0, 4)
+
+
+def test_serial_replications_keep_the_simulation_log_level(config):
+    simulation_logger = logging.getLogger("3d_printer_simulator.simulation")
+    previous = simulation_logger.level
+    simulation_logger.setLevel(logging.DEBUG)
+    try:
+        runner = ReplicationRunner(create_headless_simulation, max_workers=1)
+        runner.samples(SimulationConfig(**config), 5, 0, 2)
+        # Las réplicas se silencian solo mientras se ejecutan
+        assert simulation_logger.level == logging.DEBUG
+    finally:
+        simulation_logger.setLevel(previous)
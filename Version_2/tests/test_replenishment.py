@@ -0,0 +1,134 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import config.di_container as di_container
+from application.replenishment import InventoryPosition, ReplenishmentEngine
+from domain.models import ReplenishmentPolicy, Supplier
+
+
+START = date(2025, 1, 1)
+
+
+def supplier_for(policy):
+    """Proveedor ficticio del producto de la política."""
+    return Supplier(id=policy.product_id, name="proveedor", product_id=policy.product_id, unit_cost=1.0, lead_time_days=1)
+
+
+def make_engine(*policies):
+    """Motor sobre una posición de inventario controlada por el test (sin compras abiertas)."""
+    available = {}
+    position = InventoryPosition(lambda product_id: available.get(product_id, 0), [])
+    engine = ReplenishmentEngine(
+        [ReplenishmentPolicy.model_validate(policy) for policy in policies], supplier_for, position, START
+    )
+    return engine, available
+
+
+def order_for(engine, available, product_id, quantity, today=START):
+    """Cantidad que pide el motor cuando la posición del producto pasa a quantity."""
+    available[product_id] = quantity
+    engine.position.available_changed(product_id)
+    orders = engine.evaluate(today)
+    assert all(supplier.product_id == product_id for supplier, _, _ in orders)
+    return sum(ordered for _, _, ordered in orders)
+
+
+def test_reorder_point_quantity_orders_multiples_of_q():
+    engine, available = make_engine({"product_id": 8, "type": "sQ", "reorder_point": 40, "order_quantity": 50})
+
+    assert order_for(engine, available, 8, 41) == 0
+    # En s justo ya se pide
+    assert order_for(engine, available, 8, 40) == 50
+    assert order_for(engine, available, 8, 0) == 50
+    # Se piden los múltiplos de Q necesarios para superar s
+    assert order_for(engine, available, 8, -20) == 100
+
+
+def test_reorder_point_order_up_to_orders_up_to_s():
+    engine, available = make_engine({"product_id": 3, "type": "sS", "reorder_point": 20, "order_up_to": 60})
+
+    assert order_for(engine, available, 3, 21) == 0
+    assert order_for(engine, available, 3, 20) == 40
+    assert order_for(engine, available, 3, 7) == 53
+    assert order_for(engine, available, 3, -5) == 65
+
+
+def test_continuous_review_waits_for_a_position_change():
+    engine, available = make_engine({"product_id": 3, "type": "sS", "reorder_point": 20, "order_up_to": 60})
+    available[3] = 10
+
+    # La primera evaluación revisa todos los productos
+    assert engine.next_evaluation_day(START) == 1
+    assert [(product_id, quantity) for _, product_id, quantity in engine.evaluate(START)] == [(3, 50)]
+    # Sin cambios de posición no se vuelve a evaluar
+    assert engine.evaluate(START + timedelta(days=1)) == []
+    assert engine.next_evaluation_day(START + timedelta(days=1)) == float("inf")
+
+    # Una compra emitida sube lo pendiente de recibir
+    engine.position.on_order[3] = 50
+    assert order_for(engine, available, 3, 10) == 0
+
+
+def test_periodic_review_orders_only_on_review_days():
+    engine, available = make_engine(
+        {"product_id": 7, "type": "periodic", "review_period_days": 7, "order_up_to": 25}
+    )
+    available[7] = 5
+
+    ordered = {}
+    for offset in range(1, 22):
+        today = START + timedelta(days=offset)
+        orders = engine.evaluate(today)
+        if orders:
+            ordered[offset] = [quantity for _, _, quantity in orders]
+        available[7] -= 1
+    # Solo se pide en los días de revisión, cada 7 desde el primero, hasta S
+    # desde la posición de ese día (-1, -8 y -15: baja una unidad diaria)
+    assert ordered == {7: [26], 14: [33], 21: [40]}
+
+    assert engine.next_evaluation_day(START + timedelta(days=1)) == 6
+    assert engine.next_evaluation_day(START + timedelta(days=7)) == 7
+
+
+@pytest.mark.parametrize("policies", [
+    [{"product_id": 8, "type": "sQ", "reorder_point": 40, "order_quantity": 0}],
+    [{"product_id": 3, "type": "sS", "reorder_point": 20, "order_up_to": 20}],
+    [{"product_id": 7, "type": "periodic", "review_period_days": 0, "order_up_to": 25}],
+    [{"product_id": 7, "type": "periodic", "review_period_days": 7}],
+    [
+        {"product_id": 3, "type": "sS", "reorder_point": 20, "order_up_to": 60},
+        {"product_id": 3, "type": "sQ", "reorder_point": 20, "order_quantity": 10},
+    ],
+])
+def test_invalid_policies_are_rejected(policies):
+    with pytest.raises(ValueError):
+        make_engine(*policies)
+
+
+def test_simulation_issues_the_policy_orders_on_the_simulated_day(config):
+    config = dict(
+        config, demand_mean=0.0, demand_std_dev=0.0,
+        replenishment=[
+            {"product_id": 3, "type": "sS", "reorder_point": 30, "order_up_to": 60},
+            {"product_id": 8, "type": "sQ", "reorder_point": 100, "order_quantity": 50},
+            {"product_id": 7, "type": "periodic", "review_period_days": 7, "order_up_to": 25, "supplier_id": 5},
+        ]
+    )
+    container = di_container.HeadlessContainer(config)
+    container.initialize()
+    container.seed_database()
+
+    container.simulation_service.advance_days(14)
+
+    start = date.fromisoformat(config["initial_day"])
+    purchases = [
+        (
+            (datetime.fromisoformat(order.issue_date).date() - start).days,
+            order.product_id, order.supplier_id, order.quantity
+        )
+        for order in container.purchase_repository.get_all()
+    ]
+    # Stock inicial: 30 kits (= s), 100 cables (= s) y 20 sensores. El día 14
+    # los sensores ya están en 25 y no se piden más
+    assert sorted(purchases) == [(1, 3, 1, 30), (1, 8, 6, 50), (7, 7, 5, 5)]
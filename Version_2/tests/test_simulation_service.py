@@ -0,0 +1,420 @@
+import logging
+from datetime import date, timedelta
+
+import pytest
+
+import application.services as services_module
+import config.di_container as di_container
+from application.kpis import KPIAccumulator
+from application.release_planner import ReleasePlan
+from domain.models import ManufacturingOrderStatus, PurchaseOrderStatus
+
+
+REPLENISHMENT = [
+    {"product_id": 3, "type": "sS", "reorder_point": 20, "order_up_to": 60},
+    {"product_id": 8, "type": "sQ", "reorder_point": 40, "order_quantity": 50},
+]
+
+
+def release_feasible_orders(service):
+    """Libera todas las órdenes que el índice de viabilidad da por liberables."""
+    for order_id in sorted(service.feasibility_index.feasible_orders()):
+        if service.feasibility_index.is_feasible(order_id):
+            assert service.release_order_to_production(order_id)["success"]
+
+
+def fail_on_close(service, day):
+    """Hace que el cierre del día indicado (1 = el siguiente) lance un error."""
+    close_day = service.simulator._close_day
+    calls = []
+
+    def failing_close_day():
+        calls.append(day)
+        if len(calls) == day:
+            raise RuntimeError("fallo simulado")
+        return close_day()
+
+    service.simulator._close_day = failing_close_day
+
+
+def database_state(container):
+    """Estado persistido: stock, órdenes por estado, reservas y eventos."""
+    return {
+        "stock": {stock.product_id: stock.quantity for stock in container.stock_repository.get_all()},
+        "manufacturing": {
+            status.value: sorted(order.id for order in container.manufacturing_repository.get_by_status(status.value))
+            for status in ManufacturingOrderStatus
+        },
+        "purchases": {
+            status.value: sorted(order.id for order in container.purchase_repository.get_by_status(status.value))
+            for status in PurchaseOrderStatus
+        },
+        "reservations": sorted(
+            (reservation.reference, reservation.product_id, reservation.quantity)
+            for reservation in container.reservation_repository.get_all()
+        ),
+        "events": len(container.event_repository.get_all()),
+    }
+
+
+def memory_state(container):
+    """Estado en memoria del simulador y de los índices mantenidos."""
+    service = container.simulation_service
+    return {
+        "checkpoint": service.simulator.create_checkpoint().model_dump(mode="json"),
+        "stock_vector": service.stock_vector.values.tolist(),
+        "available": {
+            product.id: container.reservation_service.get_available(product.id)
+            for product in container.product_repository.get_all()
+        },
+        "feasible": sorted(service.feasibility_index.feasible_orders()),
+        "pending": [order.id for order in service.feasibility_index.pending_orders()],
+        "on_order": (
+            dict(service.simulator.replenishment.position.on_order)
+            if service.simulator.replenishment is not None else None
+        ),
+    }
+
+
+def assert_memory_matches_database(container):
+    """Comprueba que los índices en memoria describen lo mismo que la base de datos."""
+    service = container.simulation_service
+    stock = {stock.product_id: stock.quantity for stock in container.stock_repository.get_all()}
+    reserved = {}
+    for reservation in container.reservation_repository.get_all():
+        reserved[reservation.product_id] = reserved.get(reservation.product_id, 0) + reservation.quantity
+    for product_id, quantity in stock.items():
+        assert service.stock_vector.get(product_id) == quantity
+        assert container.reservation_service.get_available(product_id) == quantity - reserved.get(product_id, 0)
+
+    pending = container.manufacturing_service.get_pending_orders()
+    assert [order.id for order in service.feasibility_index.pending_orders()] == [order.id for order in pending]
+    in_production = {order.id for order in container.manufacturing_service.get_in_production_orders()}
+    assert set(service.simulator.production_queue) == in_production
+    open_purchases = {order.id for order in container.purchasing_service.get_pending_orders()}
+    assert {entry[1] for entry in service.simulator.purchase_queue} == open_purchases
+
+
+def test_failed_advance_restores_memory_to_database_state(make_sqlite_container, config):
+    config = dict(config, replenishment=REPLENISHMENT)
+    container = make_sqlite_container(config)
+    service = container.simulation_service
+    service.advance_days(2)
+    release_feasible_orders(service)
+
+    database_before = database_state(container)
+    memory_before = memory_state(container)
+    fail_on_close(service, 3)
+    with pytest.raises(RuntimeError):
+        service.advance_days(5)
+
+    assert database_state(container) == database_before
+    assert memory_state(container) == memory_before
+    assert_memory_matches_database(container)
+
+    # El avance repetido da el mismo resultado que una simulación sin fallos
+    reference = make_sqlite_container(config)
+    reference.simulation_service.advance_days(2)
+    release_feasible_orders(reference.simulation_service)
+    assert service.advance_days(5) == reference.simulation_service.advance_days(5)
+    assert database_state(container) == database_state(reference)
+    assert service.get_state_summary() == reference.simulation_service.get_state_summary()
+
+
+def test_failed_release_batch_leaves_database_and_memory_unchanged(sqlite_container, monkeypatch):
+    service = sqlite_container.simulation_service
+    service.advance_days(2)
+    assert len(service.plan_release_batch()["orders"]) >= 2
+
+    database_before = database_state(sqlite_container)
+    memory_before = memory_state(sqlite_container)
+    release = service.simulator.release_manufacturing_order
+    released = []
+
+    def failing_release(order_id):
+        if released:
+            raise RuntimeError("fallo simulado")
+        released.append(order_id)
+        return release(order_id)
+
+    monkeypatch.setattr(service.simulator, "release_manufacturing_order", failing_release)
+    result = service.plan_release_batch(execute=True)
+
+    assert not result["success"]
+    assert released
+    assert database_state(sqlite_container) == database_before
+    assert memory_state(sqlite_container) == memory_before
+    assert_memory_matches_database(sqlite_container)
+
+
+def test_release_batch_is_validated_before_releasing_anything(sqlite_container, monkeypatch):
+    service = sqlite_container.simulation_service
+    service.advance_days(2)
+
+    # Un plan que no cabe en el stock: los pedidos más grandes hasta llenar la capacidad
+    capacity = service.config.production_capacity_per_day
+    largest = sorted(service.feasibility_index.pending_orders(), key=lambda order: -order.quantity)[:capacity]
+    kit_stock = service.stock_vector.get(3)
+    assert sum(order.quantity for order in largest) > kit_stock
+    monkeypatch.setattr(
+        services_module, "plan_releases",
+        lambda *args: ReleasePlan(order_ids=sorted(order.id for order in largest), capacity=capacity)
+    )
+    release = service.simulator.release_manufacturing_order
+    released = []
+    monkeypatch.setattr(
+        service.simulator, "release_manufacturing_order",
+        lambda order_id: released.append(order_id) or release(order_id)
+    )
+
+    database_before = database_state(sqlite_container)
+    result = service.plan_release_batch(execute=True)
+
+    assert not result["success"]
+    assert "Stock insuficiente" in result["message"]
+    assert released == []
+    assert database_state(sqlite_container) == database_before
+
+
+def test_release_batch_releases_the_whole_plan(sqlite_container):
+    service = sqlite_container.simulation_service
+    service.advance_days(2)
+
+    result = service.plan_release_batch(execute=True)
+
+    released = {order["order_id"] for order in result["orders"]}
+    assert result["success"] and released
+    assert {order.id for order in sqlite_container.manufacturing_service.get_in_production_orders()} == released
+    assert_memory_matches_database(sqlite_container)
+
+
+def test_manual_purchase_order_is_issued_on_the_simulated_day(headless_container):
+    service = headless_container.simulation_service
+    service.advance_days(3)
+    today = service.get_current_date()
+    supplier = headless_container.supplier_selection.best(4)
+    stock_before = service.stock_vector.get(4)
+
+    result = service.create_purchase_order(supplier.id, 4, 12)
+
+    order = result["order"]
+    assert result["success"]
+    assert order["issue_date"].startswith(today.isoformat())
+    assert order["estimated_delivery_date"].startswith(
+        (today + timedelta(days=supplier.lead_time_days)).isoformat()
+    )
+
+    service.advance_days(supplier.lead_time_days)
+    assert headless_container.purchase_repository.get_by_id(order["id"]).status == PurchaseOrderStatus.RECEIVED
+    assert service.stock_vector.get(4) == stock_before + 12
+
+
+def test_mrp_nets_manual_purchase_order_inside_horizon(headless_container):
+    service = headless_container.simulation_service
+    service.advance_days(10)
+    before = service.run_mrp()
+    material = next(material for material in before["materials"] if material["product_id"] == 3)
+    supplier = min(headless_container.supplier_selection.get_suppliers(3), key=lambda s: s.lead_time_days)
+    assert supplier.lead_time_days < before["horizon_days"]
+    assert material["net_requirements"] > 20
+
+    assert service.create_purchase_order(supplier.id, 3, 20)["success"]
+    after = service.run_mrp()
+
+    netted = next(material for material in after["materials"] if material["product_id"] == 3)
+    assert netted["on_order"] == material["on_order"] + 20
+    assert netted["net_requirements"] == material["net_requirements"] - 20
+
+    def suggested(result):
+        return sum(entry["quantity"] for entry in result["suggested_purchase_orders"] if entry["product_id"] == 3)
+
+    assert suggested(after) == suggested(before) - 20
+
+
+def test_import_rebuilds_memory_state(config, tmp_path):
+    source = di_container.HeadlessContainer(config)
+    source.initialize()
+    source.seed_database()
+    source.simulation_service.advance_days(5)
+    dump = tmp_path / "dump.json"
+    source.data_exporter.export_all_data(str(dump))
+
+    target = di_container.HeadlessContainer(config)
+    target.initialize()
+    target.data_importer.import_all_data(str(dump))
+
+    assert_memory_matches_database(target)
+    assert sorted(target.simulation_service.feasibility_index.feasible_orders()) == sorted(
+        source.simulation_service.feasibility_index.feasible_orders()
+    )
+
+
+def test_rejected_operations_do_not_touch_memory_state(sqlite_container, monkeypatch, caplog):
+    service = sqlite_container.simulation_service
+    service.advance_days(2)
+    large = sqlite_container.manufacturing_service.create_manufacturing_order(1, 1000)
+
+    reloads = []
+    checkpoints = []
+    create_checkpoint = service.simulator.create_checkpoint
+    monkeypatch.setattr(service, "reload_state", lambda *args: reloads.append(args))
+    monkeypatch.setattr(
+        service.simulator, "create_checkpoint",
+        lambda: checkpoints.append(1) or create_checkpoint()
+    )
+
+    with caplog.at_level(logging.INFO, logger="3d_printer_simulator.services"):
+        released = service.release_order_to_production(large.id)
+        reserved = service.reserve_order_materials(large.id)
+        unreserved = service.release_order_reservation(large.id)
+        feasible = sorted(service.feasibility_index.feasible_orders())
+        assert service.release_order_to_production(feasible[0])["success"]
+
+        # Un fallo dentro de la transacción antes de escribir tampoco recarga
+        def failing_release(order_id):
+            raise ValueError("rechazo simulado")
+
+        monkeypatch.setattr(service.simulator, "release_manufacturing_order", failing_release)
+        assert not service.release_order_to_production(feasible[1])["success"]
+
+    assert "Stock insuficiente" in released["message"]
+    assert "Stock insuficiente" in reserved["message"]
+    assert "no tiene materiales reservados" in unreserved["message"]
+    assert reloads == [] and checkpoints == []
+    assert caplog.records == []
+
+
+def test_release_failing_after_writes_restores_memory(sqlite_container, monkeypatch, caplog):
+    service = sqlite_container.simulation_service
+    service.advance_days(2)
+    order_id = min(service.feasibility_index.feasible_orders())
+    database_before = database_state(sqlite_container)
+    memory_before = memory_state(sqlite_container)
+
+    def failing_order_released(self, order):
+        raise RuntimeError("fallo simulado")
+
+    monkeypatch.setattr(KPIAccumulator, "order_released", failing_order_released)
+    with caplog.at_level(logging.WARNING, logger="3d_printer_simulator.services"):
+        result = service.release_order_to_production(order_id)
+
+    assert not result["success"]
+    assert [record.levelno for record in caplog.records] == [logging.WARNING]
+    assert database_state(sqlite_container) == database_before
+    assert memory_state(sqlite_container) == memory_before
+    assert_memory_matches_database(sqlite_container)
+
+
+
+
+def test_production_capacity_limits_daily_completions(make_sqlite_container, config):
+    # Sin demanda aleatoria; cada orden de 11 unidades ocupa un puesto 22 horas,
+    # así que ningún puesto termina dos órdenes el mismo día
+    config = dict(config, production_capacity_per_day=2, demand_mean=0.0, demand_std_dev=0.0)
+    container = make_sqlite_container(config)
+    service = container.simulation_service
+    for product_id in (3, 4, 6, 8, 9, 10):
+        container.inventory_service.update_stock(product_id, 120, "Stock de prueba")
+    orders = container.manufacturing_service.create_manufacturing_orders([(1, 11)] * 5)
+    for order in orders:
+        assert service.release_order_to_production(order.id)["success"]
+
+    completed, in_production = [], []
+    for _ in range(4):
+        completed.append(service.advance_days(1)[0]["orders_completed"])
+        in_production.append(sorted(
+            order.id for order in container.manufacturing_service.get_in_production_orders()
+        ))
+
+    # Nunca se completan más órdenes al día que la capacidad; las que esperan
+    # turno se fabrican en días posteriores, por orden de liberación
+    ids = [order.id for order in orders]
+    assert completed == [2, 2, 1, 0]
+    assert in_production == [ids[2:], ids[4:], [], []]
+    assert service.simulator.production_queue == {}
+
+
+def test_skipping_idle_days_follows_the_day_by_day_trajectory(config):
+    # Demanda escasa, para que haya tramos sin actividad que saltar
+    config = dict(config, demand_mean=0.2, demand_std_dev=0.5, replenishment=REPLENISHMENT)
+    containers = []
+    for _ in range(2):
+        container = di_container.HeadlessContainer(config)
+        container.initialize()
+        container.seed_database()
+        containers.append(container)
+    day_by_day, skipping = (container.simulation_service for container in containers)
+
+    skipped = 0
+    for _ in range(6):
+        day_by_day.advance_days(20)
+        summaries = skipping.advance_days(20, skip_idle=True)
+        skipped += sum(summary["skipped_days"] for summary in summaries)
+        release_feasible_orders(day_by_day)
+        release_feasible_orders(skipping)
+
+        assert skipping.get_state_summary() == day_by_day.get_state_summary()
+        assert skipping.get_kpis() == day_by_day.get_kpis()
+
+    assert skipped > 0
+
+    # Un salto sin límite de días no genera demanda más allá del máximo
+    simulator = skipping.simulator
+    simulator.advance_to_next_event()
+    checkpoint = simulator.create_checkpoint()
+    assert len(checkpoint.demand_buffer) < simulator.DEMAND_LOOKAHEAD_DAYS
+
+
+def simulated_day(config, days):
+    """Fecha simulada tras cerrar el número de días indicado."""
+    return date.fromisoformat(config["initial_day"]) + timedelta(days=days)
+
+
+def run_until_restart(service):
+    """Cinco días con órdenes liberadas; la última tanda queda en fabricación."""
+    for days in (2, 1, 2):
+        service.advance_days(days)
+        release_feasible_orders(service)
+
+
+@pytest.mark.parametrize("every_days, checkpoint_day", [(3, 3), (10, None)])
+def test_restart_resumes_from_a_lagging_checkpoint(
+    make_sqlite_container, config, monkeypatch, every_days, checkpoint_day
+):
+    # Tras el día 5 el último checkpoint es el del día 3, o ninguno si se
+    # guarda cada 10 días
+    monkeypatch.setattr(di_container, "CHECKPOINT_EVERY_DAYS", every_days)
+    reference = make_sqlite_container(config).simulation_service
+    run_until_restart(reference)
+    container = make_sqlite_container(config)
+    service = container.simulation_service
+    run_until_restart(service)
+    checkpoint = service.checkpoint_store.load()
+    if checkpoint_day is None:
+        assert checkpoint is None
+    else:
+        assert checkpoint.current_date == simulated_day(config, checkpoint_day)
+    assert container.manufacturing_service.get_in_production_orders()
+    before = database_state(container)
+    container.db.disconnect()
+
+    # Nuevo proceso sobre la misma base de datos y el mismo checkpoint
+    restarted = di_container.DIContainer(config)
+    restarted.initialize()
+    try:
+        restarted.simulation_service.start_simulation()
+        restarted_service = restarted.simulation_service
+        assert restarted_service.get_current_date() == simulated_day(config, 5)
+        assert database_state(restarted) == before
+        assert_memory_matches_database(restarted)
+
+        # El día siguiente no repite días ya persistidos y trae la misma demanda
+        assert restarted_service.advance_days(1) == reference.advance_days(1)
+        assert [(o.product_id, o.quantity) for o in restarted.manufacturing_service.get_pending_orders()] == [
+            (o.product_id, o.quantity) for o in reference.manufacturing_service.get_pending_orders()
+        ]
+        dates = [rollup.date for rollup in restarted.kpi_repository.get_all()]
+        assert len(dates) == len(set(dates)) == 6
+        assert restarted_service.get_state_summary() == reference.get_state_summary()
+    finally:
+        restarted.db.disconnect()
@@ -0,0 +1,101 @@
+import pytest
+
+from domain.models import Supplier, SupplierCriterion
+from domain.services import SupplierSelectionService
+
+
+COST = SupplierCriterion.COST
+LEAD_TIME = SupplierCriterion.LEAD_TIME
+WEIGHTED = SupplierCriterion.WEIGHTED
+
+
+def add_supplier(container, name, product_id, unit_cost, lead_time_days):
+    return container.supplier_repository.add(
+        Supplier(id=0, name=name, product_id=product_id, unit_cost=unit_cost, lead_time_days=lead_time_days)
+    )
+
+
+def ranking(selection, product_id, criterion):
+    return [supplier.name for supplier in selection.get_suppliers(product_id, criterion)]
+
+
+def assert_index_is_fresh(container):
+    """El índice mantenido coincide con uno construido de cero desde el repositorio."""
+    selection = container.supplier_selection
+    rebuilt = SupplierSelectionService(container.supplier_repository, selection.config)
+    for product in container.product_repository.get_all():
+        for criterion in SupplierCriterion:
+            assert ranking(selection, product.id, criterion) == ranking(rebuilt, product.id, criterion)
+            for days in range(10):
+                assert selection.best(product.id, days, criterion) == rebuilt.best(product.id, days, criterion)
+
+
+@pytest.fixture
+def pcb_suppliers(container):
+    """
+    Proveedores de pcb_CTRL-V2 (4): el inicial "PCB Factory" (45, 5 días) y
+    cuatro más; "copia" empata con él en coste y plazo, y "barato_lento"
+    empata con "rapido" en la puntuación ponderada.
+    """
+    add_supplier(container, "lento", 4, 30.0, 8)
+    add_supplier(container, "rapido", 4, 60.0, 2)
+    add_supplier(container, "copia", 4, 45.0, 5)
+    add_supplier(container, "barato_lento", 4, 30.0, 6)
+    return container
+
+
+def test_rankings_for_each_criterion(pcb_suppliers):
+    selection = pcb_suppliers.supplier_selection
+
+    assert ranking(selection, 4, COST) == ["barato_lento", "lento", "PCB Factory", "copia", "rapido"]
+    assert ranking(selection, 4, LEAD_TIME) == ["rapido", "PCB Factory", "copia", "barato_lento", "lento"]
+    # Puntuación = coste / 60 + plazo / 8; el empate a 1.25 se deshace por coste
+    assert ranking(selection, 4, WEIGHTED) == ["barato_lento", "rapido", "PCB Factory", "copia", "lento"]
+    assert [supplier.name for supplier in selection.get_suppliers(4)] == [
+        "PCB Factory", "lento", "rapido", "copia", "barato_lento"
+    ]
+
+
+def test_best_supplier_that_arrives_in_time(pcb_suppliers):
+    selection = pcb_suppliers.supplier_selection
+
+    assert selection.best(4, criterion=COST).name == "barato_lento"
+    # A 5 días solo llegan "rapido", "PCB Factory" y "copia"; el empate va al menor ID
+    assert selection.best(4, 5, COST).name == "PCB Factory"
+    assert selection.best(4, 5, LEAD_TIME).name == "rapido"
+    assert selection.best(4, 5, WEIGHTED).name == "rapido"
+    assert selection.best(4, 6, COST).name == "barato_lento"
+    assert selection.best(4, 6, WEIGHTED).name == "barato_lento"
+    # Si nadie llega a tiempo se elige el más rápido, sea cual sea el criterio
+    for criterion in SupplierCriterion:
+        assert selection.best(4, 1, criterion).name == "rapido"
+    assert selection.best(1, 5) is None
+    assert not selection.has_suppliers(1)
+
+
+def test_index_follows_supplier_changes(pcb_suppliers):
+    container = pcb_suppliers
+    selection = container.supplier_selection
+
+    express = add_supplier(container, "express", 4, 10.0, 1)
+    assert selection.best(4, criterion=COST).name == "express"
+    assert selection.best(4, 1, COST).name == "express"
+    assert_index_is_fresh(container)
+
+    express.unit_cost = 100.0
+    container.supplier_repository.update(express)
+    assert ranking(selection, 4, COST)[-1] == "express"
+    assert selection.best(4, criterion=COST).name == "barato_lento"
+    assert_index_is_fresh(container)
+
+    # Cambiar el producto lo saca del índice del anterior
+    express.product_id = 5
+    container.supplier_repository.update(express)
+    assert "express" not in ranking(selection, 4, COST)
+    assert selection.best(5, 1).name == "express"
+    assert_index_is_fresh(container)
+
+    container.supplier_repository.delete(express.id)
+    assert selection.get_supplier(express.id) is None
+    assert "express" not in ranking(selection, 5, COST)
+    assert_index_is_fresh(container)
@@ -0,0 +1,118 @@
+import pytest
+
+from application.sweeps import SweepRunner, expand_grid, sweep_key
+from config.di_container import create_headless_simulation
+from domain.models import SimulationConfig
+from infrastructure.sweep_cache import FileSweepCache, source_code_version
+
+
+class CountingFactory:
+    """Fábrica de réplicas que cuenta cuántas simulaciones se crean."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, config):
+        self.calls += 1
+        return create_headless_simulation(config)
+
+
+@pytest.fixture
+def base(config):
+    """Configuración de partida del barrido, con semilla fija."""
+    return SimulationConfig(**config)
+
+
+def test_expand_grid_builds_every_combination(base):
+    configs = expand_grid(base, {"production_capacity_per_day": [5, 10], "demand_mean": [4.0, 6.0]})
+
+    # Los parámetros se recorren por nombre, en orden determinista
+    assert [(c.demand_mean, c.production_capacity_per_day) for c in configs] == [
+        (4.0, 5), (4.0, 10), (6.0, 5), (6.0, 10)
+    ]
+    assert all(c.seed == base.seed and c.initial_day == base.initial_day for c in configs)
+    with pytest.raises(ValueError):
+        expand_grid(base, {"demand_median": [1.0]})
+
+
+def test_sweep_key_covers_config_horizon_replications_and_code(base):
+    key = sweep_key(base, 30, 4, "v1")
+    assert sweep_key(base.model_copy(), 30, 4, "v1") == key
+
+    variants = [
+        sweep_key(base.model_copy(update={"seed": 8}), 30, 4, "v1"),
+        sweep_key(base.model_copy(update={"demand_mean": 6.0}), 30, 4, "v1"),
+        sweep_key(base, 31, 4, "v1"),
+        sweep_key(base, 30, 5, "v1"),
+        sweep_key(base, 30, 4, "v2"),
+    ]
+    assert len(set(variants + [key])) == len(variants) + 1
+
+
+def test_file_cache_round_trip(tmp_path):
+    cache = FileSweepCache(str(tmp_path / "cache"))
+    samples = [{"service_level": 0.5}, {"service_level": 0.75}]
+
+    assert cache.get("ab" * 32) is None
+    cache.put("ab" * 32, samples)
+    assert cache.get("ab" * 32) == samples
+    assert FileSweepCache(str(tmp_path / "cache")).get("ab" * 32) == samples
+
+
+def test_sweep_reuses_cached_points(base, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    grid = {"production_capacity_per_day": [5, 10]}
+    factory = CountingFactory()
+    runner = SweepRunner(factory, FileSweepCache(cache_dir), code_version="v1", max_workers=1)
+
+    first = runner.run(expand_grid(base, grid), days=10, replications=2)
+    assert first.computed == 2 and factory.calls == 4
+
+    # Otro proceso con la misma caché no vuelve a simular y obtiene lo mismo
+    factory = CountingFactory()
+    runner = SweepRunner(factory, FileSweepCache(cache_dir), code_version="v1", max_workers=1)
+    second = runner.run(expand_grid(base, grid), days=10, replications=2)
+    assert factory.calls == 0
+    assert [point.cached for point in second.points] == [True, True]
+    assert [point.result.samples for point in second.points] == [point.result.samples for point in first.points]
+    assert [point.result.kpis for point in second.points] == [point.result.kpis for point in first.points]
+
+    # Solo se calculan los puntos nuevos
+    extended = runner.run(expand_grid(base, {"production_capacity_per_day": [5, 10, 15]}), days=10, replications=2)
+    assert [point.cached for point in extended.points] == [True, True, False]
+    assert factory.calls == 2
+
+    # Otra versión del código invalida todo lo anterior
+    factory = CountingFactory()
+    runner = SweepRunner(factory, FileSweepCache(cache_dir), code_version="v2", max_workers=1)
+    assert runner.run(expand_grid(base, grid), days=10, replications=2).computed == 2
+    assert factory.calls == 4
+
+
+def test_points_without_seed_are_never_cached(base, tmp_path):
+    cache_dir = tmp_path / "cache"
+    factory = CountingFactory()
+    runner = SweepRunner(factory, FileSweepCache(str(cache_dir)), max_workers=1)
+    configs = [base.model_copy(update={"seed": None})]
+
+    for _ in range(2):
+        point = runner.run(configs, days=5).points[0]
+        assert not point.cached and point.key is None
+    assert factory.calls == 2
+    assert not any(cache_dir.iterdir())
+
+
+def test_source_code_version_tracks_simulation_sources(tmp_path):
+    (tmp_path / "domain").mkdir()
+    (tmp_path / "presentation").mkdir()
+    model = tmp_path / "domain" / "models.py"
+    model.write_text("A = 1\n")
+    (tmp_path / "presentation" / "api.py").write_text("B = 1\n")
+    version = source_code_version(str(tmp_path))
+
+    # La capa de presentación no afecta a los resultados
+    (tmp_path / "presentation" / "api.py").write_text("B = 2\n")
+    assert source_code_version(str(tmp_path)) == version
+
+    model.write_text("A = 2\n")
+    assert source_code_version(str(tmp_path)) != version